@@ -1,7 +1,9 @@
 """ MyHOME integration. """
 
-import aiofiles
-import yaml
+import asyncio
+import time
+
+from voluptuous import Invalid
 
 from OWNd.message import OWNCommand, OWNGatewayCommand
 
@@ -14,18 +16,32 @@ from homeassistant.const import CONF_MAC
 from .const import (
     ATTR_GATEWAY,
     ATTR_MESSAGE,
+    ATTR_MONTHS,
+    ATTR_PATH,
     CONF_PLATFORMS,
     CONF_ENTITY,
     CONF_ENTITIES,
     CONF_GATEWAY,
     CONF_WORKER_COUNT,
-    CONF_FILE_PATH,
+    CONF_PIPELINE_WINDOW,
+    CONF_POWER_PUBLISH_INTERVAL,
+    CONF_POWER_PUBLISH_THRESHOLD,
     CONF_GENERATE_EVENTS,
+    DEFAULT_ENERGY_BACKFILL_DELAY,
+    DEFAULT_PIPELINE_WINDOW,
+    DEFAULT_POWER_PUBLISH_INTERVAL,
+    DEFAULT_POWER_PUBLISH_THRESHOLD,
     DOMAIN,
+    IMPORT_START,
     LOGGER,
 )
-from .validate import config_schema, format_mac
+from .backfill import BACKFILL_MAX_MONTHS
+from .validate import format_mac
 from .gateway import MyHOMEGatewayHandler
+from .metrics import MyHOMEMetricsView
+from .reload import async_load_config, async_reload_config, config_file_path
+
+IMPORT_TIME = time.perf_counter() - IMPORT_START
 
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 PLATFORMS = ["light", "switch", "cover", "climate", "binary_sensor", "sensor"]
@@ -34,6 +50,7 @@ PLATFORMS = ["light", "switch", "cover", "climate", "binary_sensor", "sensor"]
 async def async_setup(hass, config):
     """Set up the MyHOME component."""
     hass.data[DOMAIN] = {}
+    hass.http.register_view(MyHOMEMetricsView)
 
     if DOMAIN not in config:
         return True
@@ -44,23 +61,21 @@ async def async_setup(hass, config):
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
+    _setup_start = time.perf_counter()
     if entry.data[CONF_MAC] not in hass.data[DOMAIN]:
         hass.data[DOMAIN][entry.data[CONF_MAC]] = {}
 
-    _config_file_path = (
-        str(entry.options[CONF_FILE_PATH])
-        if CONF_FILE_PATH in entry.options
-        else "/config/myhome.yaml"
-    )
+    _config_file_path = config_file_path(entry)
     _generate_events = (
         entry.options[CONF_GENERATE_EVENTS]
         if CONF_GENERATE_EVENTS in entry.options
         else False
     )
+    _power_publish_interval = entry.options.get(CONF_POWER_PUBLISH_INTERVAL, DEFAULT_POWER_PUBLISH_INTERVAL)
+    _power_publish_threshold = entry.options.get(CONF_POWER_PUBLISH_THRESHOLD, DEFAULT_POWER_PUBLISH_THRESHOLD)
 
     try:
-        async with aiofiles.open(_config_file_path, mode="r") as yaml_file:
-            _validated_config = config_schema(yaml.safe_load(await yaml_file.read()))
+        _validated_config = await async_load_config(hass, _config_file_path)
     except FileNotFoundError:
         LOGGER.error(f"Configartion file '{_config_file_path}' is not present!")
         return False
@@ -71,6 +86,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         ]
     else:
         return False
+    _config_time = time.perf_counter() - _setup_start
 
     # Migrating the config entry's unique_id if it was not formated to the recommended hass standard
     if entry.unique_id != dr.format_mac(entry.unique_id):
@@ -80,7 +96,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         LOGGER.warning("Migrating config entry unique_id to %s", entry.unique_id)
 
     hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY] = MyHOMEGatewayHandler(
-        hass=hass, config_entry=entry, generate_events=_generate_events
+        hass=hass,
+        config_entry=entry,
+        generate_events=_generate_events,
+        power_publish_interval=_power_publish_interval,
+        power_publish_threshold=_power_publish_threshold,
     )
 
     try:
@@ -114,6 +134,11 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         if CONF_WORKER_COUNT in entry.options
         else 1
     )
+    _command_pipeline_window = (
+        int(entry.options[CONF_PIPELINE_WINDOW])
+        if CONF_PIPELINE_WINDOW in entry.options
+        else DEFAULT_PIPELINE_WINDOW
+    )
 
     entity_registry = er.async_get(hass)
     device_registry = dr.async_get(hass)
@@ -130,21 +155,31 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         sw_version=hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY].firmware,
     )
 
-    await hass.config_entries.async_forward_entry_setups(
-        entry, hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_PLATFORMS].keys()
+    hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY].startup_sync.plan(
+        hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_PLATFORMS]
     )
 
-    hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY].listening_worker = (
-        hass.loop.create_task(
-            hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY].listening_loop()
+    # Only the configured platforms are imported and set up, each one timed
+    _platform_setup_times = {}
+
+    async def _async_forward_entry_setup(platform):
+        _platform_start = time.perf_counter()
+        await hass.config_entries.async_forward_entry_setups(entry, [platform])
+        _platform_setup_times[platform] = time.perf_counter() - _platform_start
+
+    await asyncio.gather(
+        *(
+            _async_forward_entry_setup(_platform)
+            for _platform in hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_PLATFORMS].keys()
         )
     )
-    for i in range(_command_worker_count):
-        hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY].sending_workers.append(
-            hass.loop.create_task(
-                hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY].sending_loop(i)
-            )
-        )
+
+    hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY].start_listener()
+    hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY].start_command_pool(
+        _command_worker_count, _command_pipeline_window
+    )
+    await hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY].startup_sync.async_start()
+    hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY].energy_backfill.schedule(DEFAULT_ENERGY_BACKFILL_DELAY)
 
     # Pruning lose entities and devices from the registry
     entity_entries = er.async_entries_for_config_entry(entity_registry, entry.entry_id)
@@ -268,6 +303,149 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     hass.services.async_register(DOMAIN, "send_message", handle_send_message)
 
+    async def handle_start_capture(call):
+        gateway = call.data.get(ATTR_GATEWAY, None)
+        path = call.data.get(ATTR_PATH, None)
+        if gateway is None:
+            gateway = list(hass.data[DOMAIN].keys())[0]
+        else:
+            mac = format_mac(gateway)
+            if mac is None:
+                LOGGER.error(
+                    "Invalid gateway mac `%s`, could not start capture.",
+                    gateway,
+                )
+                return False
+            else:
+                gateway = mac
+        if gateway in hass.data[DOMAIN]:
+            if path is None:
+                path = hass.config.path(f"myhome_capture_{gateway.replace(':', '')}.log")
+            await hass.data[DOMAIN][gateway][CONF_ENTITY].async_start_capture(path)
+        else:
+            LOGGER.error(
+                "Gateway `%s` not found, could not start capture.",
+                gateway,
+            )
+            return False
+
+    hass.services.async_register(DOMAIN, "start_capture", handle_start_capture)
+
+    async def handle_stop_capture(call):
+        gateway = call.data.get(ATTR_GATEWAY, None)
+        if gateway is None:
+            gateway = list(hass.data[DOMAIN].keys())[0]
+        else:
+            mac = format_mac(gateway)
+            if mac is None:
+                LOGGER.error(
+                    "Invalid gateway mac `%s`, could not stop capture.",
+                    gateway,
+                )
+                return False
+            else:
+                gateway = mac
+        if gateway in hass.data[DOMAIN]:
+            await hass.data[DOMAIN][gateway][CONF_ENTITY].async_stop_capture()
+        else:
+            LOGGER.error(
+                "Gateway `%s` not found, could not stop capture.",
+                gateway,
+            )
+            return False
+
+    hass.services.async_register(DOMAIN, "stop_capture", handle_stop_capture)
+
+    async def handle_reload_config(call):
+        gateway = call.data.get(ATTR_GATEWAY, None)
+        if gateway is None:
+            gateway = list(hass.data[DOMAIN].keys())[0]
+        else:
+            mac = format_mac(gateway)
+            if mac is None:
+                LOGGER.error(
+                    "Invalid gateway mac `%s`, could not reload configuration.",
+                    gateway,
+                )
+                return False
+            else:
+                gateway = mac
+        if gateway not in hass.data[DOMAIN]:
+            LOGGER.error(
+                "Gateway `%s` not found, could not reload configuration.",
+                gateway,
+            )
+            return False
+        _entry = hass.data[DOMAIN][gateway][CONF_ENTITY].config_entry
+        _config_file_path = config_file_path(_entry)
+        try:
+            _validated_config = await async_load_config(hass, _config_file_path)
+        except FileNotFoundError:
+            LOGGER.error(f"Configartion file '{_config_file_path}' is not present!")
+            return False
+        except Invalid as invalid:
+            LOGGER.error(
+                "Configuration file '%s' is invalid, keeping the running configuration: %s",
+                _config_file_path,
+                invalid,
+            )
+            return False
+        if gateway not in _validated_config:
+            LOGGER.error(
+                "Gateway `%s` is not in '%s' anymore, not reloading its configuration.",
+                gateway,
+                _config_file_path,
+            )
+            return False
+        await async_reload_config(hass, _entry, _validated_config[gateway])
+
+    hass.services.async_register(DOMAIN, "reload_config", handle_reload_config)
+
+    async def handle_backfill_energy(call):
+        gateway = call.data.get(ATTR_GATEWAY, None)
+        months = call.data.get(ATTR_MONTHS, None)
+        if gateway is None:
+            gateway = list(hass.data[DOMAIN].keys())[0]
+        else:
+            mac = format_mac(gateway)
+            if mac is None:
+                LOGGER.error(
+                    "Invalid gateway mac `%s`, could not backfill the energy history.",
+                    gateway,
+                )
+                return False
+            else:
+                gateway = mac
+        if months is not None:
+            try:
+                months = min(max(int(months), 1), BACKFILL_MAX_MONTHS)
+            except (TypeError, ValueError):
+                LOGGER.error("Invalid number of months `%s`, could not backfill the energy history.", months)
+                return False
+        if gateway in hass.data[DOMAIN]:
+            hass.data[DOMAIN][gateway][CONF_ENTITY].energy_backfill.start(months)
+        else:
+            LOGGER.error(
+                "Gateway `%s` not found, could not backfill the energy history.",
+                gateway,
+            )
+            return False
+
+    hass.services.async_register(DOMAIN, "backfill_energy", handle_backfill_energy)
+
+    hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY].setup_timings = {
+        "import": IMPORT_TIME,
+        "config": _config_time,
+        "platforms": _platform_setup_times,
+        "total": time.perf_counter() - _setup_start,
+    }
+    LOGGER.debug(
+        "%s Setup took %.3fs (platforms: %s).",
+        hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY].log_id,
+        hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY].setup_timings["total"],
+        ", ".join(f"{_platform} {_time:.3f}s" for _platform, _time in _platform_setup_times.items()),
+    )
+
     return True
 
 
@@ -281,6 +459,10 @@ async def async_unload_entry(hass, entry):
 
     hass.services.async_remove(DOMAIN, "sync_time")
     hass.services.async_remove(DOMAIN, "send_message")
+    hass.services.async_remove(DOMAIN, "start_capture")
+    hass.services.async_remove(DOMAIN, "stop_capture")
+    hass.services.async_remove(DOMAIN, "reload_config")
+    hass.services.async_remove(DOMAIN, "backfill_energy")
 
     gateway_handler = hass.data[DOMAIN][entry.data[CONF_MAC]].pop(CONF_ENTITY)
     del hass.data[DOMAIN][entry.data[CONF_MAC]]
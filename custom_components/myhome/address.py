@@ -0,0 +1,60 @@
+"""Parsed OpenWebNet addresses, computed once and shared."""
+import sys
+from typing import Dict, Optional, Tuple
+
+WHERE_GENERAL = "general"
+WHERE_AREA = "area"
+WHERE_GROUP = "group"
+WHERE_POINT = "point"
+WHERE_OTHER = "other"
+
+
+class MyHOMEAddress:
+    """A WHO/WHERE/interface triple and everything derived from it.
+
+    Addresses are obtained through `get`, which returns the same instance for
+    the same triple: the kind of WHERE, the area of a point, the WHERE with
+    its interface suffix and the dispatch key are worked out once, and their
+    strings are interned so that the keys of the dispatch index and of the
+    configuration are shared.
+    """
+
+    __slots__ = ("who", "where", "interface", "kind", "a", "pl", "area", "full_where", "key")
+
+    _cache: Dict[Tuple[str, str, Optional[str]], "MyHOMEAddress"] = {}
+
+    @classmethod
+    def get(cls, who: str, where: str, interface: str = None) -> "MyHOMEAddress":
+        _cache_key = (str(who), where, interface)
+        _address = cls._cache.get(_cache_key)
+        if _address is None:
+            _address = cls._cache[_cache_key] = cls(*_cache_key)
+        return _address
+
+    def __init__(self, who: str, where: str, interface: Optional[str]):
+        self.who = sys.intern(who)
+        self.where = sys.intern(where)
+        self.interface = sys.intern(interface) if interface is not None else None
+        # A/PL as shown in the entities' attributes, only meaningful for points
+        self.a = sys.intern(where[: len(where) // 2])
+        self.pl = sys.intern(where[len(where) // 2 :])
+        self.area = None
+
+        if where == "0":
+            self.kind = WHERE_GENERAL
+        elif where in ("00", "100") or (len(where) == 1 and where.isdigit()):
+            self.kind = WHERE_AREA
+        elif where.startswith("#") and where[1:].isdigit():
+            self.kind = WHERE_GROUP
+        elif where.isdigit() and len(where) in (2, 4) and where != "10":
+            self.kind = WHERE_POINT
+            _a = int(self.a)
+            self.area = "00" if _a == 0 else "100" if _a == 10 else str(_a)
+        else:
+            self.kind = WHERE_OTHER
+
+        self.full_where = sys.intern(f"{where}#4#{interface}" if interface is not None else where)
+        self.key = sys.intern(f"{who}-{self.full_where}")
+
+    def __repr__(self) -> str:
+        return f"MyHOMEAddress({self.key})"
@@ -0,0 +1,264 @@
+"""Backfill of the meters' past daily consumption into the long-term statistics."""
+import asyncio
+import calendar
+import time
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+    statistics_during_period,
+)
+from homeassistant.const import UnitOfEnergy
+from homeassistant.util import dt as dt_util, slugify
+
+from OWNd.message import MESSAGE_TYPE_DAILY_CONSUMPTION, OWNCommand, OWNEnergyCommand, OWNEnergyEvent
+
+from .const import DOMAIN, LOGGER
+
+# Months queried at most unless a number of months is requested, also for a
+# meter without any statistics yet
+BACKFILL_DEFAULT_MONTHS = 2
+# Meters keep the daily consumption of the last two years
+BACKFILL_MAX_MONTHS = 24
+# Month requests waiting for their answer at once
+BACKFILL_CONCURRENCY = 2
+# Frames sent by a meter for each day of a month requested
+BACKFILL_FRAMES_PER_DAY = 25
+# Frames per second the meters are given to answer, which spaces the requests
+BACKFILL_FRAME_RATE = 10
+# Time given to a meter on top of the days of a month at that rate (s)
+BACKFILL_TIMEOUT = 30
+
+
+class _MonthRequest:
+    __slots__ = ("device_id", "year", "month", "last_day", "days", "done")
+
+    def __init__(self, device_id: str, year: int, month: int, last_day: int):
+        self.device_id = device_id
+        self.year = year
+        self.month = month
+        # The month is complete once every day up to this one was received
+        self.last_day = last_day
+        self.days: Dict[date, int] = {}
+        self.done = asyncio.Event()
+
+
+class MyHOMEEnergyBackfill:
+    """Imports the past daily consumption of every energy meter.
+
+    The meters answer a single request with the consumption of each day of
+    a month, which costs the bus some 25 frames per day. Requests are sent
+    month by month across the meters, a few at a time and spaced by the
+    time their answer takes at BACKFILL_FRAME_RATE, with the priority of
+    status requests; the days are collected from the event session and
+    written to the long-term statistics in one batch per meter, continuing
+    the sum of the days already imported. Unless a number of months is
+    requested, only the last BACKFILL_DEFAULT_MONTHS months are looked at.
+    """
+
+    def __init__(
+        self,
+        hass,
+        log_id: str,
+        mac: str,
+        send: Callable[[OWNCommand], Awaitable[None]],
+        meters: Callable[[], Dict[str, Tuple[str, str]]],
+    ):
+        self._hass = hass
+        self._log_id = log_id
+        self._mac = mac
+        self._send = send
+        self._meters = meters
+        # Device ID -> day -> consumption (Wh), while running
+        self._days: Dict[str, Dict[date, int]] = {}
+        self._requests: Dict[Tuple[str, int, int], _MonthRequest] = {}
+        self._task: asyncio.Task = None
+        self._timer: asyncio.TimerHandle = None
+        self.requests = 0
+        self.incomplete = 0
+        self.imported = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def schedule(self, delay: float) -> None:
+        """Backfill what was missed while Home Assistant was down, once set up."""
+        self._timer = self._hass.loop.call_later(delay, self.start)
+
+    def start(self, months: Optional[int] = None) -> None:
+        """Backfill the last `months` months, or from the last day imported."""
+        self._timer = None
+        if self.running:
+            LOGGER.warning("%s An energy backfill is already running.", self._log_id)
+            return
+        if "recorder" not in self._hass.config.components:
+            LOGGER.debug("%s No recorder, skipping the energy backfill.", self._log_id)
+            return
+        self._task = self._hass.async_create_task(self._async_run(months))
+
+    def statistic_id(self, device_id: str) -> str:
+        return f"{DOMAIN}:{slugify(f'{self._mac}_{device_id}')}_daily_energy"
+
+    def handle_event(self, message: OWNEnergyEvent) -> None:
+        if message.message_type != MESSAGE_TYPE_DAILY_CONSUMPTION:
+            return
+        _day = message.daily_consumption["date"]
+        _request = self._requests.get((message.entity, _day.year, _day.month))
+        if _request is None or _day.day > _request.last_day:
+            return
+        _request.days[_day] = message.daily_consumption["value"]
+        if len(_request.days) == _request.last_day:
+            _request.done.set()
+
+    async def _async_run(self, months: Optional[int]) -> None:
+        _start = time.monotonic()
+        _meters = self._meters()
+        _yesterday = dt_util.now().date() - timedelta(days=1)
+
+        # Device ID -> first day to import and sum of the days before it
+        _ranges: Dict[str, Tuple[date, float]] = {}
+        for _device_id in _meters:
+            _range = await self._async_range(_device_id, months, _yesterday)
+            if _range is not None:
+                _ranges[_device_id] = _range
+        if not _ranges:
+            return
+
+        # Month by month across the meters, so that the requests in flight target different meters
+        _jobs: List[Tuple[int, int, str, int]] = []
+        for _device_id, (_first, _) in _ranges.items():
+            self._days[_device_id] = {}
+            _year, _month = _first.year, _first.month
+            while (_year, _month) <= (_yesterday.year, _yesterday.month):
+                _last_day = _yesterday.day if (_year, _month) == (_yesterday.year, _yesterday.month) else calendar.monthrange(_year, _month)[1]
+                _jobs.append((_year, _month, _device_id, _last_day))
+                _year, _month = (_year + 1, 1) if _month == 12 else (_year, _month + 1)
+        _jobs.sort()
+
+        LOGGER.info("%s Backfilling the energy of %s meter(s), %s month(s) to query.", self._log_id, len(_ranges), len(_jobs))
+        _slots = asyncio.Semaphore(BACKFILL_CONCURRENCY)
+        _pending = []
+        try:
+            for _year, _month, _device_id, _last_day in _jobs:
+                _command = OWNEnergyCommand.get_daily_consumption(_meters[_device_id][0], _year, _month)
+                if _command is None:
+                    continue
+                await _slots.acquire()
+                _request = _MonthRequest(_device_id, _year, _month, _last_day)
+                self._requests[(_device_id, _year, _month)] = _request
+                self.requests += 1
+                await self._send(_command)
+                _pending.append(self._hass.async_create_task(self._async_wait(_request, _slots)))
+                await asyncio.sleep(self._answer_time(_last_day))
+            if _pending:
+                await asyncio.gather(*_pending)
+
+            _days = 0
+            for _device_id, (_first, _sum) in _ranges.items():
+                _days += self._import(_device_id, _meters[_device_id][1], _first, _yesterday, _sum)
+        finally:
+            for _task in _pending:
+                _task.cancel()
+            self._requests.clear()
+            self._days.clear()
+
+        self.imported += _days
+        LOGGER.info("%s Backfilled %s day(s) of energy in %.1fs.", self._log_id, _days, time.monotonic() - _start)
+
+    @staticmethod
+    def _answer_time(days: int) -> float:
+        """Time a meter takes to send `days` days at the rate allowed (s)."""
+        return days * BACKFILL_FRAMES_PER_DAY / BACKFILL_FRAME_RATE
+
+    async def _async_wait(self, request: _MonthRequest, slots: asyncio.Semaphore) -> None:
+        try:
+            await asyncio.wait_for(request.done.wait(), BACKFILL_TIMEOUT + self._answer_time(request.last_day))
+        except asyncio.TimeoutError:
+            self.incomplete += 1
+            LOGGER.debug(
+                "%s Incomplete daily consumption of %s for %s-%02d.", self._log_id, request.device_id, request.year, request.month
+            )
+        finally:
+            self._requests.pop((request.device_id, request.year, request.month), None)
+            slots.release()
+        self._days[request.device_id].update(request.days)
+
+    async def _async_range(self, device_id: str, months: Optional[int], yesterday: date) -> Optional[Tuple[date, float]]:
+        """First day to query for a meter, and the sum of the statistics before it."""
+        _statistic_id = self.statistic_id(device_id)
+        _months = min(months or BACKFILL_DEFAULT_MONTHS, BACKFILL_MAX_MONTHS) - 1
+        _year, _month = divmod(yesterday.year * 12 + yesterday.month - 1 - _months, 12)
+        _first = date(_year, _month + 1, 1)
+        if months is None:
+            _last = await get_instance(self._hass).async_add_executor_job(
+                get_last_statistics, self._hass, 1, _statistic_id, True, {"sum"}
+            )
+            if _last.get(_statistic_id):
+                _row = _last[_statistic_id][0]
+                _next = dt_util.as_local(dt_util.utc_from_timestamp(_row["start"])).date() + timedelta(days=1)
+                if _next > yesterday:
+                    return None
+                # A longer gap is left to a backfill of a number of months
+                if _next >= _first:
+                    return _next, _row["sum"] or 0
+
+        _first_start = dt_util.start_of_local_day(_first)
+        _before = await get_instance(self._hass).async_add_executor_job(
+            statistics_during_period,
+            self._hass,
+            _first_start - timedelta(days=31 * BACKFILL_MAX_MONTHS),
+            _first_start,
+            {_statistic_id},
+            "hour",
+            None,
+            {"sum"},
+        )
+        _rows = _before.get(_statistic_id)
+        return _first, (_rows[-1]["sum"] or 0) if _rows else 0
+
+    def _import(self, device_id: str, name: str, first: date, last: date, total: float) -> int:
+        """Import the days received from `first` on, up to the first one missing."""
+        _days = self._days.get(device_id, {})
+        _statistics: List[StatisticData] = []
+        _day = first
+        while _day <= last and _day in _days:
+            total += _days[_day]
+            _statistics.append(StatisticData(start=dt_util.start_of_local_day(_day), state=_days[_day], sum=total))
+            _day += timedelta(days=1)
+        if _day <= last:
+            LOGGER.warning("%s No consumption from %s for %s, backfilled up to the day before.", self._log_id, name, _day)
+        if not _statistics:
+            return 0
+
+        _metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"{name} Energy (daily)",
+            source=DOMAIN,
+            statistic_id=self.statistic_id(device_id),
+            unit_of_measurement=UnitOfEnergy.WATT_HOUR,
+        )
+        async_add_external_statistics(self._hass, _metadata, _statistics)
+        return len(_statistics)
+
+    def cancel(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "requests": self.requests,
+            "incomplete": self.incomplete,
+            "imported": self.imported,
+        }
@@ -11,6 +11,7 @@ from homeassistant.const import (
     CONF_ENTITIES,
     STATE_ON,
 )
+from homeassistant.core import callback
 from homeassistant.helpers.restore_state import RestoreEntity
 
 from OWNd.message import (
@@ -47,59 +48,64 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     if PLATFORM not in hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS]:
         return True
 
-    _binary_sensors = []
-    _configured_binary_sensors = hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM]
-
-    for _binary_sensor in _configured_binary_sensors.keys():
-        _who = int(_configured_binary_sensors[_binary_sensor][CONF_WHO])
-        _device_class = _configured_binary_sensors[_binary_sensor][CONF_DEVICE_CLASS]
-        if _who == 25:
-            _binary_sensor = MyHOMEDryContact(
-                hass=hass,
-                device_id=_binary_sensor,
-                who=_configured_binary_sensors[_binary_sensor][CONF_WHO],
-                where=_configured_binary_sensors[_binary_sensor][CONF_WHERE],
-                name=_configured_binary_sensors[_binary_sensor][CONF_NAME],
-                entity_name=_configured_binary_sensors[_binary_sensor][CONF_ENTITY_NAME],
-                inverted=_configured_binary_sensors[_binary_sensor][CONF_INVERTED],
-                device_class=_device_class,
-                manufacturer=_configured_binary_sensors[_binary_sensor][CONF_MANUFACTURER],
-                model=_configured_binary_sensors[_binary_sensor][CONF_DEVICE_MODEL],
-                gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
-            )
-            _binary_sensors.append(_binary_sensor)
-        elif _who == 9:
-            _binary_sensor = MyHOMEAuxiliary(
-                hass=hass,
-                device_id=_binary_sensor,
-                who=_configured_binary_sensors[_binary_sensor][CONF_WHO],
-                where=_configured_binary_sensors[_binary_sensor][CONF_WHERE],
-                name=_configured_binary_sensors[_binary_sensor][CONF_NAME],
-                entity_name=_configured_binary_sensors[_binary_sensor][CONF_ENTITY_NAME],
-                inverted=_configured_binary_sensors[_binary_sensor][CONF_INVERTED],
-                device_class=_device_class,
-                manufacturer=_configured_binary_sensors[_binary_sensor][CONF_MANUFACTURER],
-                model=_configured_binary_sensors[_binary_sensor][CONF_DEVICE_MODEL],
-                gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
-            )
-            _binary_sensors.append(_binary_sensor)
-        elif _who == 1 and _device_class == BinarySensorDeviceClass.MOTION:
-            _binary_sensor = MyHOMEMotionSensor(
-                hass=hass,
-                device_id=_binary_sensor,
-                who=_configured_binary_sensors[_binary_sensor][CONF_WHO],
-                where=_configured_binary_sensors[_binary_sensor][CONF_WHERE],
-                name=_configured_binary_sensors[_binary_sensor][CONF_NAME],
-                entity_name=_configured_binary_sensors[_binary_sensor][CONF_ENTITY_NAME],
-                inverted=_configured_binary_sensors[_binary_sensor][CONF_INVERTED],
-                device_class=_device_class,
-                manufacturer=_configured_binary_sensors[_binary_sensor][CONF_MANUFACTURER],
-                model=_configured_binary_sensors[_binary_sensor][CONF_DEVICE_MODEL],
-                gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
-            )
-            _binary_sensors.append(_binary_sensor)
-
-    async_add_entities(_binary_sensors)
+    @callback
+    def _async_add_binary_sensors(device_ids):
+        _binary_sensors = []
+        _configured_binary_sensors = hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM]
+
+        for _binary_sensor in device_ids:
+            _who = int(_configured_binary_sensors[_binary_sensor][CONF_WHO])
+            _device_class = _configured_binary_sensors[_binary_sensor][CONF_DEVICE_CLASS]
+            if _who == 25:
+                _binary_sensor = MyHOMEDryContact(
+                    hass=hass,
+                    device_id=_binary_sensor,
+                    who=_configured_binary_sensors[_binary_sensor][CONF_WHO],
+                    where=_configured_binary_sensors[_binary_sensor][CONF_WHERE],
+                    name=_configured_binary_sensors[_binary_sensor][CONF_NAME],
+                    entity_name=_configured_binary_sensors[_binary_sensor][CONF_ENTITY_NAME],
+                    inverted=_configured_binary_sensors[_binary_sensor][CONF_INVERTED],
+                    device_class=_device_class,
+                    manufacturer=_configured_binary_sensors[_binary_sensor][CONF_MANUFACTURER],
+                    model=_configured_binary_sensors[_binary_sensor][CONF_DEVICE_MODEL],
+                    gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
+                )
+                _binary_sensors.append(_binary_sensor)
+            elif _who == 9:
+                _binary_sensor = MyHOMEAuxiliary(
+                    hass=hass,
+                    device_id=_binary_sensor,
+                    who=_configured_binary_sensors[_binary_sensor][CONF_WHO],
+                    where=_configured_binary_sensors[_binary_sensor][CONF_WHERE],
+                    name=_configured_binary_sensors[_binary_sensor][CONF_NAME],
+                    entity_name=_configured_binary_sensors[_binary_sensor][CONF_ENTITY_NAME],
+                    inverted=_configured_binary_sensors[_binary_sensor][CONF_INVERTED],
+                    device_class=_device_class,
+                    manufacturer=_configured_binary_sensors[_binary_sensor][CONF_MANUFACTURER],
+                    model=_configured_binary_sensors[_binary_sensor][CONF_DEVICE_MODEL],
+                    gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
+                )
+                _binary_sensors.append(_binary_sensor)
+            elif _who == 1 and _device_class == BinarySensorDeviceClass.MOTION:
+                _binary_sensor = MyHOMEMotionSensor(
+                    hass=hass,
+                    device_id=_binary_sensor,
+                    who=_configured_binary_sensors[_binary_sensor][CONF_WHO],
+                    where=_configured_binary_sensors[_binary_sensor][CONF_WHERE],
+                    name=_configured_binary_sensors[_binary_sensor][CONF_NAME],
+                    entity_name=_configured_binary_sensors[_binary_sensor][CONF_ENTITY_NAME],
+                    inverted=_configured_binary_sensors[_binary_sensor][CONF_INVERTED],
+                    device_class=_device_class,
+                    manufacturer=_configured_binary_sensors[_binary_sensor][CONF_MANUFACTURER],
+                    model=_configured_binary_sensors[_binary_sensor][CONF_DEVICE_MODEL],
+                    gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
+                )
+                _binary_sensors.append(_binary_sensor)
+
+        async_add_entities(_binary_sensors)
+
+    hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY].register_platform(PLATFORM, _async_add_binary_sensors)
+    _async_add_binary_sensors(list(hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM].keys()))
 
 
 async def async_unload_entry(hass, config_entry):
@@ -152,10 +158,13 @@ class MyHOMEDryContact(MyHOMEEntity, BinarySensorEntity):
     async def async_added_to_hass(self):
         """When entity is added to hass."""
         self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][self._platform][self._device_id][CONF_ENTITIES][self._attr_device_class] = self
+        self._gateway_handler.register_entity(self._device_id, self)
         await self.async_update()
 
     async def async_will_remove_from_hass(self):
         """When entity is removed from hass."""
+        self._cancel_state_write()
+        self._gateway_handler.unregister_entity(self._device_id, self)
         if self._attr_device_class in self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][self._platform][self._device_id][CONF_ENTITIES]:
             del self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][self._platform][self._device_id][CONF_ENTITIES][self._attr_device_class]
 
@@ -217,10 +226,13 @@ class MyHOMEAuxiliary(MyHOMEEntity, BinarySensorEntity):
     async def async_added_to_hass(self):
         """When entity is added to hass."""
         self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][self._platform][self._device_id][CONF_ENTITIES][self._attr_device_class] = self
+        self._gateway_handler.register_entity(self._device_id, self)
         await self.async_update()
 
     async def async_will_remove_from_hass(self):
         """When entity is removed from hass."""
+        self._cancel_state_write()
+        self._gateway_handler.unregister_entity(self._device_id, self)
         if self._attr_device_class in self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][self._platform][self._device_id][CONF_ENTITIES]:
             del self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][self._platform][self._device_id][CONF_ENTITIES][self._attr_device_class]
 
@@ -277,8 +289,7 @@ class MyHOMEMotionSensor(MyHOMEEntity, BinarySensorEntity, RestoreEntity):
         self._attr_should_poll = True
         self._attr_is_on = None
         self._attr_extra_state_attributes = {
-            "A": where[: len(where) // 2],
-            "PL": where[len(where) // 2 :],
+            **self._record.address_attributes,
             "Timeout": self._timeout.total_seconds(),
             "Sensitivity": PIR_SENSITIVITY[1],
         }
@@ -286,6 +297,7 @@ class MyHOMEMotionSensor(MyHOMEEntity, BinarySensorEntity, RestoreEntity):
     async def async_added_to_hass(self):
         """When entity is added to hass."""
         self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][self._platform][self._device_id][CONF_ENTITIES][self._attr_device_class] = self
+        self._gateway_handler.register_entity(self._device_id, self)
         await self._gateway_handler.send_status_request(OWNLightingCommand.get_pir_sensitivity(self._where))
         await self._gateway_handler.send_status_request(OWNLightingCommand.get_motion_timeout(self._where))
         state = await self.async_get_last_state()
@@ -296,6 +308,8 @@ class MyHOMEMotionSensor(MyHOMEEntity, BinarySensorEntity, RestoreEntity):
 
     async def async_will_remove_from_hass(self):
         """When entity is removed from hass."""
+        self._cancel_state_write()
+        self._gateway_handler.unregister_entity(self._device_id, self)
         if self._attr_device_class in self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][self._platform][self._device_id][CONF_ENTITIES]:
             del self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][self._platform][self._device_id][CONF_ENTITIES][self._attr_device_class]
 
@@ -17,6 +17,7 @@ from homeassistant.const import (
     CONF_ENTITIES,
     EntityCategory,
 )
+from homeassistant.core import callback
 
 from .const import (
     CONF_PLATFORMS,
@@ -35,49 +36,54 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     if PLATFORM not in hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS]:
         return True
 
-    _buttons = []
-    _configured_buttons = hass.data[DOMAIN][config_entry.data[CONF_MAC]][
-        CONF_PLATFORMS
-    ][PLATFORM]
-
-    for _button in _configured_buttons.keys():
-        _disable_button = DisableCommandButtonEntity(
-            hass=hass,
-            platform=PLATFORM,
-            device_id=_button,
-            who=_configured_buttons[_button][CONF_WHO],
-            where=_configured_buttons[_button][CONF_WHERE],
-            interface=(
-                _configured_buttons[_button][CONF_BUS_INTERFACE]
-                if CONF_BUS_INTERFACE in _configured_buttons[_button]
-                else None
-            ),
-            name=_configured_buttons[_button][CONF_NAME],
-            manufacturer=_configured_buttons[_button][CONF_MANUFACTURER],
-            model=_configured_buttons[_button][CONF_DEVICE_MODEL],
-            gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
-        )
-        _buttons.append(_disable_button)
-
-        _enable_button = EnableCommandButtonEntity(
-            hass=hass,
-            platform=PLATFORM,
-            device_id=_button,
-            who=_configured_buttons[_button][CONF_WHO],
-            where=_configured_buttons[_button][CONF_WHERE],
-            interface=(
-                _configured_buttons[_button][CONF_BUS_INTERFACE]
-                if CONF_BUS_INTERFACE in _configured_buttons[_button]
-                else None
-            ),
-            name=_configured_buttons[_button][CONF_NAME],
-            manufacturer=_configured_buttons[_button][CONF_MANUFACTURER],
-            model=_configured_buttons[_button][CONF_DEVICE_MODEL],
-            gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
-        )
-        _buttons.append(_enable_button)
-
-    async_add_entities(_buttons)
+    @callback
+    def _async_add_buttons(device_ids):
+        _buttons = []
+        _configured_buttons = hass.data[DOMAIN][config_entry.data[CONF_MAC]][
+            CONF_PLATFORMS
+        ][PLATFORM]
+
+        for _button in device_ids:
+            _disable_button = DisableCommandButtonEntity(
+                hass=hass,
+                platform=PLATFORM,
+                device_id=_button,
+                who=_configured_buttons[_button][CONF_WHO],
+                where=_configured_buttons[_button][CONF_WHERE],
+                interface=(
+                    _configured_buttons[_button][CONF_BUS_INTERFACE]
+                    if CONF_BUS_INTERFACE in _configured_buttons[_button]
+                    else None
+                ),
+                name=_configured_buttons[_button][CONF_NAME],
+                manufacturer=_configured_buttons[_button][CONF_MANUFACTURER],
+                model=_configured_buttons[_button][CONF_DEVICE_MODEL],
+                gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
+            )
+            _buttons.append(_disable_button)
+
+            _enable_button = EnableCommandButtonEntity(
+                hass=hass,
+                platform=PLATFORM,
+                device_id=_button,
+                who=_configured_buttons[_button][CONF_WHO],
+                where=_configured_buttons[_button][CONF_WHERE],
+                interface=(
+                    _configured_buttons[_button][CONF_BUS_INTERFACE]
+                    if CONF_BUS_INTERFACE in _configured_buttons[_button]
+                    else None
+                ),
+                name=_configured_buttons[_button][CONF_NAME],
+                manufacturer=_configured_buttons[_button][CONF_MANUFACTURER],
+                model=_configured_buttons[_button][CONF_DEVICE_MODEL],
+                gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
+            )
+            _buttons.append(_enable_button)
+
+        async_add_entities(_buttons)
+
+    hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY].register_platform(PLATFORM, _async_add_buttons)
+    _async_add_buttons(list(hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM].keys()))
 
 
 async def async_unload_entry(hass, config_entry):
@@ -95,6 +101,8 @@ async def async_unload_entry(hass, config_entry):
 
 
 class DisableCommandButtonEntity(ButtonEntity, MyHOMEEntity):
+    _address_attributes = True
+
     def __init__(
         self,
         hass,
@@ -118,6 +126,7 @@ class DisableCommandButtonEntity(ButtonEntity, MyHOMEEntity):
             manufacturer=manufacturer,
             model=model,
             gateway=gateway,
+            interface=interface,
         )
         self._attr_name = "Lock"
         self._attr_has_entity_name = True
@@ -126,20 +135,6 @@ class DisableCommandButtonEntity(ButtonEntity, MyHOMEEntity):
         self._attr_entity_category = EntityCategory.CONFIG
 
         self._attr_unique_id = f"{gateway.mac}-{self._device_id}-disable"
-        self._interface = interface
-        self._full_where = (
-            f"{self._where}#4#{self._interface}"
-            if self._interface is not None
-            else self._where
-        )
-
-        self._attr_extra_state_attributes = {
-            "A": where[: len(where) // 2],
-            "PL": where[len(where) // 2 :],
-        }
-        if self._interface is not None:
-            self._attr_extra_state_attributes["Int"] = self._interface
-
     async def async_added_to_hass(self):
         """When entity is added to hass."""
         self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
@@ -148,6 +143,7 @@ class DisableCommandButtonEntity(ButtonEntity, MyHOMEEntity):
 
     async def async_will_remove_from_hass(self):
         """When entity is removed from hass."""
+        self._cancel_state_write()
         if (
             "disable"
             in self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
@@ -164,6 +160,8 @@ class DisableCommandButtonEntity(ButtonEntity, MyHOMEEntity):
 
 
 class EnableCommandButtonEntity(ButtonEntity, MyHOMEEntity):
+    _address_attributes = True
+
     def __init__(
         self,
         hass,
@@ -187,6 +185,7 @@ class EnableCommandButtonEntity(ButtonEntity, MyHOMEEntity):
             manufacturer=manufacturer,
             model=model,
             gateway=gateway,
+            interface=interface,
         )
         self._attr_name = "Unlock"
         self._attr_has_entity_name = True
@@ -195,20 +194,6 @@ class EnableCommandButtonEntity(ButtonEntity, MyHOMEEntity):
         self._attr_entity_category = EntityCategory.CONFIG
 
         self._attr_unique_id = f"{gateway.mac}-{self._device_id}-enable"
-        self._interface = interface
-        self._full_where = (
-            f"{self._where}#4#{self._interface}"
-            if self._interface is not None
-            else self._where
-        )
-
-        self._attr_extra_state_attributes = {
-            "A": where[: len(where) // 2],
-            "PL": where[len(where) // 2 :],
-        }
-        if self._interface is not None:
-            self._attr_extra_state_attributes["Int"] = self._interface
-
     async def async_added_to_hass(self):
         """When entity is added to hass."""
         self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
@@ -217,6 +202,7 @@ class EnableCommandButtonEntity(ButtonEntity, MyHOMEEntity):
 
     async def async_will_remove_from_hass(self):
         """When entity is removed from hass."""
+        self._cancel_state_write()
         if (
             "enable"
             in self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
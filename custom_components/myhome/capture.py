@@ -0,0 +1,80 @@
+"""Capture of the frames received from a gateway, replayed by scripts/replay_capture.py."""
+import asyncio
+import time
+from datetime import datetime
+from typing import List, Tuple
+
+import aiofiles
+
+from .const import LOGGER
+
+# Captured frames are written out in batches, at most this often (s)
+CAPTURE_FLUSH_INTERVAL = 1.0
+CAPTURE_HEADER = "# myhome-capture"
+
+
+class MyHOMEFrameCapture:
+    """Append-only log of the raw frames received on the event session.
+
+    After a header line, every frame takes one line: the time in seconds
+    since the capture started, a space, and the frame as received. Lines are
+    buffered and written by batch so that the listener never waits on disk.
+    """
+
+    def __init__(self, hass, path: str, log_id: str):
+        self._hass = hass
+        self.path = path
+        self._log_id = log_id
+        self._file = None
+        self._lines: List[str] = []
+        self._start = 0.0
+        self._timer: asyncio.TimerHandle = None
+        self._lock = asyncio.Lock()
+        self.frames = 0
+
+    async def async_open(self) -> None:
+        self._file = await aiofiles.open(self.path, mode="a", encoding="utf-8")
+        self._start = time.monotonic()
+        await self._file.write(f"{CAPTURE_HEADER} {datetime.now().astimezone().isoformat()}\n")
+        await self._file.flush()
+        LOGGER.info("%s Capturing received frames to `%s`.", self._log_id, self.path)
+
+    def record(self, frame: str) -> None:
+        self._lines.append(f"{time.monotonic() - self._start:.6f} {frame}\n")
+        self.frames += 1
+        if self._timer is None:
+            self._timer = self._hass.loop.call_later(CAPTURE_FLUSH_INTERVAL, self._flush)
+
+    def _flush(self) -> None:
+        self._timer = None
+        self._hass.async_create_task(self._async_write())
+
+    async def _async_write(self) -> None:
+        async with self._lock:
+            _lines, self._lines = self._lines, []
+            if _lines and self._file is not None:
+                await self._file.write("".join(_lines))
+                await self._file.flush()
+
+    async def async_close(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self._async_write()
+        async with self._lock:
+            await self._file.close()
+            self._file = None
+        LOGGER.info("%s Captured %s frames to `%s`.", self._log_id, self.frames, self.path)
+
+
+async def async_read_capture(path: str) -> List[Tuple[float, str]]:
+    """Read a capture log as a list of (offset, frame)."""
+    _frames = []
+    async with aiofiles.open(path, mode="r", encoding="utf-8") as capture_file:
+        async for _line in capture_file:
+            if _line.startswith("#") or not _line.strip():
+                continue
+            _offset, _frame = _line.rstrip("\n").split(" ", 1)
+            _frames.append((float(_offset), _frame))
+    return _frames
+
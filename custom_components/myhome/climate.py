@@ -19,6 +19,7 @@ from homeassistant.const import (
     CONF_MAC,
     UnitOfTemperature,
 )
+from homeassistant.core import callback
 
 from OWNd.message import (
     OWNHeatingEvent,
@@ -60,39 +61,44 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     if PLATFORM not in hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS]:
         return True
 
-    _climate_devices = []
-    _configured_climate_devices = hass.data[DOMAIN][config_entry.data[CONF_MAC]][
-        CONF_PLATFORMS
-    ][PLATFORM]
+    @callback
+    def _async_add_climate_devices(device_ids):
+        _climate_devices = []
+        _configured_climate_devices = hass.data[DOMAIN][config_entry.data[CONF_MAC]][
+            CONF_PLATFORMS
+        ][PLATFORM]
 
-    for _climate_device in _configured_climate_devices.keys():
-        _climate_devices.append(
-            MyHOMEClimate(
-                hass=hass,
-                device_id=_climate_device,
-                who=_configured_climate_devices[_climate_device][CONF_WHO],
-                where=_configured_climate_devices[_climate_device][CONF_ZONE],
-                name=_configured_climate_devices[_climate_device][CONF_NAME],
-                heating=_configured_climate_devices[_climate_device][
-                    CONF_HEATING_SUPPORT
-                ],
-                cooling=_configured_climate_devices[_climate_device][
-                    CONF_COOLING_SUPPORT
-                ],
-                fan=_configured_climate_devices[_climate_device][CONF_FAN_SUPPORT],
-                standalone=_configured_climate_devices[_climate_device][
-                    CONF_STANDALONE
-                ],
-                central=_configured_climate_devices[_climate_device][CONF_CENTRAL],
-                manufacturer=_configured_climate_devices[_climate_device][
-                    CONF_MANUFACTURER
-                ],
-                model=_configured_climate_devices[_climate_device][CONF_DEVICE_MODEL],
-                gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
+        for _climate_device in device_ids:
+            _climate_devices.append(
+                MyHOMEClimate(
+                    hass=hass,
+                    device_id=_climate_device,
+                    who=_configured_climate_devices[_climate_device][CONF_WHO],
+                    where=_configured_climate_devices[_climate_device][CONF_ZONE],
+                    name=_configured_climate_devices[_climate_device][CONF_NAME],
+                    heating=_configured_climate_devices[_climate_device][
+                        CONF_HEATING_SUPPORT
+                    ],
+                    cooling=_configured_climate_devices[_climate_device][
+                        CONF_COOLING_SUPPORT
+                    ],
+                    fan=_configured_climate_devices[_climate_device][CONF_FAN_SUPPORT],
+                    standalone=_configured_climate_devices[_climate_device][
+                        CONF_STANDALONE
+                    ],
+                    central=_configured_climate_devices[_climate_device][CONF_CENTRAL],
+                    manufacturer=_configured_climate_devices[_climate_device][
+                        CONF_MANUFACTURER
+                    ],
+                    model=_configured_climate_devices[_climate_device][CONF_DEVICE_MODEL],
+                    gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
+                )
             )
-        )
 
-    async_add_entities(_climate_devices)
+        async_add_entities(_climate_devices)
+
+    hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY].register_platform(PLATFORM, _async_add_climate_devices)
+    _async_add_climate_devices(list(hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM].keys()))
 
 
 async def async_unload_entry(hass, config_entry):
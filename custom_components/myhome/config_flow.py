@@ -46,8 +46,14 @@ from .const import (
     CONF_SSDP_ST,
     CONF_UDN,
     CONF_WORKER_COUNT,
+    CONF_PIPELINE_WINDOW,
+    CONF_POWER_PUBLISH_INTERVAL,
+    CONF_POWER_PUBLISH_THRESHOLD,
     CONF_FILE_PATH,
     CONF_GENERATE_EVENTS,
+    DEFAULT_PIPELINE_WINDOW,
+    DEFAULT_POWER_PUBLISH_INTERVAL,
+    DEFAULT_POWER_PUBLISH_THRESHOLD,
     DOMAIN,
     LOGGER,
 )
@@ -381,6 +387,12 @@ class MyhomeOptionsFlowHandler(OptionsFlow):
         self.data = dict(config_entry.data)
         if CONF_WORKER_COUNT not in self.options:
             self.options[CONF_WORKER_COUNT] = 1
+        if CONF_PIPELINE_WINDOW not in self.options:
+            self.options[CONF_PIPELINE_WINDOW] = DEFAULT_PIPELINE_WINDOW
+        if CONF_POWER_PUBLISH_INTERVAL not in self.options:
+            self.options[CONF_POWER_PUBLISH_INTERVAL] = DEFAULT_POWER_PUBLISH_INTERVAL
+        if CONF_POWER_PUBLISH_THRESHOLD not in self.options:
+            self.options[CONF_POWER_PUBLISH_THRESHOLD] = DEFAULT_POWER_PUBLISH_THRESHOLD
         if CONF_FILE_PATH not in self.options:
             self.options[CONF_FILE_PATH] = "/config/myhome.yaml"
         if CONF_GENERATE_EVENTS not in self.options:
@@ -400,6 +412,9 @@ class MyhomeOptionsFlowHandler(OptionsFlow):
                 errors[CONF_FILE_PATH] = "invalid_config_path"
 
             self.options.update({CONF_WORKER_COUNT: user_input[CONF_WORKER_COUNT]})
+            self.options.update({CONF_PIPELINE_WINDOW: user_input[CONF_PIPELINE_WINDOW]})
+            self.options.update({CONF_POWER_PUBLISH_INTERVAL: user_input[CONF_POWER_PUBLISH_INTERVAL]})
+            self.options.update({CONF_POWER_PUBLISH_THRESHOLD: user_input[CONF_POWER_PUBLISH_THRESHOLD]})
             self.options.update({CONF_FILE_PATH: user_input[CONF_FILE_PATH]})
             self.options.update({CONF_GENERATE_EVENTS: user_input[CONF_GENERATE_EVENTS]})
 
@@ -439,6 +454,18 @@ class MyhomeOptionsFlowHandler(OptionsFlow):
                         CONF_WORKER_COUNT,
                         description={"suggested_value": self.options[CONF_WORKER_COUNT]},
                     ): All(Coerce(int), Range(min=1, max=10)),
+                    Required(
+                        CONF_PIPELINE_WINDOW,
+                        description={"suggested_value": self.options[CONF_PIPELINE_WINDOW]},
+                    ): All(Coerce(int), Range(min=1, max=16)),
+                    Required(
+                        CONF_POWER_PUBLISH_INTERVAL,
+                        description={"suggested_value": self.options[CONF_POWER_PUBLISH_INTERVAL]},
+                    ): All(Coerce(int), Range(min=0, max=3600)),
+                    Required(
+                        CONF_POWER_PUBLISH_THRESHOLD,
+                        description={"suggested_value": self.options[CONF_POWER_PUBLISH_THRESHOLD]},
+                    ): All(Coerce(float), Range(min=0, max=100)),
                     Required(
                         CONF_GENERATE_EVENTS,
                         description={"suggested_value": self.options[CONF_GENERATE_EVENTS]},
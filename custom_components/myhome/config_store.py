@@ -0,0 +1,91 @@
+"""Validated configuration files, parsed once per change and kept across restarts."""
+import asyncio
+import hashlib
+from typing import Any, Dict
+
+import aiofiles
+import aiofiles.os
+import yaml
+
+from homeassistant.helpers.storage import Store
+from homeassistant.loader import async_get_integration
+
+from .const import CONF_ENTITIES, CONF_PLATFORMS, DOMAIN, LOGGER
+from .validate import BUTTON, CONFIG_FORMAT_VERSION, add_button_platform, config_schema
+
+STORAGE_KEY = f"{DOMAIN}.config"
+STORAGE_VERSION = 1
+# Delay (s) before the compiled configurations are written to .storage
+STORAGE_SAVE_DELAY = 10
+
+
+class MyHOMEConfigStore:
+    """Compiled form of the configuration files, shared by the gateways.
+
+    A file is only read again when its modification time or size changed,
+    and only parsed and validated again when its content hash changed too.
+    The validated form is saved to `.storage` along with the versions of the
+    integration and of the validated form, so that a restart with an
+    unchanged file skips the YAML parsing altogether.
+    """
+
+    def __init__(self, hass):
+        self._hass = hass
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY)
+        self._lock = asyncio.Lock()
+        self._files: Dict[str, Dict[str, Any]] = None
+        self._version: str = None
+
+    async def async_get(self, path: str) -> Dict[str, Any]:
+        """Return the validated configuration of a file, keyed by gateway MAC address.
+
+        Every call gets its own copy, which the gateway is free to modify.
+        """
+        async with self._lock:
+            if self._files is None:
+                _integration = await async_get_integration(self._hass, DOMAIN)
+                self._version = f"{_integration.version}-{CONFIG_FORMAT_VERSION}"
+                _stored = await self._store.async_load() or {}
+                self._files = _stored.get("files", {}) if _stored.get("version") == self._version else {}
+
+            _stat = await aiofiles.os.stat(path)
+            _file = self._files.get(path)
+            if _file is None or _file["mtime"] != _stat.st_mtime_ns or _file["size"] != _stat.st_size:
+                async with aiofiles.open(path, mode="rb") as yaml_file:
+                    _content = await yaml_file.read()
+                _hash = hashlib.sha256(_content).hexdigest()
+                if _file is None or _file["hash"] != _hash:
+                    LOGGER.debug("Validating configuration file '%s'.", path)
+                    _file = {"hash": _hash, "config": _compiled(config_schema(yaml.safe_load(_content)))}
+                _file["mtime"] = _stat.st_mtime_ns
+                _file["size"] = _stat.st_size
+                self._files[path] = _file
+                self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+            return _copy(_file["config"])
+
+    def _data_to_save(self) -> Dict[str, Any]:
+        return {"version": self._version, "files": self._files}
+
+
+def _compiled(validated_config: Dict[str, Any]) -> Dict[str, Any]:
+    # The button platform only references the devices of other platforms, it is rebuilt on every copy
+    return {
+        _mac: {CONF_PLATFORMS: {_platform: _devices for _platform, _devices in _gateway[CONF_PLATFORMS].items() if _platform != BUTTON}}
+        for _mac, _gateway in validated_config.items()
+    }
+
+
+def _copy(compiled_config: Dict[str, Any]) -> Dict[str, Any]:
+    _config = {}
+    for _mac, _gateway in compiled_config.items():
+        _platforms = {
+            _platform: {
+                _device_id: {**_device, CONF_ENTITIES: {_entity: {} for _entity in _device[CONF_ENTITIES]}}
+                for _device_id, _device in _devices.items()
+            }
+            for _platform, _devices in _gateway[CONF_PLATFORMS].items()
+        }
+        add_button_platform(_platforms)
+        _config[_mac] = {CONF_PLATFORMS: _platforms}
+    return _config
@@ -1,11 +1,18 @@
 """Constants for the MyHome component."""
 import logging
+import time
+
+# Loaded ahead of the integration's other modules, this starts their import time
+IMPORT_START = time.perf_counter()
 
 LOGGER = logging.getLogger(__package__)
 DOMAIN = "myhome"
+DATA_CONFIG_STORE = f"{DOMAIN}_config_store"
 
 ATTR_GATEWAY = "gateway"
 ATTR_MESSAGE = "message"
+ATTR_PATH = "path"
+ATTR_MONTHS = "months"
 
 CONF = "config"
 CONF_ENTITY = "entity"
@@ -25,6 +32,9 @@ CONF_MANUFACTURER = "manufacturer"
 CONF_MANUFACTURER_URL = "manufacturerURL"
 CONF_UDN = "UDN"
 CONF_WORKER_COUNT = "command_worker_count"
+CONF_PIPELINE_WINDOW = "command_pipeline_window"
+CONF_POWER_PUBLISH_INTERVAL = "power_publish_interval"
+CONF_POWER_PUBLISH_THRESHOLD = "power_publish_threshold"
 CONF_FILE_PATH = "config_file_path"
 CONF_GENERATE_EVENTS = "generate_events"
 CONF_PARENT_ID = "parent_id"
@@ -46,3 +56,22 @@ CONF_SHORT_PRESS = "pushbutton_short_press"
 CONF_SHORT_RELEASE = "pushbutton_short_release"
 CONF_LONG_PRESS = "pushbutton_long_press"
 CONF_LONG_RELEASE = "pushbutton_long_release"
+
+DEFAULT_REFRESH_WINDOW = 0.5
+DEFAULT_STARTUP_SYNC_TIMEOUT = 20
+DEFAULT_WORKER_IDLE_TIMEOUT = 300
+DEFAULT_PIPELINE_WINDOW = 1
+DEFAULT_STATE_WRITE_WINDOW = 0.1
+# Instant power states are published for every sample unless set
+DEFAULT_POWER_PUBLISH_INTERVAL = 0
+DEFAULT_POWER_PUBLISH_THRESHOLD = 0
+# Poll interval (s) of each kind of energy counter
+DEFAULT_ENERGY_POLL_INTERVALS = {
+    "total-energy": 600,
+    "monthly-energy": 300,
+    "daily-energy": 60,
+    "hourly-energy": 300,
+    "weekly-energy": 600,
+}
+# Delay (s) after the setup before the missed energy history is backfilled
+DEFAULT_ENERGY_BACKFILL_DELAY = 60
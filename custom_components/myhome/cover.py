@@ -11,6 +11,7 @@ from homeassistant.const import (
     CONF_NAME,
     CONF_MAC,
 )
+from homeassistant.core import callback
 
 from OWNd.message import (
     OWNAutomationEvent,
@@ -38,26 +39,31 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     if PLATFORM not in hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS]:
         return True
 
-    _covers = []
-    _configured_covers = hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM]
-
-    for _cover in _configured_covers.keys():
-        _cover = MyHOMECover(
-            hass=hass,
-            device_id=_cover,
-            who=_configured_covers[_cover][CONF_WHO],
-            where=_configured_covers[_cover][CONF_WHERE],
-            interface=_configured_covers[_cover][CONF_BUS_INTERFACE] if CONF_BUS_INTERFACE in _configured_covers[_cover] else None,
-            name=_configured_covers[_cover][CONF_NAME],
-            entity_name=_configured_covers[_cover][CONF_ENTITY_NAME],
-            advanced=_configured_covers[_cover][CONF_ADVANCED_SHUTTER],
-            manufacturer=_configured_covers[_cover][CONF_MANUFACTURER],
-            model=_configured_covers[_cover][CONF_DEVICE_MODEL],
-            gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
-        )
-        _covers.append(_cover)
-
-    async_add_entities(_covers)
+    @callback
+    def _async_add_covers(device_ids):
+        _covers = []
+        _configured_covers = hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM]
+
+        for _cover in device_ids:
+            _cover = MyHOMECover(
+                hass=hass,
+                device_id=_cover,
+                who=_configured_covers[_cover][CONF_WHO],
+                where=_configured_covers[_cover][CONF_WHERE],
+                interface=_configured_covers[_cover][CONF_BUS_INTERFACE] if CONF_BUS_INTERFACE in _configured_covers[_cover] else None,
+                name=_configured_covers[_cover][CONF_NAME],
+                entity_name=_configured_covers[_cover][CONF_ENTITY_NAME],
+                advanced=_configured_covers[_cover][CONF_ADVANCED_SHUTTER],
+                manufacturer=_configured_covers[_cover][CONF_MANUFACTURER],
+                model=_configured_covers[_cover][CONF_DEVICE_MODEL],
+                gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
+            )
+            _covers.append(_cover)
+
+        async_add_entities(_covers)
+
+    hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY].register_platform(PLATFORM, _async_add_covers)
+    _async_add_covers(list(hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM].keys()))
 
 
 async def async_unload_entry(hass, config_entry):  # pylint: disable=unused-argument
@@ -71,6 +77,8 @@ async def async_unload_entry(hass, config_entry):  # pylint: disable=unused-argu
 
 
 class MyHOMECover(MyHOMEEntity, CoverEntity):
+    _address_attributes = True
+
     device_class = CoverDeviceClass.SHUTTER
 
     def __init__(
@@ -97,25 +105,16 @@ class MyHOMECover(MyHOMEEntity, CoverEntity):
             manufacturer=manufacturer,
             model=model,
             gateway=gateway,
+            interface=interface,
         )
 
         self._attr_name = entity_name
 
-        self._interface = interface
-        self._full_where = f"{self._where}#4#{self._interface}" if self._interface is not None else self._where
-
         self._attr_supported_features = CoverEntityFeature.OPEN | CoverEntityFeature.CLOSE | CoverEntityFeature.STOP
         if advanced:
             self._attr_supported_features |= CoverEntityFeature.SET_POSITION
         self._gateway_handler = gateway
 
-        self._attr_extra_state_attributes = {
-            "A": where[: len(where) // 2],
-            "PL": where[len(where) // 2 :],
-        }
-        if self._interface is not None:
-            self._attr_extra_state_attributes["Int"] = self._interface
-
         self._attr_current_cover_position = None
         self._attr_is_opening = None
         self._attr_is_closing = None
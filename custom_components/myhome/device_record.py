@@ -0,0 +1,54 @@
+"""Compact identity of a MyHOME device, shared by its entities."""
+import sys
+from typing import Any, Dict
+
+from .address import MyHOMEAddress
+from .const import DOMAIN
+
+
+class MyHOMEDeviceRecord:
+    """What the entities of a device need to know about it, stored once.
+
+    A device is often exposed through several entities (a light and its
+    lock buttons, or the power and energy sensors of a meter); they all
+    reference the same slotted record, whose address is shared as well. The device info
+    and address attributes are rebuilt from it when Home Assistant asks for
+    them instead of being kept as dicts on every entity.
+    """
+
+    __slots__ = ("gateway", "device_id", "address", "name", "manufacturer", "model")
+
+    def __init__(
+        self,
+        gateway,
+        device_id: str,
+        who: str,
+        where: str,
+        interface: str,
+        name: str,
+        manufacturer: str,
+        model: str,
+    ):
+        self.gateway = gateway
+        self.device_id = sys.intern(device_id)
+        self.address = MyHOMEAddress.get(who, where, interface)
+        self.name = name
+        self.manufacturer = sys.intern(manufacturer or "BTicino S.p.A.")
+        self.model = sys.intern(model) if model is not None else None
+
+    @property
+    def device_info(self) -> Dict[str, Any]:
+        return {
+            "identifiers": {(DOMAIN, f"{self.gateway.mac}-{self.device_id}")},
+            "name": self.name,
+            "manufacturer": self.manufacturer,
+            "model": self.model,
+            "via_device": (DOMAIN, self.gateway.unique_id),
+        }
+
+    @property
+    def address_attributes(self) -> Dict[str, str]:
+        _attributes = {"A": self.address.a, "PL": self.address.pl}
+        if self.address.interface is not None:
+            _attributes["Int"] = self.address.interface
+        return _attributes
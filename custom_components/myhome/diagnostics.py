@@ -0,0 +1,22 @@
+"""Diagnostics support for MyHOME."""
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_MAC
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_ENTITY, DOMAIN
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    """Return the internal metrics of the gateway handler."""
+    _gateway_handler = hass.data[DOMAIN][entry.data[CONF_MAC]][CONF_ENTITY]
+    return {
+        "is_connected": _gateway_handler.is_connected,
+        "metrics": _gateway_handler.metrics.as_dict(),
+        "send_buffer": _gateway_handler.send_buffer.metrics,
+        "command_pool": _gateway_handler.command_pool_metrics,
+        "energy_polling": _gateway_handler.energy_polling.metrics,
+        "power_streams": _gateway_handler.power_streams.metrics,
+        "energy_backfill": _gateway_handler.energy_backfill.metrics,
+        "setup_timings": _gateway_handler.setup_timings,
+        "power_samples": {_entity.entity_id: _entity.samples.summary() for _entity in _gateway_handler.power_streams.entities},
+    }
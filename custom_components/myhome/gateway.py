@@ -1,36 +1,22 @@
 """Code to handle a MyHome Gateway."""
 import asyncio
-from typing import Dict, List
+import functools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
 
 from homeassistant.const import (
-    CONF_ENTITIES,
     CONF_HOST,
     CONF_PORT,
     CONF_PASSWORD,
     CONF_NAME,
     CONF_MAC,
     CONF_FRIENDLY_NAME,
+    Platform,
 )
-from homeassistant.components.light import DOMAIN as LIGHT
-from homeassistant.components.switch import (
-    SwitchDeviceClass,
-    DOMAIN as SWITCH,
-)
-from homeassistant.components.button import DOMAIN as BUTTON
-from homeassistant.components.cover import DOMAIN as COVER
-from homeassistant.components.binary_sensor import (
-    BinarySensorDeviceClass,
-    DOMAIN as BINARY_SENSOR,
-)
-from homeassistant.components.sensor import (
-    SensorDeviceClass,
-    DOMAIN as SENSOR,
-)
-from homeassistant.components.climate import DOMAIN as CLIMATE
-
-from OWNd.connection import OWNSession, OWNEventSession, OWNCommandSession, OWNGateway
+from OWNd.connection import OWNSession, OWNGateway
 from OWNd.message import (
     OWNMessage,
+    OWNEvent,
     OWNLightingEvent,
     OWNLightingCommand,
     OWNEnergyEvent,
@@ -48,6 +34,8 @@ from OWNd.message import (
 
 from .const import (
     CONF_PLATFORMS,
+    CONF_WHO,
+    CONF_WHERE,
     CONF_FIRMWARE,
     CONF_SSDP_LOCATION,
     CONF_SSDP_ST,
@@ -59,20 +47,68 @@ from .const import (
     CONF_SHORT_RELEASE,
     CONF_LONG_PRESS,
     CONF_LONG_RELEASE,
+    DEFAULT_PIPELINE_WINDOW,
+    DEFAULT_REFRESH_WINDOW,
+    DEFAULT_STARTUP_SYNC_TIMEOUT,
+    DEFAULT_WORKER_IDLE_TIMEOUT,
+    DEFAULT_ENERGY_POLL_INTERVALS,
+    DEFAULT_POWER_PUBLISH_INTERVAL,
+    DEFAULT_POWER_PUBLISH_THRESHOLD,
     DOMAIN,
     LOGGER,
 )
+from .backfill import MyHOMEEnergyBackfill
+from .capture import MyHOMEFrameCapture
+from .device_record import MyHOMEDeviceRecord
+from .metrics import MyHOMEMetrics
 from .myhome_device import MyHOMEEntity
-from .button import (
-    DisableCommandButtonEntity,
-    EnableCommandButtonEntity,
+from .pipeline import MyHOMEPipelinedCommandSession
+from .polling import MyHOMEEnergyPollScheduler
+from .refresh import MyHOMERefreshScheduler
+from .supervisor import MyHOMEEventSession, MyHOMEReconnectBackoff
+from .streaming import MyHOMEPowerStreamManager
+from .sync import MyHOMEStartupSync
+from .sending import (
+    MyHOMESendBuffer,
+    SEND_PRIORITY_COMMAND,
+    SEND_PRIORITY_STATUS,
 )
 
+# Expected queueing delay (s) above which the command pool grows
+POOL_GROW_DELAY = 0.5
+# Send latency estimate (s) before any message has been sent, and its smoothing factor
+INITIAL_SEND_LATENCY = 0.1
+SEND_LATENCY_SMOOTHING = 0.2
+
+# Handler of each class of received message, resolved along the message's MRO
+MESSAGE_HANDLERS: Dict[type, str] = {
+    OWNLightingEvent: "_handle_lighting_event",
+    OWNAutomationEvent: "_handle_automation_event",
+    OWNHeatingEvent: "_handle_device_event",
+    OWNAuxEvent: "_handle_device_event",
+    OWNDryContactEvent: "_handle_device_event",
+    OWNEnergyEvent: "_handle_energy_event",
+    OWNHeatingCommand: "_handle_heating_command",
+    OWNCENPlusEvent: "_handle_cen_plus_event",
+    OWNCENEvent: "_handle_cen_event",
+    OWNGatewayEvent: "_handle_gateway_message",
+    OWNGatewayCommand: "_handle_gateway_message",
+}
+
 
 class MyHOMEGatewayHandler:
     """Manages a single MyHOME Gateway."""
 
-    def __init__(self, hass, config_entry, generate_events=False):
+    def __init__(
+        self,
+        hass,
+        config_entry,
+        generate_events=False,
+        refresh_window=DEFAULT_REFRESH_WINDOW,
+        worker_idle_timeout=DEFAULT_WORKER_IDLE_TIMEOUT,
+        power_publish_interval=DEFAULT_POWER_PUBLISH_INTERVAL,
+        power_publish_threshold=DEFAULT_POWER_PUBLISH_THRESHOLD,
+    ):
         build_info = {
             "address": config_entry.data[CONF_HOST],
             "port": config_entry.data[CONF_PORT],
@@ -91,13 +127,61 @@ class MyHOMEGatewayHandler:
         self.hass = hass
         self.config_entry = config_entry
         self.generate_events = generate_events
+        self.power_publish_interval = power_publish_interval
+        self.power_publish_threshold = power_publish_threshold
         self.gateway = OWNGateway(build_info)
         self._terminate_listener = False
         self._terminate_sender = False
         self.is_connected = False
         self.listening_worker: asyncio.tasks.Task = None
-        self.sending_workers: List[asyncio.tasks.Task] = []
-        self.send_buffer = asyncio.Queue()
+        self._listener_restart: asyncio.TimerHandle = None
+        self._listener_backoff = MyHOMEReconnectBackoff()
+        self._sender_backoff = MyHOMEReconnectBackoff()
+        self._resync_task: asyncio.tasks.Task = None
+        self.sending_workers: Dict[int, asyncio.tasks.Task] = {}
+        self._worker_replacement: asyncio.TimerHandle = None
+        self.max_workers = 1
+        self.pipeline_window = DEFAULT_PIPELINE_WINDOW
+        self.worker_idle_timeout = worker_idle_timeout
+        self._next_worker_id = 0
+        # Worker -> frames written and not acknowledged yet
+        self._frames_in_flight: Dict[int, int] = {}
+        self._send_latency = INITIAL_SEND_LATENCY
+        self.send_buffer = MyHOMESendBuffer()
+        self.metrics = MyHOMEMetrics()
+        self.capture: MyHOMEFrameCapture = None
+        self.setup_timings: Dict[str, Any] = {}
+        self._dispatch_index: Dict[str, List[MyHOMEEntity]] = {}
+        self._device_records: Dict[str, MyHOMEDeviceRecord] = {}
+        self._platform_adders: Dict[str, Callable[[List[str]], None]] = {}
+        self._message_handlers: Dict[type, Callable[[Any], Awaitable[None]]] = {}
+        self._lighting_refresh = MyHOMERefreshScheduler(
+            hass=hass,
+            log_id=self.log_id,
+            status_request=OWNLightingCommand.status,
+            send=self.send_status_request,
+            window=refresh_window,
+        )
+        self.startup_sync = MyHOMEStartupSync(
+            hass=hass,
+            log_id=self.log_id,
+            send=self.send_status_request,
+            update_device=self.async_update_device,
+            timeout=DEFAULT_STARTUP_SYNC_TIMEOUT,
+        )
+        self.energy_polling = MyHOMEEnergyPollScheduler(
+            hass=hass,
+            log_id=self.log_id,
+            intervals=DEFAULT_ENERGY_POLL_INTERVALS,
+        )
+        self.power_streams = MyHOMEPowerStreamManager(hass=hass, log_id=self.log_id)
+        self.energy_backfill = MyHOMEEnergyBackfill(
+            hass=hass,
+            log_id=self.log_id,
+            mac=self.mac,
+            send=self.send_status_request,
+            meters=self.energy_meters,
+        )
 
     @property
     def mac(self) -> str:
@@ -130,281 +214,590 @@ class MyHOMEGatewayHandler:
     async def test(self) -> Dict:
         return await OWNSession(gateway=self.gateway, logger=LOGGER).test_connection()
 
+    def device_record(self, device_id: str, **kwargs) -> MyHOMEDeviceRecord:
+        """Return the record shared by the entities of a device, creating it for the first one."""
+        _record = self._device_records.get(device_id)
+        if _record is None:
+            _record = self._device_records[device_id] = MyHOMEDeviceRecord(
+                gateway=self,
+                device_id=device_id,
+                **kwargs,
+            )
+        return _record
+
+    def forget_device(self, device_id: str) -> None:
+        """Drop the record of a device, for its next entities to be built from a new configuration."""
+        self._device_records.pop(device_id, None)
+
+    def register_platform(self, platform: str, add_devices: Callable[[List[str]], None]) -> None:
+        """Keep the callback a platform creates the entities of configured devices with."""
+        self._platform_adders[platform] = add_devices
+
+    def unregister_platform(self, platform: str) -> None:
+        self._platform_adders.pop(platform, None)
+
+    def add_devices(self, platform: str, device_ids: List[str]) -> bool:
+        """Create the entities of devices on a platform already set up.
+
+        Returns False when the platform is not, in which case it has to be
+        forwarded the config entry instead.
+        """
+        _add_devices = self._platform_adders.get(platform)
+        if _add_devices is None:
+            return False
+        if device_ids:
+            _add_devices(device_ids)
+        return True
+
+    def energy_meters(self) -> Dict[str, Tuple[str, str]]:
+        """WHERE and name of each configured energy meter, by device ID."""
+        _sensors = self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS].get(Platform.SENSOR, {})
+        return {
+            _device_id: (_device[CONF_WHERE], _device[CONF_NAME])
+            for _device_id, _device in _sensors.items()
+            if _device[CONF_WHO] == "18"
+        }
+
+    def register_entity(self, dispatch_key: str, entity: MyHOMEEntity) -> None:
+        """Add an entity to the handlers of the messages for `dispatch_key`.
+
+        The key is the message entity (`WHO-WHERE[#4#INTERFACE]`), which is
+        also how devices are keyed in the validated configuration.
+        """
+        _handlers = self._dispatch_index.setdefault(dispatch_key, [])
+        if entity not in _handlers:
+            _handlers.append(entity)
+
+    def unregister_entity(self, dispatch_key: str, entity: MyHOMEEntity) -> None:
+        """Remove an entity from the handlers of the messages for `dispatch_key`."""
+        _handlers = self._dispatch_index.get(dispatch_key)
+        if _handlers is None:
+            return
+        if entity in _handlers:
+            _handlers.remove(entity)
+        if not _handlers:
+            del self._dispatch_index[dispatch_key]
+
+    async def async_update_device(self, dispatch_key: str) -> None:
+        """Query the state of every entity handling the messages for `dispatch_key`."""
+        for _entity in list(self._dispatch_index.get(dispatch_key, ())):
+            await _entity.async_update()
+
+    def start_listener(self) -> None:
+        """Run the listening loop, started again should it ever exit on an error."""
+        self._terminate_listener = False
+        self.listening_worker = self.hass.loop.create_task(self.listening_loop())
+        self.listening_worker.add_done_callback(self._listener_done)
+
+    def _listener_done(self, worker: asyncio.Task) -> None:
+        if worker.cancelled() or self._terminate_listener or worker is not self.listening_worker:
+            return
+        _delay = self._listener_backoff.next_delay()
+        LOGGER.error(
+            "%s Listening worker stopped unexpectedly, restarting it in %.0fs.",
+            self.log_id,
+            _delay,
+            exc_info=worker.exception(),
+        )
+        self._listener_restart = self.hass.loop.call_later(_delay, self._restart_listener)
+
+    def _restart_listener(self) -> None:
+        self._listener_restart = None
+        if not self._terminate_listener:
+            self.start_listener()
+
     async def listening_loop(self):
         self._terminate_listener = False
 
         LOGGER.debug("%s Creating listening worker.", self.log_id)
 
-        _event_session = OWNEventSession(gateway=self.gateway, logger=LOGGER)
-        await _event_session.connect()
-        self.is_connected = True
-
+        _resuming = False
         while not self._terminate_listener:
-            message = await _event_session.get_next()
-            LOGGER.debug("%s Message received: `%s`", self.log_id, message)
-
-            if self.generate_events:
-                if isinstance(message, OWNMessage):
-                    _event_content = {"gateway": str(self.gateway.host)}
-                    _event_content.update(message.event_content)
-                    self.hass.bus.async_fire("myhome_message_event", _event_content)
-                else:
-                    self.hass.bus.async_fire("myhome_message_event", {"gateway": str(self.gateway.host), "message": str(message)})
-
-            if not isinstance(message, OWNMessage):
-                LOGGER.warning(
-                    "%s Data received is not a message: `%s`",
-                    self.log_id,
-                    message,
-                )
-            elif isinstance(message, OWNEnergyEvent):
-                if SENSOR in self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS] and message.entity in self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS][SENSOR]:
-                    for _entity in self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS][SENSOR][message.entity][CONF_ENTITIES]:
-                        if isinstance(
-                            self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS][SENSOR][message.entity][CONF_ENTITIES][_entity],
-                            MyHOMEEntity,
-                        ):
-                            self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS][SENSOR][message.entity][CONF_ENTITIES][_entity].handle_event(message)
-                else:
-                    continue
-            elif (
-                isinstance(message, OWNLightingEvent)
-                or isinstance(message, OWNAutomationEvent)
-                or isinstance(message, OWNDryContactEvent)
-                or isinstance(message, OWNAuxEvent)
-                or isinstance(message, OWNHeatingEvent)
-            ):
-                if not message.is_translation:
-                    is_event = False
-                    if isinstance(message, OWNLightingEvent):
-                        if message.is_general:
-                            is_event = True
-                            event = "on" if message.is_on else "off"
-                            self.hass.bus.async_fire(
-                                "myhome_general_light_event",
-                                {"message": str(message), "event": event},
-                            )
-                            await asyncio.sleep(0.1)
-                            await self.send_status_request(OWNLightingCommand.status("0"))
-                        elif message.is_area:
-                            is_event = True
-                            event = "on" if message.is_on else "off"
-                            self.hass.bus.async_fire(
-                                "myhome_area_light_event",
-                                {
-                                    "message": str(message),
-                                    "area": message.area,
-                                    "event": event,
-                                },
-                            )
-                            await asyncio.sleep(0.1)
-                            await self.send_status_request(OWNLightingCommand.status(message.area))
-                        elif message.is_group:
-                            is_event = True
-                            event = "on" if message.is_on else "off"
-                            self.hass.bus.async_fire(
-                                "myhome_group_light_event",
-                                {
-                                    "message": str(message),
-                                    "group": message.group,
-                                    "event": event,
-                                },
-                            )
-                    elif isinstance(message, OWNAutomationEvent):
-                        if message.is_general:
-                            is_event = True
-                            if message.is_opening and not message.is_closing:
-                                event = "open"
-                            elif message.is_closing and not message.is_opening:
-                                event = "close"
-                            else:
-                                event = "stop"
-                            self.hass.bus.async_fire(
-                                "myhome_general_automation_event",
-                                {"message": str(message), "event": event},
-                            )
-                        elif message.is_area:
-                            is_event = True
-                            if message.is_opening and not message.is_closing:
-                                event = "open"
-                            elif message.is_closing and not message.is_opening:
-                                event = "close"
-                            else:
-                                event = "stop"
-                            self.hass.bus.async_fire(
-                                "myhome_area_automation_event",
-                                {
-                                    "message": str(message),
-                                    "area": message.area,
-                                    "event": event,
-                                },
-                            )
-                        elif message.is_group:
-                            is_event = True
-                            if message.is_opening and not message.is_closing:
-                                event = "open"
-                            elif message.is_closing and not message.is_opening:
-                                event = "close"
-                            else:
-                                event = "stop"
-                            self.hass.bus.async_fire(
-                                "myhome_group_automation_event",
-                                {
-                                    "message": str(message),
-                                    "group": message.group,
-                                    "event": event,
-                                },
-                            )
-                    if not is_event:
-                        if isinstance(message, OWNLightingEvent) and message.brightness_preset:
-                            if isinstance(
-                                self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS][LIGHT][message.entity][CONF_ENTITIES][LIGHT],
-                                MyHOMEEntity,
-                            ):
-                                await self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS][LIGHT][message.entity][CONF_ENTITIES][LIGHT].async_update()
-                        else:
-                            for _platform in self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS]:
-                                if _platform != BUTTON and message.entity in self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS][_platform]:
-                                    for _entity in self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS][_platform][message.entity][CONF_ENTITIES]:
-                                        if (
-                                            isinstance(
-                                                self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS][_platform][message.entity][CONF_ENTITIES][_entity],
-                                                MyHOMEEntity,
-                                            )
-                                            and not isinstance(
-                                                self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS][_platform][message.entity][CONF_ENTITIES][_entity],
-                                                DisableCommandButtonEntity,
-                                            )
-                                            and not isinstance(
-                                                self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS][_platform][message.entity][CONF_ENTITIES][_entity],
-                                                EnableCommandButtonEntity,
-                                            )
-                                        ):
-                                            self.hass.data[DOMAIN][self.mac][CONF_PLATFORMS][_platform][message.entity][CONF_ENTITIES][_entity].handle_event(message)
-
-                else:
-                    LOGGER.debug(
-                        "%s Ignoring translation message `%s`",
-                        self.log_id,
-                        message,
-                    )
-            elif isinstance(message, OWNHeatingCommand) and message.dimension is not None and message.dimension == 14:
-                where = message.where[1:] if message.where.startswith("#") else message.where
-                LOGGER.debug(
-                    "%s Received heating command, sending query to zone %s",
-                    self.log_id,
-                    where,
-                )
-                await self.send_status_request(OWNHeatingCommand.status(where))
-            elif isinstance(message, OWNCENPlusEvent):
-                event = None
-                if message.is_short_pressed:
-                    event = CONF_SHORT_PRESS
-                elif message.is_held or message.is_still_held:
-                    event = CONF_LONG_PRESS
-                elif message.is_released:
-                    event = CONF_LONG_RELEASE
-                else:
-                    event = None
-                self.hass.bus.async_fire(
-                    "myhome_cenplus_event",
-                    {
-                        "object": int(message.object),
-                        "pushbutton": int(message.push_button),
-                        "event": event,
-                    },
-                )
-                LOGGER.info(
-                    "%s %s",
-                    self.log_id,
-                    message.human_readable_log,
-                )
-            elif isinstance(message, OWNCENEvent):
-                event = None
-                if message.is_pressed:
-                    event = CONF_SHORT_PRESS
-                elif message.is_released_after_short_press:
-                    event = CONF_SHORT_RELEASE
-                elif message.is_held:
-                    event = CONF_LONG_PRESS
-                elif message.is_released_after_long_press:
-                    event = CONF_LONG_RELEASE
-                else:
-                    event = None
-                self.hass.bus.async_fire(
-                    "myhome_cen_event",
-                    {
-                        "object": int(message.object),
-                        "pushbutton": int(message.push_button),
-                        "event": event,
-                    },
-                )
-                LOGGER.info(
-                    "%s %s",
-                    self.log_id,
-                    message.human_readable_log,
-                )
-            elif isinstance(message, OWNGatewayEvent) or isinstance(message, OWNGatewayCommand):
-                LOGGER.info(
-                    "%s %s",
-                    self.log_id,
-                    message.human_readable_log,
-                )
-            else:
-                LOGGER.info(
-                    "%s Unsupported message type: `%s`",
-                    self.log_id,
-                    message,
-                )
-
-        await _event_session.close()
-        self.is_connected = False
+            _event_session = MyHOMEEventSession(gateway=self.gateway, logger=LOGGER)
+            try:
+                _connection = await _event_session.connect()
+            except OSError:
+                _connection = None
+            if _connection is None or not _connection["Success"]:
+                _delay = self._listener_backoff.next_delay()
+                LOGGER.warning("%s Event session could not be opened, retrying in %.0fs.", self.log_id, _delay)
+                await asyncio.sleep(_delay)
+                continue
+
+            self.is_connected = True
+            self._listener_backoff.reset()
+            if _resuming:
+                self.metrics.reconnects["event"] += 1
+                LOGGER.info("%s Event session re-established, resynchronising.", self.log_id)
+                self._resync_task = self.hass.loop.create_task(self._async_resync())
+            _resuming = True
+
+            try:
+                while not self._terminate_listener:
+                    _message = await _event_session.get_next()
+                    try:
+                        await self.handle_received(_message)
+                    except Exception:  # pylint: disable=broad-except
+                        # A frame that cannot be handled must not stop the listener
+                        self.metrics.handler_errors += 1
+                        LOGGER.exception("%s Error while handling `%s`:", self.log_id, _message)
+            except (OSError, asyncio.IncompleteReadError) as _error:
+                LOGGER.warning("%s Event session lost: %r", self.log_id, _error)
+            finally:
+                self.is_connected = False
+                await _event_session.close()
+
+            if not self._terminate_listener:
+                await self._listener_backoff.wait()
 
         LOGGER.debug("%s Destroying listening worker.", self.log_id)
         self.listening_worker.cancel()
 
-    async def sending_loop(self, worker_id: int):
-        self._terminate_sender = False
+    async def handle_received(self, message) -> None:
+        """Process one frame read from the event session, or replayed from a capture."""
+        if self.capture is not None and message is not None:
+            self.capture.record(str(message))
+        self.metrics.frames_received[str(message.who) if isinstance(message, OWNMessage) else "unknown"] += 1
+        LOGGER.debug("%s Message received: `%s`", self.log_id, message)
+
+        if self.generate_events:
+            if isinstance(message, OWNMessage):
+                _event_content = {"gateway": str(self.gateway.host)}
+                _event_content.update(message.event_content)
+                self._fire_event("myhome_message_event", _event_content)
+            else:
+                self._fire_event("myhome_message_event", {"gateway": str(self.gateway.host), "message": str(message)})
+
+        _start = time.perf_counter()
+        await self._get_message_handler(type(message))(message)
+        self.metrics.dispatch_latency.observe(time.perf_counter() - _start)
+
+    async def async_start_capture(self, path: str) -> None:
+        await self.async_stop_capture()
+        _capture = MyHOMEFrameCapture(self.hass, path, self.log_id)
+        await _capture.async_open()
+        self.capture = _capture
+
+    async def async_stop_capture(self) -> None:
+        if self.capture is not None:
+            _capture, self.capture = self.capture, None
+            await _capture.async_close()
+
+    async def _async_resync(self) -> None:
+        """Query the state that may have changed while the event session was down.
+
+        Lights, switches and covers are resynchronised by the grouped startup
+        queries and the instant power streams are requested again; the other
+        devices are queried one by one, unless they are polled anyway.
+        """
+        await self.startup_sync.async_resume()
+        await self.power_streams.async_resubscribe_all()
+        for _dispatch_key, _entities in list(self._dispatch_index.items()):
+            if self.startup_sync.covers(_dispatch_key):
+                continue
+            for _entity in list(_entities):
+                if _entity.should_poll or not hasattr(_entity, "async_update"):
+                    continue
+                try:
+                    await _entity.async_update()
+                except Exception:  # pylint: disable=broad-except
+                    # One entity failing to query must not leave the others out of date
+                    LOGGER.exception("%s Error while resynchronising %s:", self.log_id, _entity.entity_id)
+
+    def _fire_event(self, event_type: str, event_data: dict) -> None:
+        self.metrics.events_fired[event_type] += 1
+        self.hass.bus.async_fire(event_type, event_data)
+
+    def _get_message_handler(self, message_class: type) -> Callable[[Any], Awaitable[None]]:
+        """Resolve the handler for a class of received data.
+
+        The registry is looked up along the class' MRO once, and the result
+        is cached so that every following frame of that class costs a
+        single dict lookup.
+        """
+        try:
+            return self._message_handlers[message_class]
+        except KeyError:
+            pass
+
+        _handler_name = "_handle_unsupported_message" if issubclass(message_class, OWNMessage) else "_handle_non_message"
+        for _class in message_class.__mro__:
+            if _class in MESSAGE_HANDLERS:
+                _handler_name = MESSAGE_HANDLERS[_class]
+                break
+
+        _handler = getattr(self, _handler_name)
+        self._message_handlers[message_class] = _handler
+        return _handler
+
+    def _dispatch(self, message: OWNMessage) -> None:
+        if self.startup_sync.active:
+            self.startup_sync.seen(message.entity)
+        for _entity in self._dispatch_index.get(message.entity, ()):
+            _entity.handle_event(message)
+
+    async def _handle_non_message(self, message) -> None:
+        LOGGER.warning(
+            "%s Data received is not a message: `%s`",
+            self.log_id,
+            message,
+        )
+
+    async def _handle_unsupported_message(self, message: OWNMessage) -> None:
+        LOGGER.info(
+            "%s Unsupported message type: `%s`",
+            self.log_id,
+            message,
+        )
 
+    async def _handle_translation(self, message: OWNMessage) -> None:
         LOGGER.debug(
-            "%s Creating sending worker %s",
+            "%s Ignoring translation message `%s`",
             self.log_id,
-            worker_id,
+            message,
         )
 
-        _command_session = OWNCommandSession(gateway=self.gateway, logger=LOGGER)
-        await _command_session.connect()
+    async def _handle_energy_event(self, message: OWNEnergyEvent) -> None:
+        """WHO 18"""
+        if self.energy_backfill.running:
+            self.energy_backfill.handle_event(message)
+        self._dispatch(message)
+
+    async def _handle_lighting_event(self, message: OWNLightingEvent) -> None:
+        """WHO 1"""
+        if message.is_translation:
+            return await self._handle_translation(message)
+
+        if message.is_general:
+            event = "on" if message.is_on else "off"
+            self._fire_event(
+                "myhome_general_light_event",
+                {"message": str(message), "event": event},
+            )
+            self._lighting_refresh.request_general()
+        elif message.is_area:
+            event = "on" if message.is_on else "off"
+            self._fire_event(
+                "myhome_area_light_event",
+                {
+                    "message": str(message),
+                    "area": message.area,
+                    "event": event,
+                },
+            )
+            self._lighting_refresh.request_area(message.where)
+        elif message.is_group:
+            event = "on" if message.is_on else "off"
+            self._fire_event(
+                "myhome_group_light_event",
+                {
+                    "message": str(message),
+                    "group": message.group,
+                    "event": event,
+                },
+            )
+            self._lighting_refresh.request_group(message.where)
+        elif message.brightness_preset:
+            # The preset does not tell the brightness, it is queried; nothing to do for unknown points
+            await self.async_update_device(message.entity)
+        else:
+            self._dispatch(message)
+
+    async def _handle_automation_event(self, message: OWNAutomationEvent) -> None:
+        """WHO 2"""
+        if message.is_translation:
+            return await self._handle_translation(message)
+
+        if not (message.is_general or message.is_area or message.is_group):
+            return self._dispatch(message)
+
+        if message.is_opening and not message.is_closing:
+            event = "open"
+        elif message.is_closing and not message.is_opening:
+            event = "close"
+        else:
+            event = "stop"
+
+        if message.is_general:
+            self._fire_event(
+                "myhome_general_automation_event",
+                {"message": str(message), "event": event},
+            )
+        elif message.is_area:
+            self._fire_event(
+                "myhome_area_automation_event",
+                {
+                    "message": str(message),
+                    "area": message.area,
+                    "event": event,
+                },
+            )
+        else:
+            self._fire_event(
+                "myhome_group_automation_event",
+                {
+                    "message": str(message),
+                    "group": message.group,
+                    "event": event,
+                },
+            )
+
+    async def _handle_device_event(self, message: OWNEvent) -> None:
+        """WHO 4, 9 and 25 (dry contacts)"""
+        if message.is_translation:
+            return await self._handle_translation(message)
+
+        self._dispatch(message)
+
+    async def _handle_heating_command(self, message: OWNHeatingCommand) -> None:
+        """WHO 4 commands seen on the bus"""
+        if message.dimension is None or message.dimension != 14:
+            return await self._handle_unsupported_message(message)
+
+        where = message.where[1:] if message.where.startswith("#") else message.where
+        LOGGER.debug(
+            "%s Received heating command, sending query to zone %s",
+            self.log_id,
+            where,
+        )
+        await self.send_status_request(OWNHeatingCommand.status(where))
+
+    async def _handle_cen_plus_event(self, message: OWNCENPlusEvent) -> None:
+        """WHO 25 (CEN+ scenarios)"""
+        event = None
+        if message.is_short_pressed:
+            event = CONF_SHORT_PRESS
+        elif message.is_held or message.is_still_held:
+            event = CONF_LONG_PRESS
+        elif message.is_released:
+            event = CONF_LONG_RELEASE
+        else:
+            event = None
+        self._fire_event(
+            "myhome_cenplus_event",
+            {
+                "object": int(message.object),
+                "pushbutton": int(message.push_button),
+                "event": event,
+            },
+        )
+        LOGGER.info(
+            "%s %s",
+            self.log_id,
+            message.human_readable_log,
+        )
+
+    async def _handle_cen_event(self, message: OWNCENEvent) -> None:
+        """WHO 15"""
+        event = None
+        if message.is_pressed:
+            event = CONF_SHORT_PRESS
+        elif message.is_released_after_short_press:
+            event = CONF_SHORT_RELEASE
+        elif message.is_held:
+            event = CONF_LONG_PRESS
+        elif message.is_released_after_long_press:
+            event = CONF_LONG_RELEASE
+        else:
+            event = None
+        self._fire_event(
+            "myhome_cen_event",
+            {
+                "object": int(message.object),
+                "pushbutton": int(message.push_button),
+                "event": event,
+            },
+        )
+        LOGGER.info(
+            "%s %s",
+            self.log_id,
+            message.human_readable_log,
+        )
+
+    async def _handle_gateway_message(self, message: OWNMessage) -> None:
+        """WHO 13"""
+        LOGGER.info(
+            "%s %s",
+            self.log_id,
+            message.human_readable_log,
+        )
+
+    def start_command_pool(self, max_workers: int, pipeline_window: int = DEFAULT_PIPELINE_WINDOW) -> None:
+        """Start the sending workers, the pool then grows up to `max_workers` with the load.
 
-        while not self._terminate_sender:
-            task = await self.send_buffer.get()
+        With a `pipeline_window` above 1, each worker keeps that many frames in
+        flight on its command session instead of waiting for every reply.
+        """
+        self._terminate_sender = False
+        self.max_workers = max(1, max_workers)
+        self.pipeline_window = max(1, pipeline_window)
+        self._spawn_sending_worker()
+
+    def _spawn_sending_worker(self) -> None:
+        _worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        _worker = self.hass.loop.create_task(self.sending_loop(_worker_id))
+        _worker.add_done_callback(functools.partial(self._sending_worker_done, _worker_id))
+        self.sending_workers[_worker_id] = _worker
+
+    def _sending_worker_done(self, worker_id: int, worker: asyncio.Task) -> None:
+        self.sending_workers.pop(worker_id, None)
+        if worker.cancelled() or worker.exception() is None or self._terminate_sender:
+            return
+        _delay = self._sender_backoff.next_delay()
+        LOGGER.error(
+            "%s Sending worker %s crashed, replacing it in %.0fs.",
+            self.log_id,
+            worker_id,
+            _delay,
+            exc_info=worker.exception(),
+        )
+        self._worker_replacement = self.hass.loop.call_later(_delay, self._replace_sending_worker)
+
+    def _replace_sending_worker(self) -> None:
+        self._worker_replacement = None
+        if not self._terminate_sender and not self.sending_workers:
+            self._spawn_sending_worker()
+
+    def _autoscale_command_pool(self) -> None:
+        """Add a worker when the queued messages would wait too long for the current ones.
+
+        The expected wait is the backlog per frame slot times the observed send
+        latency; idle workers retire on their own after `worker_idle_timeout`.
+        An empty pool is restarted, unless a crashed worker is about to be replaced.
+        """
+        _pool_size = len(self.sending_workers)
+        if self._terminate_sender or _pool_size >= self.max_workers:
+            return
+        if _pool_size == 0:
+            if self._worker_replacement is None:
+                LOGGER.debug("%s Restarting the command pool.", self.log_id)
+                self._spawn_sending_worker()
+            return
+        _backlog = self.send_buffer.qsize()
+        if _backlog <= _pool_size - self._busy_workers:
+            return
+        if _backlog * self._send_latency / (_pool_size * self.pipeline_window) > POOL_GROW_DELAY:
             LOGGER.debug(
-                "%s Message `%s` was successfully unqueued by worker %s.",
-                self.name,
-                self.gateway.host,
-                task["message"],
-                worker_id,
+                "%s Growing command pool to %s workers (%s messages queued).",
+                self.log_id,
+                _pool_size + 1,
+                _backlog,
             )
-            await _command_session.send(message=task["message"], is_status_request=task["is_status_request"])
-            self.send_buffer.task_done()
+            self._spawn_sending_worker()
+
+    @property
+    def _busy_workers(self) -> int:
+        """Workers with a frame written and not acknowledged yet."""
+        return len(self._frames_in_flight)
+
+    @property
+    def command_pool_metrics(self) -> Dict[str, Any]:
+        _pool_size = len(self.sending_workers)
+        return {
+            "size": _pool_size,
+            "max_size": self.max_workers,
+            "busy": self._busy_workers,
+            "pipeline_window": self.pipeline_window,
+            "utilisation": self._busy_workers / _pool_size if _pool_size else 0,
+            "send_latency": self._send_latency,
+        }
+
+    async def sending_loop(self, worker_id: int):
+        LOGGER.debug(
+            "%s Creating sending worker %s",
+            self.log_id,
+            worker_id,
+        )
 
-        await _command_session.close()
+        _command_session = MyHOMEPipelinedCommandSession(
+            gateway=self.gateway,
+            logger=LOGGER,
+            window=self.pipeline_window,
+            metrics=self.metrics,
+        )
+        await _command_session.connect()
+        self._sender_backoff.reset()
+
+        # Also when the worker is cancelled, or the session would keep reconnecting
+        try:
+            while not self._terminate_sender:
+                # Only take a message once it can be written, so that a command
+                # queued meanwhile is not left behind a status request held here
+                await _command_session.reserve()
+                try:
+                    task = await self.send_buffer.get(timeout=self.worker_idle_timeout)
+                except BaseException:
+                    _command_session.release()
+                    raise
+                if task is None:
+                    _command_session.release()
+                    if len(self.sending_workers) > 1:
+                        # Leave the pool before any await, so that the workers idling at the same time never all retire
+                        self.sending_workers.pop(worker_id, None)
+                        break
+                    continue
+                LOGGER.debug(
+                    "%s Message `%s` was successfully unqueued by worker %s.",
+                    self.log_id,
+                    task["message"],
+                    worker_id,
+                )
+                self._frames_in_flight[worker_id] = self._frames_in_flight.get(worker_id, 0) + 1
+                _start = time.monotonic()
+                _acknowledgement = None
+                try:
+                    _acknowledgement = await _command_session.submit(
+                        message=task["message"], is_status_request=task["is_status_request"], reserved=True
+                    )
+                finally:
+                    if _acknowledgement is None:
+                        self._message_sent(worker_id, task, _start)
+                    else:
+                        _acknowledgement.add_done_callback(
+                            lambda _future, _task=task, _start=_start: self._message_sent(worker_id, _task, _start)
+                        )
+        finally:
+            await _command_session.close()
 
         LOGGER.debug(
             "%s Destroying sending worker %s",
             self.log_id,
             worker_id,
         )
-        self.sending_workers[worker_id].cancel()
+
+    def _message_sent(self, worker_id: int, task: dict, start: float) -> None:
+        if self._frames_in_flight[worker_id] > 1:
+            self._frames_in_flight[worker_id] -= 1
+        else:
+            del self._frames_in_flight[worker_id]
+        _latency = time.monotonic() - start
+        self._send_latency += (_latency - self._send_latency) * SEND_LATENCY_SMOOTHING
+        self.metrics.observe_send(worker_id, _latency)
+        self.send_buffer.task_done(task)
 
     async def close_listener(self) -> bool:
         LOGGER.info("%s Closing event listener", self.log_id)
         self._terminate_sender = True
         self._terminate_listener = True
+        self._lighting_refresh.cancel()
+        self.startup_sync.cancel()
+        self.energy_polling.cancel()
+        self.power_streams.cancel()
+        self.energy_backfill.cancel()
+        if self._worker_replacement is not None:
+            self._worker_replacement.cancel()
+        if self._listener_restart is not None:
+            self._listener_restart.cancel()
+        if self._resync_task is not None:
+            self._resync_task.cancel()
+        await self.async_stop_capture()
 
         return True
 
     async def send(self, message: OWNCommand):
-        await self.send_buffer.put({"message": message, "is_status_request": False})
+        await self.send_buffer.put({"message": message, "is_status_request": False}, SEND_PRIORITY_COMMAND)
+        self._autoscale_command_pool()
         LOGGER.debug(
             "%s Message `%s` was successfully queued.",
             self.log_id,
@@ -412,9 +805,16 @@ class MyHOMEGatewayHandler:
         )
 
     async def send_status_request(self, message: OWNCommand):
-        await self.send_buffer.put({"message": message, "is_status_request": True})
-        LOGGER.debug(
-            "%s Message `%s` was successfully queued.",
-            self.log_id,
-            message,
-        )
+        if await self.send_buffer.put({"message": message, "is_status_request": True}, SEND_PRIORITY_STATUS):
+            self._autoscale_command_pool()
+            LOGGER.debug(
+                "%s Message `%s` was successfully queued.",
+                self.log_id,
+                message,
+            )
+        else:
+            LOGGER.debug(
+                "%s Message `%s` is already pending, not queuing it again.",
+                self.log_id,
+                message,
+            )
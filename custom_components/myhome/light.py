@@ -15,6 +15,7 @@ from homeassistant.const import (
     CONF_NAME,
     CONF_MAC,
 )
+from homeassistant.core import callback
 
 from OWNd.message import (
     OWNLightingEvent,
@@ -44,28 +45,33 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     if PLATFORM not in hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS]:
         return True
 
-    _lights = []
-    _configured_lights = hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM]
-
-    for _light in _configured_lights.keys():
-        _light = MyHOMELight(
-            hass=hass,
-            device_id=_light,
-            who=_configured_lights[_light][CONF_WHO],
-            where=_configured_lights[_light][CONF_WHERE],
-            icon=_configured_lights[_light][CONF_ICON],
-            icon_on=_configured_lights[_light][CONF_ICON_ON],
-            interface=_configured_lights[_light][CONF_BUS_INTERFACE] if CONF_BUS_INTERFACE in _configured_lights[_light] else None,
-            name=_configured_lights[_light][CONF_NAME],
-            entity_name=_configured_lights[_light][CONF_ENTITY_NAME],
-            dimmable=_configured_lights[_light][CONF_DIMMABLE],
-            manufacturer=_configured_lights[_light][CONF_MANUFACTURER],
-            model=_configured_lights[_light][CONF_DEVICE_MODEL],
-            gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
-        )
-        _lights.append(_light)
-
-    async_add_entities(_lights)
+    @callback
+    def _async_add_lights(device_ids):
+        _lights = []
+        _configured_lights = hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM]
+
+        for _light in device_ids:
+            _light = MyHOMELight(
+                hass=hass,
+                device_id=_light,
+                who=_configured_lights[_light][CONF_WHO],
+                where=_configured_lights[_light][CONF_WHERE],
+                icon=_configured_lights[_light][CONF_ICON],
+                icon_on=_configured_lights[_light][CONF_ICON_ON],
+                interface=_configured_lights[_light][CONF_BUS_INTERFACE] if CONF_BUS_INTERFACE in _configured_lights[_light] else None,
+                name=_configured_lights[_light][CONF_NAME],
+                entity_name=_configured_lights[_light][CONF_ENTITY_NAME],
+                dimmable=_configured_lights[_light][CONF_DIMMABLE],
+                manufacturer=_configured_lights[_light][CONF_MANUFACTURER],
+                model=_configured_lights[_light][CONF_DEVICE_MODEL],
+                gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
+            )
+            _lights.append(_light)
+
+        async_add_entities(_lights)
+
+    hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY].register_platform(PLATFORM, _async_add_lights)
+    _async_add_lights(list(hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM].keys()))
 
 
 async def async_unload_entry(hass, config_entry):
@@ -87,6 +93,8 @@ def percent_to_eight_bits(value: int) -> int:
 
 
 class MyHOMELight(MyHOMEEntity, LightEntity):
+    _address_attributes = True
+
     def __init__(
         self,
         hass,
@@ -113,13 +121,11 @@ class MyHOMELight(MyHOMEEntity, LightEntity):
             manufacturer=manufacturer,
             model=model,
             gateway=gateway,
+            interface=interface,
         )
 
         self._attr_name = entity_name
 
-        self._interface = interface
-        self._full_where = f"{self._where}#4#{self._interface}" if self._interface is not None else self._where
-
         self._attr_supported_features = 0
         self._attr_supported_color_modes: set[ColorMode] = set()
 
@@ -132,13 +138,6 @@ class MyHOMELight(MyHOMEEntity, LightEntity):
             self._attr_color_mode = ColorMode.ONOFF
             self._attr_supported_features |= LightEntityFeature.FLASH
 
-        self._attr_extra_state_attributes = {
-            "A": where[: len(where) // 2],
-            "PL": where[len(where) // 2 :],
-        }
-        if self._interface is not None:
-            self._attr_extra_state_attributes["Int"] = self._interface
-
         self._on_icon = icon_on
         self._off_icon = icon
 
@@ -0,0 +1,152 @@
+"""Counters on the hot paths of a gateway handler."""
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Tuple
+
+from aiohttp import web
+from homeassistant.components.http import HomeAssistantView
+
+from .const import CONF_ENTITY, DOMAIN
+from .sending import SEND_LANES
+
+# Upper bounds (s) of the dispatch latency histogram buckets
+DISPATCH_LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+
+class MyHOMEHistogram:
+    """Fixed-bucket histogram, one bisection and three additions per sample."""
+
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "buckets": dict(zip([str(_bound) for _bound in self.buckets] + ["+Inf"], self.counts)),
+            "count": self.count,
+            "sum": self.sum,
+        }
+
+
+class MyHOMEMetrics:
+    """Plain counters, cheap enough to stay enabled on every frame.
+
+    Everything here is only ever touched from the event loop, so no locking
+    is needed; the derived views are computed when the metrics are read.
+    """
+
+    def __init__(self):
+        self.frames_received: Dict[str, int] = defaultdict(int)
+        self.events_fired: Dict[str, int] = defaultdict(int)
+        self.reconnects: Dict[str, int] = defaultdict(int)
+        self.nacks = 0
+        self.handler_errors = 0
+        self.state_writes = 0
+        self.state_writes_coalesced = 0
+        self.dispatch_latency = MyHOMEHistogram(DISPATCH_LATENCY_BUCKETS)
+        # Per worker: [messages sent, total send latency]
+        self.worker_send_latency: Dict[int, List[float]] = {}
+
+    def observe_send(self, worker_id: int, latency: float) -> None:
+        _worker = self.worker_send_latency.get(worker_id)
+        if _worker is None:
+            _worker = self.worker_send_latency[worker_id] = [0, 0.0]
+        _worker[0] += 1
+        _worker[1] += latency
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "frames_received": dict(self.frames_received),
+            "events_fired": dict(self.events_fired),
+            "reconnects": dict(self.reconnects),
+            "nacks": self.nacks,
+            "handler_errors": self.handler_errors,
+            "state_writes": self.state_writes,
+            "state_writes_coalesced": self.state_writes_coalesced,
+            "dispatch_latency": self.dispatch_latency.as_dict(),
+            "worker_send_latency": {
+                _worker_id: {"count": _count, "sum": _sum} for _worker_id, (_count, _sum) in self.worker_send_latency.items()
+            },
+        }
+
+
+def render_prometheus(handlers: Iterable) -> str:
+    """Render the metrics of gateway handlers in the Prometheus text format."""
+    # Metric family name -> type, help text and samples, kept contiguous in the output
+    _families: Dict[str, Tuple[str, str, List[str]]] = {
+        "myhome_frames_received_total": ("counter", "Frames received on the event session.", []),
+        "myhome_events_fired_total": ("counter", "Events fired on the Home Assistant bus.", []),
+        "myhome_reconnects_total": ("counter", "Gateway sessions re-established.", []),
+        "myhome_nacks_total": ("counter", "Frames refused by the gateway.", []),
+        "myhome_handler_errors_total": ("counter", "Received frames whose handling raised an error.", []),
+        "myhome_state_writes_total": ("counter", "Entity states written to Home Assistant.", []),
+        "myhome_state_writes_coalesced_total": ("counter", "State writes merged into a pending one.", []),
+        "myhome_dispatch_latency_seconds": ("histogram", "Time spent handling a received frame.", []),
+        "myhome_send_latency_seconds": ("summary", "Time from dequeuing a message to its acknowledgement.", []),
+        "myhome_send_queue_depth": ("gauge", "Messages waiting for a command session.", []),
+        "myhome_command_workers": ("gauge", "Sending workers running.", []),
+    }
+
+    def _sample(family: str, labels: Dict[str, Any], value, suffix: str = "") -> None:
+        _labels = ",".join(f'{_key}="{_value}"' for _key, _value in labels.items())
+        _families[family][2].append(f"{family}{suffix}{{{_labels}}} {value}")
+
+    for _handler in handlers:
+        _gateway = {"gateway": _handler.mac}
+        _metrics = _handler.metrics
+
+        for _who, _count in _metrics.frames_received.items():
+            _sample("myhome_frames_received_total", {**_gateway, "who": _who}, _count)
+        for _event_type, _count in _metrics.events_fired.items():
+            _sample("myhome_events_fired_total", {**_gateway, "event_type": _event_type}, _count)
+        for _session, _count in _metrics.reconnects.items():
+            _sample("myhome_reconnects_total", {**_gateway, "session": _session}, _count)
+        _sample("myhome_nacks_total", _gateway, _metrics.nacks)
+        _sample("myhome_handler_errors_total", _gateway, _metrics.handler_errors)
+        _sample("myhome_state_writes_total", _gateway, _metrics.state_writes)
+        _sample("myhome_state_writes_coalesced_total", _gateway, _metrics.state_writes_coalesced)
+
+        _histogram = _metrics.dispatch_latency
+        _cumulative = 0
+        for _bound, _count in zip([str(_bound) for _bound in _histogram.buckets] + ["+Inf"], _histogram.counts):
+            _cumulative += _count
+            _sample("myhome_dispatch_latency_seconds", {**_gateway, "le": _bound}, _cumulative, "_bucket")
+        _sample("myhome_dispatch_latency_seconds", _gateway, _histogram.count, "_count")
+        _sample("myhome_dispatch_latency_seconds", _gateway, _histogram.sum, "_sum")
+
+        for _worker_id, (_count, _sum) in _metrics.worker_send_latency.items():
+            _sample("myhome_send_latency_seconds", {**_gateway, "worker": _worker_id}, _count, "_count")
+            _sample("myhome_send_latency_seconds", {**_gateway, "worker": _worker_id}, _sum, "_sum")
+
+        for _priority, _lane in enumerate(SEND_LANES):
+            _sample("myhome_send_queue_depth", {**_gateway, "lane": _lane}, _handler.send_buffer.qsize(_priority))
+        _sample("myhome_command_workers", _gateway, len(_handler.sending_workers))
+
+    _lines = []
+    for _family, (_kind, _description, _samples) in _families.items():
+        if _samples:
+            _lines.append(f"# HELP {_family} {_description}")
+            _lines.append(f"# TYPE {_family} {_kind}")
+            _lines.extend(_samples)
+    return "\n".join(_lines) + "\n"
+
+
+class MyHOMEMetricsView(HomeAssistantView):
+    """Authenticated text endpoint for Prometheus to scrape."""
+
+    url = "/api/myhome/metrics"
+    name = "api:myhome:metrics"
+
+    async def get(self, request: web.Request) -> web.Response:
+        _hass = request.app["hass"]
+        _handlers = [_gateway[CONF_ENTITY] for _gateway in _hass.data.get(DOMAIN, {}).values() if CONF_ENTITY in _gateway]
+        return web.Response(text=render_prometheus(_handlers), content_type="text/plain")
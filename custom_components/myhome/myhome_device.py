@@ -1,19 +1,24 @@
 """Support for common values for MyHome devices."""
 
 from __future__ import annotations
+import asyncio
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from .gateway import MyHOMEGatewayHandler
 
+from homeassistant.core import callback
 from homeassistant.helpers.entity import Entity
 from homeassistant.const import CONF_ENTITIES
 
 
-from .const import DOMAIN, CONF_PLATFORMS, CONF_ENTITIES
+from .const import DOMAIN, CONF_PLATFORMS, CONF_ENTITIES, DEFAULT_STATE_WRITE_WINDOW
 
 
 class MyHOMEEntity(Entity):
+    # Whether the A/PL/Int of the device's address are the entity's attributes
+    _address_attributes = False
+
     def __init__(
         self,
         hass,
@@ -25,35 +30,103 @@ class MyHOMEEntity(Entity):
         manufacturer: str,
         model: str,
         gateway: MyHOMEGatewayHandler,
+        interface: str = None,
     ):
         self._hass = hass
         self._platform = platform
-        self._who = who
-        self._where = where
-        self._device_id = device_id
+        self._record = gateway.device_record(
+            device_id=device_id,
+            who=who,
+            where=where,
+            interface=interface,
+            name=name,
+            manufacturer=manufacturer,
+            model=model,
+        )
         self._attr_unique_id = f"{gateway.mac}-{self._device_id}"
-        self._manufacturer = manufacturer or "BTicino S.p.A."
-        self._model = model
         self._gateway_handler = gateway
         self._attr_has_entity_name = True
         self._attr_name = None
         self._attr_entity_registry_enabled_default = True
         self._attr_should_poll = False
+        self._state_write: asyncio.TimerHandle = None
+
+    @property
+    def device_info(self):
+        return self._record.device_info
+
+    @property
+    def extra_state_attributes(self):
+        if self._address_attributes:
+            return self._record.address_attributes
+        return super().extra_state_attributes
+
+    @property
+    def _who(self) -> str:
+        return self._record.address.who
+
+    @property
+    def _where(self) -> str:
+        return self._record.address.where
+
+    @property
+    def _interface(self) -> str:
+        return self._record.address.interface
+
+    @property
+    def _full_where(self) -> str:
+        return self._record.address.full_where
+
+    @property
+    def _device_id(self) -> str:
+        return self._record.device_id
+
+    @property
+    def _manufacturer(self) -> str:
+        return self._record.manufacturer
+
+    @property
+    def _model(self) -> str:
+        return self._record.model
+
+    def async_schedule_update_ha_state(self, force_refresh: bool = False) -> None:
+        """Coalesce the state writes requested while handling a burst of frames.
+
+        A heating zone status for instance comes as several frames, each
+        updating one attribute; they are written as a single state once
+        `DEFAULT_STATE_WRITE_WINDOW` has elapsed after the first one.
+        """
+        if force_refresh:
+            super().async_schedule_update_ha_state(force_refresh)
+            return
+        if self._state_write is not None:
+            self._gateway_handler.metrics.state_writes_coalesced += 1
+            return
+        self._state_write = self._hass.loop.call_later(DEFAULT_STATE_WRITE_WINDOW, self._async_write_coalesced_state)
+
+    @callback
+    def _async_write_coalesced_state(self) -> None:
+        self._state_write = None
+        if self.hass is not None:
+            self._gateway_handler.metrics.state_writes += 1
+            self.async_write_ha_state()
 
-        self._attr_device_info = {
-            "identifiers": {(DOMAIN, f"{gateway.mac}-{self._device_id}")},
-            "name": name,
-            "manufacturer": self._manufacturer,
-            "model": self._model,
-            "via_device": (DOMAIN, self._gateway_handler.unique_id),
-        }
+    def _cancel_state_write(self) -> None:
+        """Drop a coalesced state write still pending, to be called by every removal."""
+        if self._state_write is not None:
+            self._state_write.cancel()
+            self._state_write = None
 
     async def async_added_to_hass(self):
         """When entity is added to hass."""
         self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][self._platform][self._device_id][CONF_ENTITIES][self._platform] = self
-        await self.async_update()
+        self._gateway_handler.register_entity(self._device_id, self)
+        if not self._gateway_handler.startup_sync.covers(self._device_id):
+            await self.async_update()
 
     async def async_will_remove_from_hass(self):
         """When entity is removed from hass."""
+        self._gateway_handler.unregister_entity(self._device_id, self)
+        self._cancel_state_write()
         if self._platform in self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][self._platform][self._device_id][CONF_ENTITIES]:
             del self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][self._platform][self._device_id][CONF_ENTITIES][self._platform]
@@ -0,0 +1,153 @@
+"""Command session keeping several frames in flight."""
+import asyncio
+from collections import deque
+from typing import Deque
+
+from OWNd.connection import OWNCommandSession, OWNSession
+from OWNd.message import OWNCommand, OWNMessage, OWNSignaling
+
+from .metrics import MyHOMEMetrics
+from .supervisor import MyHOMEReconnectBackoff
+
+
+class MyHOMEPipelinedCommandSession(OWNCommandSession):
+    """Pipelined variant of `OWNCommandSession`.
+
+    Frames are written back to back, up to `window` of them awaiting their
+    acknowledgement. The gateway answers the frames of a session in the order
+    it receives them, so a reader task matches every ACK/NACK to the oldest
+    frame in flight. Other replies (status of a requested device) are skipped
+    like `send` does, and a NACKed frame is written again once before giving up.
+    """
+
+    def __init__(self, gateway=None, logger=None, window: int = 1, metrics: MyHOMEMetrics = None):
+        super().__init__(gateway=gateway, logger=logger)
+        self._metrics = metrics
+        self._window = asyncio.Semaphore(window)
+        self._in_flight: Deque[dict] = deque()
+        self._reader_task: asyncio.Task = None
+        self._backoff = MyHOMEReconnectBackoff()
+
+    async def connect(self):
+        _result = await super().connect()
+        if self._reader_task is None:
+            self._reader_task = asyncio.get_running_loop().create_task(self._read_replies())
+        return _result
+
+    async def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        while self._in_flight:
+            self._in_flight.popleft()["future"].cancel()
+        await super().close()
+
+    async def reserve(self) -> None:
+        """Wait for a free window slot, which the next `submit(reserved=True)` writes in at once."""
+        await self._window.acquire()
+
+    def release(self) -> None:
+        """Give back a slot reserved for nothing."""
+        self._window.release()
+
+    async def submit(self, message: OWNCommand, is_status_request: bool = False, reserved: bool = False) -> asyncio.Future:
+        """Write a frame as soon as the window allows it, or at once in a `reserved` slot.
+
+        Returns a future resolving to whether the gateway acknowledged the frame.
+        """
+        if not reserved:
+            await self._window.acquire()
+        _frame = {
+            "message": message,
+            "is_status_request": is_status_request,
+            "future": asyncio.get_running_loop().create_future(),
+            "retried": False,
+        }
+        self._in_flight.append(_frame)
+        try:
+            self._stream_writer.write(str(message).encode())
+            await self._stream_writer.drain()
+        except OSError as _error:
+            # The reader reconnects and writes every frame in flight again
+            self._logger.debug("%s Command session write failed: %r", self._gateway.log_id, _error)
+        return _frame["future"]
+
+    async def _read_replies(self) -> None:
+        """Match the replies to the frames in flight until the session is closed.
+
+        Whatever goes wrong, the frames in flight are either written again on
+        a new connection or failed, so that their window slots are released
+        and their senders notified.
+        """
+        while True:
+            try:
+                _raw_response = await self._stream_reader.readuntil(OWNSession.SEPARATOR)
+                await self._handle_reply(_raw_response)
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncio.IncompleteReadError) as _error:
+                self._logger.debug("%s Command session connection lost (%r), retrying...", self._gateway.log_id, _error)
+                await self._reconnect()
+            except Exception:  # pylint: disable=broad-except
+                self._logger.exception("%s Command session reader failed, dropping the frames in flight.", self._gateway.log_id)
+                self._fail_in_flight()
+                await self._reconnect()
+
+    async def _handle_reply(self, raw_response: bytes) -> None:
+        _response = OWNMessage.parse(raw_response.decode())
+        if not isinstance(_response, OWNSignaling) or not (_response.is_ack() or _response.is_nack()):
+            self._logger.debug("%s Command session received response `%s`.", self._gateway.log_id, _response)
+            return
+        if not self._in_flight:
+            self._logger.debug("%s Unexpected `%s` with no message in flight.", self._gateway.log_id, _response)
+            return
+
+        _frame = self._in_flight.popleft()
+        if _response.is_nack() and self._metrics is not None:
+            self._metrics.nacks += 1
+        if _response.is_nack() and not _frame["retried"]:
+            _frame["retried"] = True
+            self._in_flight.append(_frame)
+            self._stream_writer.write(str(_frame["message"]).encode())
+            await self._stream_writer.drain()
+            return
+
+        self._log_result(_frame, _response.is_ack())
+        if not _frame["future"].done():
+            _frame["future"].set_result(_response.is_ack())
+        self._window.release()
+
+    async def _reconnect(self) -> None:
+        if self._metrics is not None:
+            self._metrics.reconnects["command"] += 1
+        try:
+            _result = await super().connect()
+            # A refused negotiation (bad password, session rejected) is no connection either
+            if _result is not None and _result["Success"]:
+                self._backoff.reset()
+                for _frame in self._in_flight:
+                    self._stream_writer.write(str(_frame["message"]).encode())
+                await self._stream_writer.drain()
+                return
+            self._logger.warning("%s Command session could not be re-established: %s", self._gateway.log_id, _result)
+        except Exception as _error:  # pylint: disable=broad-except
+            self._logger.warning("%s Command session could not be re-established: %r", self._gateway.log_id, _error)
+        # Gave up on the gateway for now, the frames in flight are lost
+        self._fail_in_flight()
+        await self._backoff.wait()
+
+    def _fail_in_flight(self) -> None:
+        while self._in_flight:
+            _frame = self._in_flight.popleft()
+            self._log_result(_frame, False)
+            if not _frame["future"].done():
+                _frame["future"].set_result(False)
+            self._window.release()
+
+    def _log_result(self, frame: dict, acknowledged: bool) -> None:
+        if not acknowledged:
+            self._logger.error("%s Could not send message `%s`.", self._gateway.log_id, frame["message"])
+        elif frame["is_status_request"]:
+            self._logger.debug("%s Message `%s` was successfully sent.", self._gateway.log_id, frame["message"])
+        else:
+            self._logger.info("%s Message `%s` was successfully sent.", self._gateway.log_id, frame["message"])
@@ -0,0 +1,109 @@
+"""Staggered polling of the energy counters."""
+import asyncio
+import heapq
+import itertools
+from typing import Any, Dict, List, Tuple
+
+from .const import LOGGER
+
+# Step between the phases of two counters polled at the same interval, as a
+# fraction of the interval: successive multiples of the golden ratio stay
+# evenly spread over it however many counters there are
+PHASE_STEP = 0.6180339887
+# Values received this long after a poll are taken as its answer (s)
+POLL_ANSWER_DELAY = 5
+
+
+class MyHOMEEnergyPollScheduler:
+    """Polls every energy counter at the interval of its kind, staggered.
+
+    Counters are registered by their entity when it is added to Home
+    Assistant, so the disabled ones (all but the total energy by default)
+    are never polled. Within an interval the counters are given evenly
+    spread phases instead of all being polled at once, and a single timer
+    runs for the next one due. When a counter received a value on its own
+    since it was last polled, its poll is skipped and the next one counted
+    from that value.
+    """
+
+    def __init__(self, hass, log_id: str, intervals: Dict[str, float]):
+        self._hass = hass
+        self._log_id = log_id
+        self._intervals = intervals
+        # Entity -> [interval, time of the last poll, time of the next poll]
+        self._counters: Dict[Any, List[float]] = {}
+        self._queue: List[Tuple[float, int, Any]] = []
+        self._sequence = itertools.count()
+        self._phases: Dict[str, int] = {}
+        self._timer: asyncio.TimerHandle = None
+        self.polls = 0
+        self.skipped = 0
+
+    def register(self, entity, kind: str) -> None:
+        """Poll the counter of an entity, which was queried when it was added."""
+        _interval = self._intervals[kind]
+        _now = self._hass.loop.time()
+        _phase = self._phases.get(kind, 0)
+        self._phases[kind] = _phase + 1
+        _offset = (_phase * PHASE_STEP % 1) * _interval
+        # At least half an interval after the query made when the entity was added
+        _due = _now + (_offset if _offset >= _interval / 2 else _offset + _interval)
+        self._counters[entity] = [_interval, _now, _due]
+        self._push(entity, _due)
+
+    def unregister(self, entity) -> None:
+        # Its entries in the queue are dropped when they come up
+        self._counters.pop(entity, None)
+
+    def _push(self, entity, due: float) -> None:
+        heapq.heappush(self._queue, (due, next(self._sequence), entity))
+        if self._queue[0][2] is entity:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = self._hass.loop.call_at(due, self._run)
+
+    def _run(self) -> None:
+        self._timer = None
+        _now = self._hass.loop.time()
+        _to_poll = []
+        while self._queue and self._queue[0][0] <= _now:
+            _due, _, _entity = heapq.heappop(self._queue)
+            _counter = self._counters.get(_entity)
+            if _counter is None or _counter[2] != _due:
+                continue
+            _interval, _last_poll, _ = _counter
+            _received = _entity.value_received_at
+            if _received is not None and _received > _last_poll + POLL_ANSWER_DELAY and _received + _interval > _now:
+                self.skipped += 1
+                _counter[2] = _received + _interval
+            else:
+                _to_poll.append(_entity)
+                _counter[1] = _now
+                _counter[2] = _now + _interval
+            heapq.heappush(self._queue, (_counter[2], next(self._sequence), _entity))
+
+        if self._queue:
+            self._timer = self._hass.loop.call_at(self._queue[0][0], self._run)
+        if _to_poll:
+            self._hass.async_create_task(self._async_poll(_to_poll))
+
+    async def _async_poll(self, entities: List) -> None:
+        LOGGER.debug("%s Polling %s energy counter(s).", self._log_id, len(entities))
+        for _entity in entities:
+            self.polls += 1
+            await _entity.async_update()
+
+    def cancel(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._counters.clear()
+        self._queue.clear()
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "counters": len(self._counters),
+            "polls": self.polls,
+            "skipped": self.skipped,
+        }
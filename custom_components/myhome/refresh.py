@@ -0,0 +1,87 @@
+"""Coalesced status refresh after general, area and group commands."""
+import asyncio
+from typing import Awaitable, Callable, List, Set
+
+from OWNd.message import OWNCommand
+
+from .const import LOGGER
+
+
+class MyHOMERefreshScheduler:
+    """Collects refresh triggers and sends the minimum set of status requests.
+
+    Triggers are collected during `window` seconds after the first one, then
+    overlapping scopes are collapsed: a general refresh covers every area and
+    group. Nothing here ever waits on the caller's side, so the listener is
+    never blocked while the bus settles.
+    """
+
+    def __init__(
+        self,
+        hass,
+        log_id: str,
+        status_request: Callable[[str], OWNCommand],
+        send: Callable[[OWNCommand], Awaitable[None]],
+        window: float,
+    ):
+        self._hass = hass
+        self._log_id = log_id
+        self._status_request = status_request
+        self._send = send
+        self._window = window
+
+        self._general = False
+        self._areas: Set[str] = set()
+        self._groups: Set[str] = set()
+        self._timer: asyncio.TimerHandle = None
+        self._flush_task: asyncio.Task = None
+
+    def request_general(self) -> None:
+        self._general = True
+        self._schedule()
+
+    def request_area(self, where: str) -> None:
+        self._areas.add(where)
+        self._schedule()
+
+    def request_group(self, where: str) -> None:
+        self._groups.add(where)
+        self._schedule()
+
+    def cancel(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._general = False
+        self._areas.clear()
+        self._groups.clear()
+
+    def _schedule(self) -> None:
+        if self._timer is None:
+            self._timer = self._hass.loop.call_later(self._window, self._flush)
+
+    def _collapse(self) -> List[str]:
+        if self._general:
+            return ["0"]
+        return sorted(self._areas) + sorted(self._groups)
+
+    def _flush(self) -> None:
+        self._timer = None
+        _wheres = self._collapse()
+        self._general = False
+        self._areas.clear()
+        self._groups.clear()
+
+        LOGGER.debug(
+            "%s Refreshing status of %s.",
+            self._log_id,
+            ", ".join(_wheres),
+        )
+        self._flush_task = self._hass.loop.create_task(self._send_all(_wheres))
+
+    async def _send_all(self, wheres: List[str]) -> None:
+        for _where in wheres:
+            await self._send(self._status_request(_where))
@@ -0,0 +1,122 @@
+"""Reload of the YAML configuration, applied to a running gateway device by device."""
+import time
+from typing import Any, Dict
+
+from homeassistant.const import CONF_MAC
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.entity import Entity
+
+from .const import (
+    CONF_PLATFORMS,
+    CONF_ENTITY,
+    CONF_ENTITIES,
+    CONF_FILE_PATH,
+    DATA_CONFIG_STORE,
+    DOMAIN,
+    LOGGER,
+)
+from .config_store import MyHOMEConfigStore
+
+
+def config_file_path(entry) -> str:
+    return str(entry.options[CONF_FILE_PATH]) if CONF_FILE_PATH in entry.options else "/config/myhome.yaml"
+
+
+async def async_load_config(hass, path: str) -> Dict[str, Any]:
+    """Validated configuration file, keyed by gateway MAC address."""
+    if DATA_CONFIG_STORE not in hass.data:
+        hass.data[DATA_CONFIG_STORE] = MyHOMEConfigStore(hass)
+    return await hass.data[DATA_CONFIG_STORE].async_get(path)
+
+
+def _device_settings(device: Dict[str, Any]) -> Dict[str, Any]:
+    # The entities are filled in with the running entities once they are added
+    return {_key: _value for _key, _value in device.items() if _key != CONF_ENTITIES}
+
+
+async def async_reload_config(hass, entry, gateway_config: Dict[str, Any]) -> Dict[str, int]:
+    """Bring the entities of a running gateway in line with a new configuration.
+
+    Only the devices added, removed or whose settings changed have their
+    entities removed and created again; the sessions with the gateway and the
+    other entities, with their state, are left alone. A device on several
+    platforms (a light and its lock buttons) is rebuilt on all of them.
+    """
+    _start = time.perf_counter()
+    _gateway_data = hass.data[DOMAIN][entry.data[CONF_MAC]]
+    _gateway_handler = _gateway_data[CONF_ENTITY]
+    _running = _gateway_data[CONF_PLATFORMS]
+    _new = gateway_config[CONF_PLATFORMS]
+
+    _changed = set()
+    for _platform in _running.keys() & _new.keys():
+        for _device_id in _running[_platform].keys() & _new[_platform].keys():
+            if _device_settings(_running[_platform][_device_id]) != _device_settings(_new[_platform][_device_id]):
+                _changed.add(_device_id)
+    _removed = {
+        _device_id
+        for _platform, _devices in _running.items()
+        for _device_id in _devices
+        if _device_id not in _new.get(_platform, {})
+    }
+    _added = {
+        _device_id
+        for _platform, _devices in _new.items()
+        for _device_id in _devices
+        if _device_id not in _running.get(_platform, {})
+    }
+
+    # Entities are removed while the configuration they are referenced from is still in place.
+    # The devices of several platforms share their configuration, hence the check on the domain.
+    entity_registry = er.async_get(hass)
+    for _platform, _devices in _running.items():
+        for _device_id, _device in _devices.items():
+            if _device_id not in _changed and _device_id in _new.get(_platform, {}):
+                continue
+            for _entity in list(_device[CONF_ENTITIES].values()):
+                if not isinstance(_entity, Entity) or _entity.platform is None or _entity.platform.domain != _platform:
+                    continue
+                _entity_id = _entity.entity_id
+                await _entity.async_remove(force_remove=True)
+                if _device_id not in _changed:
+                    entity_registry.async_remove(_entity_id)
+            _gateway_handler.forget_device(_device_id)
+
+    # Unchanged devices keep their running configuration, which references their entities
+    _gateway_data[CONF_PLATFORMS] = {
+        _platform: {
+            _device_id: (
+                _running[_platform][_device_id]
+                if _device_id in _running.get(_platform, {}) and _device_id not in _changed
+                else _device
+            )
+            for _device_id, _device in _devices.items()
+        }
+        for _platform, _devices in _new.items()
+    }
+
+    for _platform in _running.keys() - _new.keys():
+        _gateway_handler.unregister_platform(_platform)
+        await hass.config_entries.async_forward_entry_unload(entry, _platform)
+    for _platform, _devices in _new.items():
+        _device_ids = [_device_id for _device_id in _devices if _device_id in _changed or _device_id not in _running.get(_platform, {})]
+        if not _gateway_handler.add_devices(_platform, _device_ids):
+            await hass.config_entries.async_forward_entry_setups(entry, [_platform])
+
+    device_registry = dr.async_get(hass)
+    for _device_id in _removed - {_device_id for _devices in _new.values() for _device_id in _devices}:
+        _device_entry = device_registry.async_get_device(identifiers={(DOMAIN, f"{_gateway_handler.mac}-{_device_id}")})
+        if _device_entry is not None:
+            device_registry.async_remove_device(_device_entry.id)
+
+    _summary = {"added": len(_added), "removed": len(_removed), "updated": len(_changed)}
+    LOGGER.info(
+        "%s Configuration reloaded in %.3fs: %s device(s) added, %s removed, %s updated.",
+        _gateway_handler.log_id,
+        time.perf_counter() - _start,
+        _summary["added"],
+        _summary["removed"],
+        _summary["updated"],
+    )
+    return _summary
+
@@ -0,0 +1,116 @@
+"""Prioritised buffer of the messages waiting for a command session."""
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, List
+
+SEND_PRIORITY_COMMAND = 0
+SEND_PRIORITY_STATUS = 1
+SEND_LANES = ("command", "status")
+
+DEFAULT_STARVATION_LIMIT = 8
+
+
+class MyHOMESendBuffer:
+    """Replacement for the single FIFO queue feeding the sending workers.
+
+    Every priority class has its own FIFO lane and workers always take from
+    the highest priority lane holding something, so that interactive commands
+    overtake background status requests. To keep the lower lanes moving, a
+    waiting lane is served anyway once `starvation_limit` messages have been
+    taken from higher lanes ahead of it.
+
+    Status requests are indexed by their frame while they are pending or
+    being sent: queuing the same status request again attaches to the one
+    already known instead of costing another gateway round-trip.
+
+    The `put`/`get`/`task_done`/`qsize` interface of `asyncio.Queue` is kept
+    so the worker model is unchanged.
+    """
+
+    def __init__(self, starvation_limit: int = DEFAULT_STARVATION_LIMIT):
+        self._starvation_limit = starvation_limit
+        self._lanes: List[Deque[dict]] = [deque() for _ in SEND_LANES]
+        self._skipped: List[int] = [0 for _ in SEND_LANES]
+        self._available = asyncio.Semaphore(0)
+        self._pending_status: Dict[str, dict] = {}
+
+        self._queued: List[int] = [0 for _ in SEND_LANES]
+        self._dequeued: List[int] = [0 for _ in SEND_LANES]
+        self._max_depth: List[int] = [0 for _ in SEND_LANES]
+        self._starvation_overrides = 0
+        self._deduplicated = 0
+
+    def qsize(self, priority: int = None) -> int:
+        if priority is None:
+            return sum(len(_lane) for _lane in self._lanes)
+        return len(self._lanes[priority])
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    async def put(self, item: dict, priority: int = SEND_PRIORITY_COMMAND) -> bool:
+        """Queue an item, returns False if it was merged into a pending one."""
+        if item["is_status_request"]:
+            _key = str(item["message"])
+            if _key in self._pending_status:
+                self._deduplicated += 1
+                return False
+            self._pending_status[_key] = item
+
+        _lane = self._lanes[priority]
+        _lane.append(item)
+        self._queued[priority] += 1
+        if len(_lane) > self._max_depth[priority]:
+            self._max_depth[priority] = len(_lane)
+        self._available.release()
+        return True
+
+    async def get(self, timeout: float = None) -> dict:
+        """Take the next item to send, None if nothing came within `timeout` seconds."""
+        if timeout is None:
+            await self._available.acquire()
+        else:
+            try:
+                async with asyncio.timeout(timeout):
+                    await self._available.acquire()
+            except TimeoutError:
+                return None
+        return self._lanes[self._next_lane()].popleft()
+
+    def task_done(self, item: dict = None) -> None:
+        """Mark an item returned by `get` as sent."""
+        if item is not None and item["is_status_request"]:
+            self._pending_status.pop(str(item["message"]), None)
+
+    def _next_lane(self) -> int:
+        _chosen = next(_priority for _priority, _lane in enumerate(self._lanes) if _lane)
+
+        for _priority in range(len(self._lanes) - 1, _chosen, -1):
+            if self._lanes[_priority] and self._skipped[_priority] >= self._starvation_limit:
+                _chosen = _priority
+                self._starvation_overrides += 1
+                break
+
+        for _priority in range(_chosen + 1, len(self._lanes)):
+            if self._lanes[_priority]:
+                self._skipped[_priority] += 1
+        self._skipped[_chosen] = 0
+        self._dequeued[_chosen] += 1
+
+        return _chosen
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        _metrics = {
+            _name: {
+                "depth": len(self._lanes[_priority]),
+                "max_depth": self._max_depth[_priority],
+                "queued": self._queued[_priority],
+                "dequeued": self._dequeued[_priority],
+            }
+            for _priority, _name in enumerate(SEND_LANES)
+        }
+        _metrics["starvation_overrides"] = self._starvation_overrides
+        _metrics["pending_status_requests"] = len(self._pending_status)
+        _metrics["deduplicated_status_requests"] = self._deduplicated
+        return _metrics
@@ -1,6 +1,9 @@
 """Support for MyHome sensors (power/energy, temperature, illuminance)."""
 
-from datetime import timedelta
+import asyncio
+import time
+from datetime import datetime, timedelta
+from typing import Tuple
 
 from voluptuous import (
     Optional,
@@ -24,8 +27,11 @@ from homeassistant.const import (
     UnitOfEnergy,
     UnitOfTemperature,
 )
+from homeassistant.core import callback
 from homeassistant.helpers import entity_platform
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.restore_state import RestoreEntity
+from homeassistant.util import dt as dt_util
 from OWNd.message import (
     MESSAGE_TYPE_ACTIVE_POWER,
     MESSAGE_TYPE_CURRENT_DAY_CONSUMPTION,
@@ -55,6 +61,7 @@ from .const import (
 )
 from .gateway import MyHOMEGatewayHandler
 from .myhome_device import MyHOMEEntity
+from .timeseries import MyHOMESampleBuffer, MyHOMEStreamingQuantile
 
 SCAN_INTERVAL = timedelta(seconds=60)
 
@@ -65,52 +72,125 @@ ATTR_DATE = "date"
 ATTR_MONTH = "month"
 ATTR_DAY = "day"
 
+ENERGY_MESSAGE_TYPES = {
+    "total-energy": MESSAGE_TYPE_ENERGY_TOTALIZER,
+    "monthly-energy": MESSAGE_TYPE_CURRENT_MONTH_CONSUMPTION,
+    "daily-energy": MESSAGE_TYPE_CURRENT_DAY_CONSUMPTION,
+}
+
+# Derived from the meter's totalizer: entity -> period of the consumption
+ENERGY_WINDOWS = {
+    "hourly-energy": "hour",
+    "weekly-energy": "week",
+}
+# The windows also poll the totalizer this long before and after their end (s),
+# so that the consumption is split between two periods at their boundary
+ENERGY_WINDOW_BOUNDARY_LEAD = 5
+ENERGY_WINDOW_BOUNDARY_LAG = 1
+# Derived from the meter's instant power over the current day: entity -> quantile
+POWER_STATISTICS = {
+    "peak-power": 1.0,
+    "p95-power": 0.95,
+}
+
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     if PLATFORM not in hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS]:
         return True
 
-    _sensors = []
-    _configured_sensors = hass.data[DOMAIN][config_entry.data[CONF_MAC]][
-        CONF_PLATFORMS
-    ][PLATFORM]
-    _power_devices_configured = False
+    # Power meters may also appear on a reload, once the setup is over
+    platform = entity_platform.current_platform.get()
 
-    for _sensor in _configured_sensors.keys():
-        if (
-            _configured_sensors[_sensor][CONF_DEVICE_CLASS] == SensorDeviceClass.POWER
-            or _configured_sensors[_sensor][CONF_DEVICE_CLASS]
-            == SensorDeviceClass.ENERGY
-        ):
-            _required_entities = list(
-                _configured_sensors[_sensor][CONF_ENTITIES].keys()
-            )
+    @callback
+    def _async_add_sensors(device_ids):
+        _sensors = []
+        _configured_sensors = hass.data[DOMAIN][config_entry.data[CONF_MAC]][
+            CONF_PLATFORMS
+        ][PLATFORM]
+        _power_devices_configured = False
 
+        for _sensor in device_ids:
             if (
-                _configured_sensors[_sensor][CONF_DEVICE_CLASS]
-                == SensorDeviceClass.POWER
+                _configured_sensors[_sensor][CONF_DEVICE_CLASS] == SensorDeviceClass.POWER
+                or _configured_sensors[_sensor][CONF_DEVICE_CLASS]
+                == SensorDeviceClass.ENERGY
             ):
-                _power_devices_configured = True
-
-                ent_reg = er.async_get(hass)
-                existing_entity_id = ent_reg.async_get_entity_id(
-                    "sensor", DOMAIN, _sensor
+                _required_entities = list(
+                    _configured_sensors[_sensor][CONF_ENTITIES].keys()
                 )
-                if existing_entity_id is not None:
-                    LOGGER.warning(
-                        "Sensor %s: %s will be migrated to %s-%s",
-                        _sensor,
-                        existing_entity_id,
-                        _sensor,
-                        SensorDeviceClass.POWER,
+
+                if (
+                    _configured_sensors[_sensor][CONF_DEVICE_CLASS]
+                    == SensorDeviceClass.POWER
+                ):
+                    _power_devices_configured = True
+
+                    ent_reg = er.async_get(hass)
+                    existing_entity_id = ent_reg.async_get_entity_id(
+                        "sensor", DOMAIN, _sensor
+                    )
+                    if existing_entity_id is not None:
+                        LOGGER.warning(
+                            "Sensor %s: %s will be migrated to %s-%s",
+                            _sensor,
+                            existing_entity_id,
+                            _sensor,
+                            SensorDeviceClass.POWER,
+                        )
+                        ent_reg.async_update_entity(
+                            entity_id=existing_entity_id,
+                            new_unique_id=f"{_sensor}-{SensorDeviceClass.POWER}",
+                        )
+
+                    _sensors.append(
+                        MyHOMEPowerSensor(
+                            hass=hass,
+                            device_id=_sensor,
+                            who=_configured_sensors[_sensor][CONF_WHO],
+                            where=_configured_sensors[_sensor][CONF_WHERE],
+                            name=_configured_sensors[_sensor][CONF_NAME],
+                            device_class=_configured_sensors[_sensor][CONF_DEVICE_CLASS],
+                            manufacturer=_configured_sensors[_sensor][CONF_MANUFACTURER],
+                            model=_configured_sensors[_sensor][CONF_DEVICE_MODEL],
+                            gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][
+                                CONF_ENTITY
+                            ],
+                        )
                     )
-                    ent_reg.async_update_entity(
-                        entity_id=existing_entity_id,
-                        new_unique_id=f"{_sensor}-{SensorDeviceClass.POWER}",
+                    _required_entities.remove(SensorDeviceClass.POWER)
+
+                for entity_specific_id in _required_entities:
+                    if entity_specific_id in ENERGY_WINDOWS:
+                        _sensor_class = MyHOMEEnergyWindowSensor
+                    elif entity_specific_id in POWER_STATISTICS:
+                        _sensor_class = MyHOMEPowerStatisticSensor
+                    else:
+                        _sensor_class = MyHOMEEnergySensor
+                    _sensors.append(
+                        _sensor_class(
+                            hass=hass,
+                            device_id=_sensor,
+                            who=_configured_sensors[_sensor][CONF_WHO],
+                            where=_configured_sensors[_sensor][CONF_WHERE],
+                            name=_configured_sensors[_sensor][CONF_NAME],
+                            entity_specific_id=entity_specific_id,
+                            device_class=SensorDeviceClass.POWER
+                            if entity_specific_id in POWER_STATISTICS
+                            else SensorDeviceClass.ENERGY,
+                            manufacturer=_configured_sensors[_sensor][CONF_MANUFACTURER],
+                            model=_configured_sensors[_sensor][CONF_DEVICE_MODEL],
+                            gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][
+                                CONF_ENTITY
+                            ],
+                        )
                     )
 
+            elif (
+                _configured_sensors[_sensor][CONF_DEVICE_CLASS]
+                == SensorDeviceClass.TEMPERATURE
+            ):
                 _sensors.append(
-                    MyHOMEPowerSensor(
+                    MyHOMETemperatureSensor(
                         hass=hass,
                         device_id=_sensor,
                         who=_configured_sensors[_sensor][CONF_WHO],
@@ -119,77 +199,39 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
                         device_class=_configured_sensors[_sensor][CONF_DEVICE_CLASS],
                         manufacturer=_configured_sensors[_sensor][CONF_MANUFACTURER],
                         model=_configured_sensors[_sensor][CONF_DEVICE_MODEL],
-                        gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][
-                            CONF_ENTITY
-                        ],
+                        gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
                     )
                 )
-                _required_entities.remove(SensorDeviceClass.POWER)
 
-            for entity_specific_id in _required_entities:
+            elif (
+                _configured_sensors[_sensor][CONF_DEVICE_CLASS]
+                == SensorDeviceClass.ILLUMINANCE
+            ):
                 _sensors.append(
-                    MyHOMEEnergySensor(
+                    MyHOMEIlluminanceSensor(
                         hass=hass,
                         device_id=_sensor,
                         who=_configured_sensors[_sensor][CONF_WHO],
                         where=_configured_sensors[_sensor][CONF_WHERE],
                         name=_configured_sensors[_sensor][CONF_NAME],
-                        entity_specific_id=entity_specific_id,
-                        device_class=SensorDeviceClass.ENERGY,
+                        device_class=_configured_sensors[_sensor][CONF_DEVICE_CLASS],
                         manufacturer=_configured_sensors[_sensor][CONF_MANUFACTURER],
                         model=_configured_sensors[_sensor][CONF_DEVICE_MODEL],
-                        gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][
-                            CONF_ENTITY
-                        ],
+                        gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
                     )
                 )
 
-        elif (
-            _configured_sensors[_sensor][CONF_DEVICE_CLASS]
-            == SensorDeviceClass.TEMPERATURE
-        ):
-            _sensors.append(
-                MyHOMETemperatureSensor(
-                    hass=hass,
-                    device_id=_sensor,
-                    who=_configured_sensors[_sensor][CONF_WHO],
-                    where=_configured_sensors[_sensor][CONF_WHERE],
-                    name=_configured_sensors[_sensor][CONF_NAME],
-                    device_class=_configured_sensors[_sensor][CONF_DEVICE_CLASS],
-                    manufacturer=_configured_sensors[_sensor][CONF_MANUFACTURER],
-                    model=_configured_sensors[_sensor][CONF_DEVICE_MODEL],
-                    gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
-                )
+        if _power_devices_configured:
+            platform.async_register_entity_service(
+                SERVICE_SEND_INSTANT_POWER,
+                {Optional(ATTR_DURATION): All(Coerce(int), Range(min=1, max=255))},
+                "start_sending_instant_power",
             )
 
-        elif (
-            _configured_sensors[_sensor][CONF_DEVICE_CLASS]
-            == SensorDeviceClass.ILLUMINANCE
-        ):
-            _sensors.append(
-                MyHOMEIlluminanceSensor(
-                    hass=hass,
-                    device_id=_sensor,
-                    who=_configured_sensors[_sensor][CONF_WHO],
-                    where=_configured_sensors[_sensor][CONF_WHERE],
-                    name=_configured_sensors[_sensor][CONF_NAME],
-                    device_class=_configured_sensors[_sensor][CONF_DEVICE_CLASS],
-                    manufacturer=_configured_sensors[_sensor][CONF_MANUFACTURER],
-                    model=_configured_sensors[_sensor][CONF_DEVICE_MODEL],
-                    gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
-                )
-            )
+        async_add_entities(_sensors)
 
-    if _power_devices_configured:
-        platform = entity_platform.current_platform.get()
-
-        platform.async_register_entity_service(
-            SERVICE_SEND_INSTANT_POWER,
-            {Optional(ATTR_DURATION): All(Coerce(int), Range(min=1, max=255))},
-            "start_sending_instant_power",
-        )
-
-    async_add_entities(_sensors)
+    hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY].register_platform(PLATFORM, _async_add_sensors)
+    _async_add_sensors(list(hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM].keys()))
 
 
 async def async_unload_entry(hass, config_entry):
@@ -242,6 +284,11 @@ class MyHOMEPowerSensor(MyHOMEEntity, SensorEntity):
         self._attr_state_class = SensorStateClass.MEASUREMENT
 
         self._attr_native_value = None
+        # The stream is kept running by the gateway's power stream manager
+        self.value_received_at: float = None
+        # Every sample received, states are only published as configured on the gateway
+        self.samples = MyHOMESampleBuffer()
+        self._publish_timer: asyncio.TimerHandle = None
         self._attr_extra_state_attributes = {
             "Sensor": f"({self._where[0]}){self._where[1:]}"
         }
@@ -251,10 +298,17 @@ class MyHOMEPowerSensor(MyHOMEEntity, SensorEntity):
         self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
             self._platform
         ][self._device_id][CONF_ENTITIES][self._attr_device_class] = self
-        await self.async_update()
+        self._gateway_handler.register_entity(self._device_id, self)
+        self._gateway_handler.power_streams.subscribe(self)
 
     async def async_will_remove_from_hass(self):
         """When entity is removed from hass."""
+        self._cancel_state_write()
+        self._gateway_handler.power_streams.unsubscribe(self)
+        if self._publish_timer is not None:
+            self._publish_timer.cancel()
+            self._publish_timer = None
+        self._gateway_handler.unregister_entity(self._device_id, self)
         if (
             self._attr_device_class
             in self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
@@ -268,9 +322,9 @@ class MyHOMEPowerSensor(MyHOMEEntity, SensorEntity):
     async def async_update(self):
         """Update the entity.
 
-        Only used by the generic entity update service.
+        Only used by the generic entity update service, the instant power
+        stream is kept running by the gateway.
         """
-        # await self.start_sending_instant_power(255)
 
     def handle_event(self, message: OWNEnergyEvent):
         """Handle an event message."""
@@ -282,15 +336,51 @@ class MyHOMEPowerSensor(MyHOMEEntity, SensorEntity):
             self._gateway_handler.log_id,
             message.human_readable_log,
         )
-        self._attr_native_value = message.active_power
+        _value = message.active_power
+        self.value_received_at = self._hass.loop.time()
+        self.samples.append(time.time(), _value)
+
+        _interval = self._gateway_handler.power_publish_interval
+        _threshold = self._gateway_handler.power_publish_threshold
+        _published = self._attr_native_value
+        if _published is None or (not _interval and not _threshold):
+            self._publish(_value)
+        elif _threshold and abs(_value - _published) > abs(_published) * _threshold / 100:
+            self._publish(_value)
+        elif _interval and self._publish_timer is None:
+            self._publish_timer = self._hass.loop.call_later(_interval, self._publish_window)
+
+    def _publish(self, value) -> None:
+        if self._publish_timer is not None:
+            self._publish_timer.cancel()
+            self._publish_timer = None
+        self.samples.reset_window()
+        self._attr_native_value = value
         self.async_schedule_update_ha_state()
 
+    @callback
+    def _publish_window(self) -> None:
+        """Publish the mean of the samples received during the last interval."""
+        self._publish_timer = None
+        _stats = self.samples.window_stats()
+        if _stats is None:
+            return
+        self._attr_extra_state_attributes["min"], self._attr_extra_state_attributes["max"], _mean = _stats
+        self._attr_extra_state_attributes["mean"] = round(_mean, 1)
+        self._publish(round(_mean, 1))
+
     async def start_sending_instant_power(self, duration):
         """Request automatic instant power."""
         await self._gateway_handler.send(
             OWNEnergyCommand.start_sending_instant_power(self._where, duration)
         )
 
+    async def request_instant_power(self, duration):
+        """Request automatic instant power in the background, behind the user commands."""
+        await self._gateway_handler.send_status_request(
+            OWNEnergyCommand.start_sending_instant_power(self._where, duration)
+        )
+
 
 class MyHOMEEnergySensor(MyHOMEEntity, SensorEntity):
     def __init__(
@@ -336,8 +426,9 @@ class MyHOMEEnergySensor(MyHOMEEntity, SensorEntity):
         self._attr_device_class = device_class
         self._attr_native_unit_of_measurement = UnitOfEnergy.WATT_HOUR
         self._attr_state_class = SensorStateClass.TOTAL_INCREASING
-        self._attr_should_poll = True
         self._attr_native_value = None
+        # Polled by the gateway's energy poll scheduler, which needs to know when a value came in
+        self.value_received_at: float = None
         self._attr_extra_state_attributes = {
             "Sensor": f"({self._where[0]}){self._where[1:]}"
         }
@@ -347,10 +438,15 @@ class MyHOMEEnergySensor(MyHOMEEntity, SensorEntity):
         self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
             self._platform
         ][self._device_id][CONF_ENTITIES][self._entity_specific_id] = self
+        self._gateway_handler.register_entity(self._device_id, self)
         await self.async_update()
+        self._gateway_handler.energy_polling.register(self, self._entity_specific_id)
 
     async def async_will_remove_from_hass(self):
         """When entity is removed from hass."""
+        self._cancel_state_write()
+        self._gateway_handler.energy_polling.unregister(self)
+        self._gateway_handler.unregister_entity(self._device_id, self)
         if (
             self._entity_specific_id
             in self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
@@ -388,6 +484,9 @@ class MyHOMEEnergySensor(MyHOMEEntity, SensorEntity):
         ]:
             return True
 
+        if message.message_type == ENERGY_MESSAGE_TYPES[self._entity_specific_id]:
+            self.value_received_at = self._hass.loop.time()
+
         if (
             self._entity_specific_id == "total-energy"
             and message.message_type == MESSAGE_TYPE_ENERGY_TOTALIZER
@@ -421,6 +520,332 @@ class MyHOMEEnergySensor(MyHOMEEntity, SensorEntity):
         self.async_schedule_update_ha_state()
 
 
+def period_bounds(period: str, now: datetime) -> Tuple[datetime, datetime]:
+    """Start and end of the local hour, day or week `now` falls in."""
+    if period == "hour":
+        _start = now.replace(minute=0, second=0, microsecond=0)
+        return _start, dt_util.as_local(dt_util.as_utc(_start) + timedelta(hours=1))
+    _date = now.date()
+    _days = 1
+    if period == "week":
+        _date -= timedelta(days=now.weekday())
+        _days = 7
+    return dt_util.start_of_local_day(_date), dt_util.start_of_local_day(_date + timedelta(days=_days))
+
+
+class MyHOMEPeriod:
+    """Current hour, day or week, whose bounds are only computed again once it is over."""
+
+    __slots__ = ("period", "since", "until")
+
+    def __init__(self, period: str):
+        self.period = period
+        self.since: float = None
+        self.until: float = None
+
+    def advance(self, timestamp: float) -> bool:
+        """Move to the period `timestamp` falls in, return whether it changed."""
+        if self.since is not None and self.since <= timestamp < self.until:
+            return False
+        _since, _until = period_bounds(self.period, dt_util.as_local(dt_util.utc_from_timestamp(timestamp)))
+        self.since = _since.timestamp()
+        self.until = _until.timestamp()
+        return True
+
+
+class MyHOMECounterWindow:
+    """Increase of an energy counter since the start of the current period.
+
+    Only the reading at the start of the period is kept. The last reading of
+    a period is the start of the next one, when they follow each other.
+    """
+
+    __slots__ = ("period", "start", "reading")
+
+    def __init__(self, period: str):
+        self.period = MyHOMEPeriod(period)
+        self.start: float = None
+        self.reading: float = None
+
+    def update(self, reading: float, timestamp: float) -> float:
+        _until = self.period.until
+        if self.period.advance(timestamp):
+            self.start = self.reading if self.reading is not None and _until == self.period.since else reading
+        elif reading < self.start:
+            # The meter was reset or replaced
+            self.start = reading
+        self.reading = reading
+        return reading - self.start
+
+
+class MyHOMEEnergyWindowSensor(MyHOMEEntity, SensorEntity, RestoreEntity):
+    """Consumption of the current hour or week, from the meter's totalizer.
+
+    The totalizer is polled by the gateway's energy poll scheduler at the
+    interval of the window (5 minutes for the hour, 10 for the week), which
+    is the resolution of the state within a period; it is also polled just
+    before and just after the end of each period, so that the consumption is
+    attributed to the right one within a few seconds.
+    """
+
+    def __init__(
+        self,
+        hass,
+        name: str,
+        device_id: str,
+        who: str,
+        where: str,
+        entity_specific_id: str,
+        device_class: str,
+        manufacturer: str,
+        model: str,
+        gateway: MyHOMEGatewayHandler,
+    ) -> None:
+        super().__init__(
+            hass=hass,
+            name=name,
+            platform=PLATFORM,
+            device_id=device_id,
+            who=who,
+            where=where,
+            manufacturer=manufacturer,
+            model=model,
+            gateway=gateway,
+        )
+
+        self._entity_specific_id = entity_specific_id
+        self._window = MyHOMECounterWindow(ENERGY_WINDOWS[entity_specific_id])
+        self._entity_specific_name = f"Energy (current {self._window.period.period})"
+        self._attr_entity_registry_enabled_default = False
+        self._attr_name = f"{name} {self._entity_specific_name}"
+
+        self._attr_unique_id = (
+            f"{gateway.mac}-{self._device_id}-{self._entity_specific_id}"
+        )
+        self._attr_device_class = device_class
+        self._attr_native_unit_of_measurement = UnitOfEnergy.WATT_HOUR
+        self._attr_state_class = SensorStateClass.TOTAL
+        self._attr_native_value = None
+        # Polled by the gateway's energy poll scheduler, which needs to know when a value came in
+        self.value_received_at: float = None
+        self._boundary_poll: asyncio.TimerHandle = None
+        self._attr_extra_state_attributes = {
+            "Sensor": f"({self._where[0]}){self._where[1:]}"
+        }
+
+    async def async_added_to_hass(self):
+        """When entity is added to hass."""
+        self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
+            self._platform
+        ][self._device_id][CONF_ENTITIES][self._entity_specific_id] = self
+        self._gateway_handler.register_entity(self._device_id, self)
+        state = await self.async_get_last_state()
+        if state and state.attributes.get("start_reading") is not None and state.attributes.get("since"):
+            try:
+                _since = dt_util.parse_datetime(state.attributes["since"])
+                _start = float(state.attributes["start_reading"])
+                _value = float(state.state)
+            except (TypeError, ValueError):
+                return
+            if _since is None:
+                return
+            self._window.period.advance(_since.timestamp())
+            self._window.start = _start
+            self._window.reading = _start + _value
+            self._publish(_value)
+        await self.async_update()
+        self._gateway_handler.energy_polling.register(self, self._entity_specific_id)
+
+    async def async_will_remove_from_hass(self):
+        """When entity is removed from hass."""
+        self._cancel_state_write()
+        self._gateway_handler.energy_polling.unregister(self)
+        if self._boundary_poll is not None:
+            self._boundary_poll.cancel()
+            self._boundary_poll = None
+        self._gateway_handler.unregister_entity(self._device_id, self)
+        if (
+            self._entity_specific_id
+            in self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
+                self._platform
+            ][self._device_id][CONF_ENTITIES]
+        ):
+            del self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
+                self._platform
+            ][self._device_id][CONF_ENTITIES][self._entity_specific_id]
+
+    def handle_event(self, message: OWNEnergyEvent):
+        """Handle an event message."""
+        if message.message_type not in [MESSAGE_TYPE_ENERGY_TOTALIZER]:
+            return True
+
+        self.value_received_at = self._hass.loop.time()
+        self._publish(self._window.update(message.total_consumption, time.time()))
+
+    async def async_update(self):
+        """Update the entity.
+
+        Used by the energy poll scheduler and the generic entity update service.
+        """
+        await self._gateway_handler.send_status_request(
+            OWNEnergyCommand.get_total_consumption(self._where)
+        )
+
+    def _schedule_boundary_poll(self) -> None:
+        if self._boundary_poll is not None:
+            self._boundary_poll.cancel()
+        _now = time.time()
+        _until = self._window.period.until
+        if _now < _until - ENERGY_WINDOW_BOUNDARY_LEAD:
+            _at = _until - ENERGY_WINDOW_BOUNDARY_LEAD
+        else:
+            _at = _until + ENERGY_WINDOW_BOUNDARY_LAG
+        self._boundary_poll = self._hass.loop.call_later(_at - _now, self._poll_boundary)
+
+    @callback
+    def _poll_boundary(self) -> None:
+        self._boundary_poll = None
+        self._hass.async_create_task(self.async_update())
+        # The poll after the end is scheduled again once its reading opened the next period
+        if time.time() < self._window.period.until:
+            self._schedule_boundary_poll()
+
+    def _publish(self, value) -> None:
+        _since = dt_util.as_local(dt_util.utc_from_timestamp(self._window.period.since))
+        self._attr_last_reset = _since
+        self._attr_extra_state_attributes["since"] = _since.isoformat()
+        self._attr_extra_state_attributes["start_reading"] = self._window.start
+        self._attr_native_value = value
+        self.async_schedule_update_ha_state()
+        self._schedule_boundary_poll()
+
+
+class MyHOMEPowerStatisticSensor(MyHOMEEntity, SensorEntity, RestoreEntity):
+    """Peak or percentile of the instant power of the current day.
+
+    Updated on every sample of the meter's instant power stream, in constant
+    time and memory, and only written to the state machine when it changed.
+    """
+
+    def __init__(
+        self,
+        hass,
+        name: str,
+        device_id: str,
+        who: str,
+        where: str,
+        entity_specific_id: str,
+        device_class: str,
+        manufacturer: str,
+        model: str,
+        gateway: MyHOMEGatewayHandler,
+    ) -> None:
+        super().__init__(
+            hass=hass,
+            name=name,
+            platform=PLATFORM,
+            device_id=device_id,
+            who=who,
+            where=where,
+            manufacturer=manufacturer,
+            model=model,
+            gateway=gateway,
+        )
+
+        self._entity_specific_id = entity_specific_id
+        _quantile = POWER_STATISTICS[entity_specific_id]
+        # The peak is exact, other quantiles are estimated
+        self._estimator = MyHOMEStreamingQuantile(_quantile) if _quantile < 1 else None
+        self._period = MyHOMEPeriod("day")
+        if self._estimator is None:
+            self._entity_specific_name = "Peak power (today)"
+        else:
+            self._entity_specific_name = f"Power {round(_quantile * 100)}th percentile (today)"
+        self._attr_entity_registry_enabled_default = False
+        self._attr_name = f"{name} {self._entity_specific_name}"
+
+        self._attr_unique_id = (
+            f"{gateway.mac}-{self._device_id}-{self._entity_specific_id}"
+        )
+        self._attr_device_class = device_class
+        self._attr_native_unit_of_measurement = UnitOfPower.WATT
+        self._attr_state_class = SensorStateClass.MEASUREMENT
+        self._attr_native_value = None
+        self._attr_extra_state_attributes = {
+            "Sensor": f"({self._where[0]}){self._where[1:]}"
+        }
+
+    async def async_added_to_hass(self):
+        """When entity is added to hass."""
+        self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
+            self._platform
+        ][self._device_id][CONF_ENTITIES][self._entity_specific_id] = self
+        self._gateway_handler.register_entity(self._device_id, self)
+        state = await self.async_get_last_state()
+        # Only the peak can be carried on over a restart, the estimators start over
+        if self._estimator is None and state and state.attributes.get("since"):
+            _since = dt_util.parse_datetime(state.attributes["since"])
+            try:
+                _peak = float(state.state)
+            except ValueError:
+                _peak = None
+            _today = MyHOMEPeriod("day")
+            _today.advance(time.time())
+            # The period is only taken over with the peak, so that `since` is set by the next sample otherwise
+            if _peak is not None and _since is not None and _since.timestamp() == _today.since:
+                self._period = _today
+                self._attr_native_value = _peak
+                self._attr_extra_state_attributes["since"] = state.attributes["since"]
+                self.async_schedule_update_ha_state()
+
+    async def async_will_remove_from_hass(self):
+        """When entity is removed from hass."""
+        self._cancel_state_write()
+        self._gateway_handler.unregister_entity(self._device_id, self)
+        if (
+            self._entity_specific_id
+            in self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
+                self._platform
+            ][self._device_id][CONF_ENTITIES]
+        ):
+            del self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
+                self._platform
+            ][self._device_id][CONF_ENTITIES][self._entity_specific_id]
+
+    async def async_update(self):
+        """Update the entity.
+
+        Only used by the generic entity update service, the statistic follows
+        the instant power stream kept running by the gateway.
+        """
+
+    def handle_event(self, message: OWNEnergyEvent):
+        """Handle an event message."""
+        if message.message_type not in [MESSAGE_TYPE_ACTIVE_POWER]:
+            return True
+
+        _value = message.active_power
+        _statistic = self._attr_native_value
+        _new_period = self._period.advance(time.time())
+        if _new_period:
+            self._attr_extra_state_attributes["since"] = dt_util.as_local(
+                dt_util.utc_from_timestamp(self._period.since)
+            ).isoformat()
+            _statistic = None
+            if self._estimator is not None:
+                self._estimator.reset()
+
+        if self._estimator is None:
+            _statistic = _value if _statistic is None else max(_statistic, _value)
+        else:
+            self._estimator.add(_value)
+            _statistic = round(self._estimator.value)
+
+        if _new_period or _statistic != self._attr_native_value:
+            self._attr_native_value = _statistic
+            self.async_schedule_update_ha_state()
+
+
 class MyHOMETemperatureSensor(MyHOMEEntity, SensorEntity):
     def __init__(
         self,
@@ -466,10 +891,13 @@ class MyHOMETemperatureSensor(MyHOMEEntity, SensorEntity):
         self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
             self._platform
         ][self._device_id][CONF_ENTITIES][self._attr_device_class] = self
+        self._gateway_handler.register_entity(self._device_id, self)
         await self.async_update()
 
     async def async_will_remove_from_hass(self):
         """When entity is removed from hass."""
+        self._cancel_state_write()
+        self._gateway_handler.unregister_entity(self._device_id, self)
         if (
             self._attr_device_class
             in self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
@@ -516,6 +944,8 @@ class MyHOMETemperatureSensor(MyHOMEEntity, SensorEntity):
 
 
 class MyHOMEIlluminanceSensor(MyHOMEEntity, SensorEntity):
+    _address_attributes = True
+
     def __init__(
         self,
         hass,
@@ -550,20 +980,19 @@ class MyHOMEIlluminanceSensor(MyHOMEEntity, SensorEntity):
         self._attr_native_unit_of_measurement = LIGHT_LUX
         self._attr_state_class = SensorStateClass.MEASUREMENT
         self._attr_native_value = None
-        self._attr_extra_state_attributes = {
-            "A": where[: len(where) // 2],
-            "PL": where[len(where) // 2 :],
-        }
 
     async def async_added_to_hass(self):
         """When entity is added to hass."""
         self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
             self._platform
         ][self._device_id][CONF_ENTITIES][self._attr_device_class] = self
+        self._gateway_handler.register_entity(self._device_id, self)
         await self.async_update()
 
     async def async_will_remove_from_hass(self):
         """When entity is removed from hass."""
+        self._cancel_state_write()
+        self._gateway_handler.unregister_entity(self._device_id, self)
         if (
             self._attr_device_class
             in self._hass.data[DOMAIN][self._gateway_handler.mac][CONF_PLATFORMS][
@@ -0,0 +1,105 @@
+"""Managed instant power streams of the energy meters."""
+import asyncio
+from typing import Any, Dict, List
+
+from .const import LOGGER
+
+# Longest stream a meter accepts (min)
+POWER_STREAM_DURATION = 255
+# Streams are renewed this long before they expire (s)
+POWER_STREAM_RENEW_MARGIN = 120
+# A stream silent for this long is taken as lost and requested again (s), the
+# wait doubling after every gap of a meter that stays silent, up to POWER_STREAM_GAP_MAX
+POWER_STREAM_GAP = 120
+POWER_STREAM_GAP_MAX = 3600
+# Interval between two checks of the streams (s)
+POWER_STREAM_CHECK_INTERVAL = 30
+
+
+class MyHOMEPowerStreamManager:
+    """Keeps every power sensor's instant power stream running.
+
+    A stream is requested when a sensor is added, for the longest duration a
+    meter accepts, and requested again shortly before it expires, when the
+    meter has been silent for `POWER_STREAM_GAP`, or when the event session
+    was re-established. Each request is a single frame to the meter, queued
+    with the status requests so that it never delays a user command.
+
+    A meter under a steady load may legitimately stay silent, so the silence
+    taken as a gap doubles after each gap of a meter until it reports again.
+    """
+
+    def __init__(self, hass, log_id: str):
+        self._hass = hass
+        self._log_id = log_id
+        # Sensor -> time its current stream was requested
+        self._streams: Dict[Any, float] = {}
+        # Sensor -> gaps in a row without any value received
+        self._gaps: Dict[Any, int] = {}
+        self._timer: asyncio.TimerHandle = None
+        self.requests = 0
+        self.gaps = 0
+
+    def subscribe(self, entity) -> None:
+        self._streams[entity] = self._hass.loop.time()
+        self._hass.async_create_task(self._async_request(entity))
+        if self._timer is None:
+            self._timer = self._hass.loop.call_later(POWER_STREAM_CHECK_INTERVAL, self._check)
+
+    def unsubscribe(self, entity) -> None:
+        self._streams.pop(entity, None)
+        self._gaps.pop(entity, None)
+        if not self._streams and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    async def async_resubscribe_all(self) -> None:
+        """Request every stream again, after the gateway may have lost them."""
+        for _entity in list(self._streams):
+            self._streams[_entity] = self._hass.loop.time()
+            await self._async_request(_entity)
+
+    @property
+    def entities(self) -> List:
+        return list(self._streams)
+
+    def _check(self) -> None:
+        _now = self._hass.loop.time()
+        for _entity, _requested in list(self._streams.items()):
+            _received = _entity.value_received_at
+            if _received is not None and _received >= _requested:
+                self._gaps.pop(_entity, None)
+            if _now >= _requested + POWER_STREAM_DURATION * 60 - POWER_STREAM_RENEW_MARGIN:
+                LOGGER.debug("%s Renewing the instant power stream of %s.", self._log_id, _entity.entity_id)
+            elif _now - max(_requested, _received or _requested) >= self._gap_delay(_entity):
+                LOGGER.debug("%s No instant power from %s lately, requesting it again.", self._log_id, _entity.entity_id)
+                self._gaps[_entity] = self._gaps.get(_entity, 0) + 1
+                self.gaps += 1
+            else:
+                continue
+            self._streams[_entity] = _now
+            self._hass.async_create_task(self._async_request(_entity))
+        self._timer = self._hass.loop.call_later(POWER_STREAM_CHECK_INTERVAL, self._check)
+
+    def _gap_delay(self, entity) -> float:
+        return min(POWER_STREAM_GAP * 2 ** self._gaps.get(entity, 0), POWER_STREAM_GAP_MAX)
+
+    async def _async_request(self, entity) -> None:
+        self.requests += 1
+        await entity.request_instant_power(POWER_STREAM_DURATION)
+
+    def cancel(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._streams.clear()
+        self._gaps.clear()
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "streams": len(self._streams),
+            "requests": self.requests,
+            "gaps": self.gaps,
+            "silent_meters": len(self._gaps),
+        }
@@ -0,0 +1,80 @@
+"""Supervision of the event session of a gateway."""
+import asyncio
+import random
+import socket
+
+from OWNd.connection import OWNEventSession, OWNSession
+from OWNd.message import OWNMessage
+
+# TCP keepalive of the event session: probing starts after KEEPALIVE_IDLE seconds
+# of silence and the socket is declared dead after KEEPALIVE_COUNT unanswered probes
+KEEPALIVE_IDLE = 60
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+
+RECONNECT_BACKOFF_MIN = 1
+RECONNECT_BACKOFF_MAX = 300
+
+
+class MyHOMEEventSession(OWNEventSession):
+    """Event session reporting a lost connection instead of hiding it.
+
+    `OWNEventSession.get_next` logs connection errors and returns None, which
+    leaves the caller reading a dead socket. Here they are raised, so that the
+    listener can reconnect and resynchronise, and TCP keepalive is enabled so
+    that a gateway vanishing without closing the socket is noticed too.
+    """
+
+    async def connect(self):
+        _result = await super().connect()
+        if _result is not None and _result["Success"]:
+            _enable_keepalive(self._stream_writer.get_extra_info("socket"))
+        return _result
+
+    async def get_next(self):
+        _data = (await self._stream_reader.readuntil(OWNSession.SEPARATOR)).decode()
+        try:
+            _message = OWNMessage.parse(_data)
+        except AttributeError:
+            self._logger.exception("%s Received data could not be parsed into a message:", self._gateway.log_id)
+            return None
+        return _message if _message else _data
+
+    async def close(self) -> None:
+        try:
+            await super().close()
+        except (ConnectionError, AttributeError):
+            pass
+
+
+def _enable_keepalive(sock: socket.socket) -> None:
+    if sock is None:
+        return
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    for _option, _value in (
+        ("TCP_KEEPIDLE", KEEPALIVE_IDLE),
+        ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+        ("TCP_KEEPCNT", KEEPALIVE_COUNT),
+    ):
+        if hasattr(socket, _option):
+            sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, _option), _value)
+
+
+class MyHOMEReconnectBackoff:
+    """Exponential backoff with full jitter between reconnection attempts."""
+
+    def __init__(self, minimum: float = RECONNECT_BACKOFF_MIN, maximum: float = RECONNECT_BACKOFF_MAX):
+        self._minimum = minimum
+        self._maximum = maximum
+        self.attempts = 0
+
+    def reset(self) -> None:
+        self.attempts = 0
+
+    def next_delay(self) -> float:
+        _ceiling = min(self._maximum, self._minimum * 2**self.attempts)
+        self.attempts += 1
+        return random.uniform(self._minimum, _ceiling)
+
+    async def wait(self) -> None:
+        await asyncio.sleep(self.next_delay())
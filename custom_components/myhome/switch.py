@@ -8,6 +8,7 @@ from homeassistant.const import (
     CONF_NAME,
     CONF_MAC,
 )
+from homeassistant.core import callback
 
 from OWNd.message import (
     OWNLightingEvent,
@@ -37,28 +38,33 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
     if PLATFORM not in hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS]:
         return True
 
-    _switches = []
-    _configured_switches = hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM]
+    @callback
+    def _async_add_switches(device_ids):
+        _switches = []
+        _configured_switches = hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM]
+
+        for _switch in device_ids:
+            _switch = MyHOMESwitch(
+                hass=hass,
+                device_id=_switch,
+                who=_configured_switches[_switch][CONF_WHO],
+                where=_configured_switches[_switch][CONF_WHERE],
+                icon=_configured_switches[_switch][CONF_ICON],
+                icon_on=_configured_switches[_switch][CONF_ICON_ON],
+                interface=_configured_switches[_switch][CONF_BUS_INTERFACE] if CONF_BUS_INTERFACE in _configured_switches[_switch] else None,
+                name=_configured_switches[_switch][CONF_NAME],
+                entity_name=_configured_switches[_switch][CONF_ENTITY_NAME],
+                device_class=_configured_switches[_switch][CONF_DEVICE_CLASS],
+                manufacturer=_configured_switches[_switch][CONF_MANUFACTURER],
+                model=_configured_switches[_switch][CONF_DEVICE_MODEL],
+                gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
+            )
+            _switches.append(_switch)
 
-    for _switch in _configured_switches.keys():
-        _switch = MyHOMESwitch(
-            hass=hass,
-            device_id=_switch,
-            who=_configured_switches[_switch][CONF_WHO],
-            where=_configured_switches[_switch][CONF_WHERE],
-            icon=_configured_switches[_switch][CONF_ICON],
-            icon_on=_configured_switches[_switch][CONF_ICON_ON],
-            interface=_configured_switches[_switch][CONF_BUS_INTERFACE] if CONF_BUS_INTERFACE in _configured_switches[_switch] else None,
-            name=_configured_switches[_switch][CONF_NAME],
-            entity_name=_configured_switches[_switch][CONF_ENTITY_NAME],
-            device_class=_configured_switches[_switch][CONF_DEVICE_CLASS],
-            manufacturer=_configured_switches[_switch][CONF_MANUFACTURER],
-            model=_configured_switches[_switch][CONF_DEVICE_MODEL],
-            gateway=hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY],
-        )
-        _switches.append(_switch)
+        async_add_entities(_switches)
 
-    async_add_entities(_switches)
+    hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_ENTITY].register_platform(PLATFORM, _async_add_switches)
+    _async_add_switches(list(hass.data[DOMAIN][config_entry.data[CONF_MAC]][CONF_PLATFORMS][PLATFORM].keys()))
 
 
 async def async_unload_entry(hass, config_entry):
@@ -72,6 +78,8 @@ async def async_unload_entry(hass, config_entry):
 
 
 class MyHOMESwitch(MyHOMEEntity, SwitchEntity):
+    _address_attributes = True
+
     def __init__(
         self,
         hass,
@@ -98,20 +106,11 @@ class MyHOMESwitch(MyHOMEEntity, SwitchEntity):
             manufacturer=manufacturer,
             model=model,
             gateway=gateway,
+            interface=interface,
         )
 
         self._attr_name = entity_name
 
-        self._interface = interface
-        self._full_where = f"{self._where}#4#{self._interface}" if self._interface is not None else self._where
-
-        self._attr_extra_state_attributes = {
-            "A": where[: len(where) // 2],
-            "PL": where[len(where) // 2 :],
-        }
-        if self._interface is not None:
-            self._attr_extra_state_attributes["Int"] = self._interface
-
         self._attr_device_class = SwitchDeviceClass.OUTLET if device_class.lower() == "outlet" else SwitchDeviceClass.SWITCH
 
         self._on_icon = icon_on
@@ -0,0 +1,150 @@
+"""Bulk state synchronisation of the bus when a gateway is set up."""
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Set, Tuple
+
+from homeassistant.const import Platform
+
+from OWNd.message import (
+    OWNCommand,
+    OWNLightingCommand,
+    OWNAutomationCommand,
+)
+
+from .address import MyHOMEAddress, WHERE_POINT
+from .const import (
+    CONF_WHO,
+    CONF_WHERE,
+    CONF_BUS_INTERFACE,
+    CONF_DIMMABLE,
+    LOGGER,
+)
+
+STATUS_REQUESTS: Dict[str, Callable[[str], OWNCommand]] = {
+    "1": OWNLightingCommand.status,
+    "2": OWNAutomationCommand.status,
+}
+
+# Minimum number of devices in an area for an area query to pay off
+MIN_AREA_DEVICES = 2
+# Number of area queries on a bus from which a single general query is sent instead
+MIN_GENERAL_AREAS = 3
+
+
+class MyHOMEStartupSync:
+    """Plans and runs the initial state synchronisation of a gateway.
+
+    Instead of one point-to-point status request per light, switch and
+    cover, devices are grouped by WHO, bus interface and area, and a single
+    area (or general) status request is sent per group; the replies reach the
+    entities through the normal event dispatch. Devices still unheard of
+    once `timeout` has elapsed are queried individually.
+    """
+
+    def __init__(
+        self,
+        hass,
+        log_id: str,
+        send: Callable[[OWNCommand], Awaitable[None]],
+        update_device: Callable[[str], Awaitable[None]],
+        timeout: float,
+    ):
+        self._hass = hass
+        self._log_id = log_id
+        self._send = send
+        self._update_device = update_device
+        self._timeout = timeout
+
+        self._queries: List[OWNCommand] = []
+        self._covered: Set[str] = set()
+        self._seen: Set[str] = set()
+        self._active = False
+        self._timer: asyncio.TimerHandle = None
+        self._fallback_task: asyncio.Task = None
+
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    def plan(self, platforms: dict) -> None:
+        """Group the point-to-point devices of the validated configuration."""
+        _groups: Dict[Tuple[str, str], Dict[str, List[str]]] = {}
+
+        for _platform in (Platform.LIGHT, Platform.SWITCH, Platform.COVER):
+            for _device_id, _device in platforms.get(_platform, {}).items():
+                if _device.get(CONF_DIMMABLE, False):
+                    # Dimmers need their brightness, which only a point query returns
+                    continue
+                _address = MyHOMEAddress.get(_device[CONF_WHO], _device[CONF_WHERE], _device.get(CONF_BUS_INTERFACE))
+                if _address.kind != WHERE_POINT or _address.who not in STATUS_REQUESTS:
+                    continue
+                _area = _address.area
+                _bus = (_device[CONF_WHO], _device.get(CONF_BUS_INTERFACE))
+                _groups.setdefault(_bus, {}).setdefault(_area, []).append(_device_id)
+
+        self._queries = []
+        self._covered = set()
+        for (_who, _interface), _areas in _groups.items():
+            _suffix = f"#4#{_interface}" if _interface is not None else ""
+            _status_request = STATUS_REQUESTS[_who]
+            _grouped_areas = {_area: _devices for _area, _devices in _areas.items() if len(_devices) >= MIN_AREA_DEVICES}
+
+            if len(_grouped_areas) >= MIN_GENERAL_AREAS:
+                self._queries.append(_status_request(f"0{_suffix}"))
+                for _devices in _areas.values():
+                    self._covered.update(_devices)
+            else:
+                for _area, _devices in _grouped_areas.items():
+                    self._queries.append(_status_request(f"{_area}{_suffix}"))
+                    self._covered.update(_devices)
+
+        self._active = len(self._queries) > 0
+        LOGGER.debug(
+            "%s Startup sync planned %s queries for %s devices.",
+            self._log_id,
+            len(self._queries),
+            len(self._covered),
+        )
+
+    def covers(self, device_id: str) -> bool:
+        """Whether the state of a device will be obtained by the startup sync."""
+        return self._active and device_id in self._covered
+
+    def seen(self, device_id: str) -> None:
+        self._seen.add(device_id)
+
+    async def async_start(self) -> None:
+        if not self._active:
+            return
+        for _query in self._queries:
+            await self._send(_query)
+        self._timer = self._hass.loop.call_later(self._timeout, self._fallback)
+
+    async def async_resume(self) -> None:
+        """Send the planned queries again, after the event session was re-established."""
+        self.cancel()
+        self._seen = set()
+        self._active = len(self._queries) > 0
+        await self.async_start()
+
+    def cancel(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._active = False
+
+    def _fallback(self) -> None:
+        self._timer = None
+        self._active = False
+        _unknown = self._covered - self._seen
+        self._seen = set()
+        if _unknown:
+            LOGGER.info(
+                "%s Startup sync did not get the status of %s devices, querying them individually.",
+                self._log_id,
+                len(_unknown),
+            )
+            self._fallback_task = self._hass.loop.create_task(self._update_devices(_unknown))
+
+    async def _update_devices(self, device_ids: Set[str]) -> None:
+        for _device_id in device_ids:
+            await self._update_device(_device_id)
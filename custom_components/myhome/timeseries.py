@@ -0,0 +1,144 @@
+"""Fixed-size buffers and streaming statistics of the samples of high-rate sensors."""
+from array import array
+from bisect import bisect_right, insort
+from typing import Any, Dict, List, Optional, Tuple
+
+# Samples kept per meter, an hour of a meter pushing every second
+POWER_SAMPLE_BUFFER_SIZE = 3600
+# Latest samples given along with the statistics of the buffer
+SUMMARY_LAST_SAMPLES = 10
+
+
+class MyHOMESampleBuffer:
+    """Ring buffer of (timestamp, value) samples, backed by two arrays of doubles.
+
+    Its memory is allocated once; when full, every new sample overwrites
+    the oldest one. The statistics are computed over the samples appended
+    since the window was last reset.
+    """
+
+    __slots__ = ("_times", "_values", "_size", "_next", "_count", "_window")
+
+    def __init__(self, size: int = POWER_SAMPLE_BUFFER_SIZE):
+        self._times = array("d", bytes(8 * size))
+        self._values = array("d", bytes(8 * size))
+        self._size = size
+        self._next = 0
+        self._count = 0
+        self._window = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, value: float) -> None:
+        self._times[self._next] = timestamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self._size
+        self._count = min(self._count + 1, self._size)
+        self._window = min(self._window + 1, self._size)
+
+    def _indices(self, count: int) -> range:
+        return range(self._next - count, self._next)
+
+    def window_stats(self) -> Optional[Tuple[float, float, float]]:
+        """Min, max and mean of the samples of the current window, if any."""
+        if self._window == 0:
+            return None
+        _values = [self._values[_index] for _index in self._indices(self._window)]
+        return min(_values), max(_values), sum(_values) / len(_values)
+
+    def reset_window(self) -> None:
+        self._window = 0
+
+    def last(self, count: int) -> List[Tuple[float, float]]:
+        """The latest `count` samples kept, oldest first."""
+        return [(self._times[_index], self._values[_index]) for _index in self._indices(min(count, self._count))]
+
+    def summary(self, last: int = SUMMARY_LAST_SAMPLES) -> Dict[str, Any]:
+        """Statistics of every sample kept, with the latest ones, for the diagnostics."""
+        if self._count == 0:
+            return {"count": 0, "last": []}
+        _values = sorted(self._values[_index] for _index in self._indices(self._count))
+        return {
+            "count": self._count,
+            "since": self._times[self._next - self._count],
+            "mean": sum(_values) / self._count,
+            "min": _values[0],
+            "max": _values[-1],
+            "p95": _values[min(self._count - 1, int(0.95 * self._count))],
+            "last": self.last(last),
+        }
+
+
+class MyHOMEStreamingQuantile:
+    """Running estimate of a quantile of a stream of values, in constant memory.
+
+    Uses the P² algorithm (Jain & Chlamtac, 1985): five markers track the
+    minimum, the maximum, the quantile and halfway points, and are moved
+    along a parabola as the values come in, so that each one costs O(1)
+    whatever the number of values seen.
+    """
+
+    __slots__ = ("quantile", "_heights", "_positions", "_desired", "_increments")
+
+    def __init__(self, quantile: float):
+        self.quantile = quantile
+        self._increments = (0.0, quantile / 2, quantile, (1 + quantile) / 2, 1.0)
+        self.reset()
+
+    def reset(self) -> None:
+        self._heights: List[float] = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0.0, 2 * self.quantile, 4 * self.quantile, 2 + 2 * self.quantile, 4.0]
+
+    def add(self, value: float) -> None:
+        _heights = self._heights
+        if len(_heights) < 5:
+            insort(_heights, value)
+            return
+
+        if value < _heights[0]:
+            _heights[0] = value
+            _cell = 0
+        elif value >= _heights[4]:
+            _heights[4] = value
+            _cell = 3
+        else:
+            _cell = bisect_right(_heights, value, 1, 4) - 1
+
+        _positions = self._positions
+        for _marker in range(_cell + 1, 5):
+            _positions[_marker] += 1
+        for _marker in range(5):
+            self._desired[_marker] += self._increments[_marker]
+
+        for _marker in (1, 2, 3):
+            _offset = self._desired[_marker] - _positions[_marker]
+            if (_offset >= 1 and _positions[_marker + 1] - _positions[_marker] > 1) or (
+                _offset <= -1 and _positions[_marker - 1] - _positions[_marker] < -1
+            ):
+                _step = 1 if _offset > 0 else -1
+                _height = self._parabolic(_marker, _step)
+                if not _heights[_marker - 1] < _height < _heights[_marker + 1]:
+                    _height = _heights[_marker] + _step * (_heights[_marker + _step] - _heights[_marker]) / (
+                        _positions[_marker + _step] - _positions[_marker]
+                    )
+                _heights[_marker] = _height
+                _positions[_marker] += _step
+
+    def _parabolic(self, marker: int, step: int) -> float:
+        _q = self._heights
+        _n = self._positions
+        return _q[marker] + step / (_n[marker + 1] - _n[marker - 1]) * (
+            (_n[marker] - _n[marker - 1] + step) * (_q[marker + 1] - _q[marker]) / (_n[marker + 1] - _n[marker])
+            + (_n[marker + 1] - _n[marker] - step) * (_q[marker] - _q[marker - 1]) / (_n[marker] - _n[marker - 1])
+        )
+
+    @property
+    def value(self) -> Optional[float]:
+        """Current estimate, exact until five values were seen."""
+        if not self._heights:
+            return None
+        if len(self._heights) < 5:
+            return self._heights[round(self.quantile * (len(self._heights) - 1))]
+        return self._heights[2]
@@ -7,30 +7,17 @@ from voluptuous import (
     Required,
     Coerce,
     Boolean,
-    Any,
     All,
     In,
     Invalid,
 )
 from homeassistant.helpers.device_registry import format_mac as ha_format_mac
-from homeassistant.components.light import DOMAIN as LIGHT
-from homeassistant.components.switch import (
-    SwitchDeviceClass,
-    DOMAIN as SWITCH,
-)
-from homeassistant.components.button import DOMAIN as BUTTON
-from homeassistant.components.cover import DOMAIN as COVER
-from homeassistant.components.binary_sensor import (
-    BinarySensorDeviceClass,
-    DOMAIN as BINARY_SENSOR,
-)
-from homeassistant.components.sensor import (
-    SensorDeviceClass,
-    DOMAIN as SENSOR,
-)
-from homeassistant.components.climate import DOMAIN as CLIMATE
-from homeassistant.const import CONF_NAME, CONF_MAC
+from homeassistant.components.switch import SwitchDeviceClass
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass
+from homeassistant.components.sensor import SensorDeviceClass
+from homeassistant.const import CONF_NAME, CONF_MAC, Platform
 
+from .address import MyHOMEAddress
 from .const import (
     CONF_PLATFORMS,
     CONF_WHO,
@@ -54,6 +41,21 @@ from .const import (
     CONF_CENTRAL,
 )
 
+LIGHT = Platform.LIGHT.value
+SWITCH = Platform.SWITCH.value
+BUTTON = Platform.BUTTON.value
+COVER = Platform.COVER.value
+BINARY_SENSOR = Platform.BINARY_SENSOR.value
+SENSOR = Platform.SENSOR.value
+CLIMATE = Platform.CLIMATE.value
+
+# Bumped whenever the validated form of the configuration changes, so that
+# the forms kept in .storage by older versions are validated again
+CONFIG_FORMAT_VERSION = 3
+
+# WHERE of area 10 on the bus, which is how it is kept once validated
+AREA_10 = "100"
+
 
 def format_mac(address: str) -> str:
     mac = re.sub("[.:-]", "", address).upper()
@@ -96,8 +98,8 @@ class Area(object):
         self.msg = msg
 
     def __call__(self, v):
-        if type(v) == str and v in ["00", "1", "2", "3", "4", "5", "6", "7", "8", "9", "10"]:
-            return v
+        if type(v) == str and v in ["00", "1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "100"]:
+            return AREA_10 if v == "10" else v
         else:
             raise Invalid(f"Invalid Area WHERE {v}, it must be a string in [00, 1-9, 10].")
 
@@ -142,6 +144,39 @@ class PointToPoint(object):
         return "Where(%s, msg=%r)" % ("String", self.msg)
 
 
+# Every General, Area and Point-to-Point WHERE, which are valid as they are but for
+# area 10, configured as 10 and addressed as 100 on the bus
+LIGHTING_WHERES = frozenset(
+    ["0", "00", "1", "2", "3", "4", "5", "6", "7", "8", "9", "10", "100"]
+    + [f"{_a}{_pl}" for _a in range(10) for _pl in range(10)]
+    + [f"{_a:02d}{_pl:02d}" for _a in range(11) for _pl in range(16)]
+)
+GROUP_WHERE = re.compile(r"#(\d+)")
+
+
+class LightingWhere(object):
+    """General, Area, Group or Point-to-Point WHERE, in a single check.
+
+    Same as `Any(General(), Area(), Group(), PointToPoint())`, without going
+    through three failed validators for every point-to-point device.
+    """
+
+    def __init__(self, msg=None):
+        self.msg = msg
+
+    def __call__(self, v):
+        if type(v) == str:
+            if v in LIGHTING_WHERES:
+                return AREA_10 if v == "10" else v
+            _group = GROUP_WHERE.fullmatch(v)
+            if _group is not None and 1 <= int(_group.group(1)) <= 255:
+                return f"#{int(_group.group(1))}"
+        raise Invalid(self.msg or f"Invalid WHERE {v}, expecting a valid General, Area, Group or Point-to-Point WHERE.")
+
+    def __repr__(self):
+        return "Where(%s, msg=%r)" % ("String", self.msg)
+
+
 class SpecialWhere(object):
     def __init__(self, msg=None):
         self.msg = msg
@@ -172,35 +207,26 @@ class BusInterface(object):
         return "BusInterface(%s, msg=%r)" % ("String", self.msg)
 
 
+def add_button_platform(platforms: dict) -> None:
+    """Add the lock buttons of lights, switches and covers, sharing their device's configuration."""
+    if LIGHT in platforms or SWITCH in platforms or COVER in platforms:
+        platforms[BUTTON] = {
+            key: value
+            for _platform in (LIGHT, SWITCH, COVER)
+            for key, value in platforms.get(_platform, {}).items()
+            if not value[CONF_WHERE].startswith("#")
+        }
+
+
 class MyHomeConfigSchema(Schema):
     def __call__(self, data):
         data = super().__call__(data)
         _rekeyed_data = {}
-        for gateway in data:
-            _rekeyed_data[data[gateway][CONF_MAC]] = {}
-            _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS] = {}
-            for platform in data[gateway]:
-                if platform != CONF_MAC:
-                    _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS][platform] = data[gateway][platform]
-
-            if (
-                (LIGHT in _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS])
-                or (SWITCH in _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS])
-                or (COVER in _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS])
-            ):
-                _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS][BUTTON] = {}
-                if LIGHT in _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS]:
-                    for key, value in _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS][LIGHT].items():
-                        if not value[CONF_WHERE].startswith("#"):
-                            _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS][BUTTON][key] = value
-                if SWITCH in _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS]:
-                    for key, value in _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS][SWITCH].items():
-                        if not value[CONF_WHERE].startswith("#"):
-                            _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS][BUTTON][key] = value
-                if COVER in _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS]:
-                    for key, value in _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS][COVER].items():
-                        if not value[CONF_WHERE].startswith("#"):
-                            _rekeyed_data[data[gateway][CONF_MAC]][CONF_PLATFORMS][BUTTON][key] = value
+        for gateway in data.values():
+            _platforms = {_platform: _devices for _platform, _devices in gateway.items() if _platform != CONF_MAC}
+
+            add_button_platform(_platforms)
+            _rekeyed_data[gateway[CONF_MAC]] = {CONF_PLATFORMS: _platforms}
 
         return _rekeyed_data
 
@@ -211,29 +237,26 @@ class MyHomeDeviceSchema(Schema):
         _rekeyed_data = {}
 
         for device in data:
-            data[device][CONF_ENTITIES] = {}
-            if CONF_WHERE in data[device]:
-                _new_key = (
-                    f"{data[device][CONF_WHO]}-{data[device][CONF_WHERE]}#4#{data[device][CONF_BUS_INTERFACE]}"
-                    if CONF_BUS_INTERFACE in data[device] and data[device][CONF_BUS_INTERFACE] is not None
-                    else f"{data[device][CONF_WHO]}-{data[device][CONF_WHERE]}"
-                )
-                _rekeyed_data[_new_key] = data[device]
-            elif CONF_ZONE in data[device]:
-                _new_key = f"{data[device][CONF_WHO]}-{data[device][CONF_ZONE]}"
-                data[device][CONF_ZONE] = f"#0#{data[device][CONF_ZONE]}" if data[device][CONF_CENTRAL] and data[device][CONF_ZONE] != "#0" else data[device][CONF_ZONE]
-                data[device][CONF_NAME] = (
-                    data[device][CONF_NAME] if CONF_NAME in data[device] else "Central unit" if data[device][CONF_ZONE].startswith("#0") else f"Zone {data[device][CONF_ZONE]}"
+            _device = data[device]
+            _device[CONF_ENTITIES] = {}
+            if CONF_WHERE in _device:
+                _new_key = MyHOMEAddress.get(_device[CONF_WHO], _device[CONF_WHERE], _device.get(CONF_BUS_INTERFACE)).key
+                _rekeyed_data[_new_key] = _device
+            elif CONF_ZONE in _device:
+                _new_key = f"{_device[CONF_WHO]}-{_device[CONF_ZONE]}"
+                _device[CONF_ZONE] = f"#0#{_device[CONF_ZONE]}" if _device[CONF_CENTRAL] and _device[CONF_ZONE] != "#0" else _device[CONF_ZONE]
+                _device[CONF_NAME] = (
+                    _device[CONF_NAME] if CONF_NAME in _device else "Central unit" if _device[CONF_ZONE].startswith("#0") else f"Zone {_device[CONF_ZONE]}"
                 )
-                _rekeyed_data[_new_key] = data[device]
-            if CONF_DEVICE_MODEL not in data[device]:
-                data[device][CONF_DEVICE_MODEL] = None
-            if CONF_ICON not in data[device]:
-                data[device][CONF_ICON] = None
-            if CONF_ICON_ON not in data[device]:
-                data[device][CONF_ICON_ON] = None
-            if CONF_ENTITY_NAME not in data[device]:
-                data[device][CONF_ENTITY_NAME] = None
+                _rekeyed_data[_new_key] = _device
+            if CONF_DEVICE_MODEL not in _device:
+                _device[CONF_DEVICE_MODEL] = None
+            if CONF_ICON not in _device:
+                _device[CONF_ICON] = None
+            if CONF_ICON_ON not in _device:
+                _device[CONF_ICON_ON] = None
+            if CONF_ENTITY_NAME not in _device:
+                _device[CONF_ENTITY_NAME] = None
 
         return _rekeyed_data
 
@@ -244,40 +267,41 @@ class MyHomeSensorSchema(Schema):
         _rekeyed_data = {}
 
         for device in data:
-            data[device][CONF_ENTITIES] = {}
-            if CONF_DEVICE_CLASS in data[device]:
-                if data[device][CONF_DEVICE_CLASS] in [
+            _device = data[device]
+            _device[CONF_ENTITIES] = {}
+            if CONF_DEVICE_CLASS in _device:
+                if _device[CONF_DEVICE_CLASS] in [
                     SensorDeviceClass.POWER,
                     SensorDeviceClass.ENERGY,
                 ]:
-                    if CONF_WHO not in data[device]:
-                        data[device][CONF_WHO] = "18"
-                    elif data[device][CONF_WHO] != "18":
+                    if CONF_WHO not in _device:
+                        _device[CONF_WHO] = "18"
+                    elif _device[CONF_WHO] != "18":
                         raise Invalid("invalid sensor class for selected who")
-                    data[device][CONF_ENTITIES][f"daily-{SensorDeviceClass.ENERGY}"] = {}
-                    data[device][CONF_ENTITIES][f"monthly-{SensorDeviceClass.ENERGY}"] = {}
-                    data[device][CONF_ENTITIES][f"total-{SensorDeviceClass.ENERGY}"] = {}
-                    if data[device][CONF_DEVICE_CLASS] in [SensorDeviceClass.POWER]:
-                        data[device][CONF_ENTITIES][f"{SensorDeviceClass.POWER}"] = {}
-                elif data[device][CONF_DEVICE_CLASS] in [SensorDeviceClass.TEMPERATURE]:
-                    if CONF_WHO not in data[device]:
-                        data[device][CONF_WHO] = "4"
-                    elif data[device][CONF_WHO] != "4":
+                    _device[CONF_ENTITIES][f"daily-{SensorDeviceClass.ENERGY}"] = {}
+                    _device[CONF_ENTITIES][f"monthly-{SensorDeviceClass.ENERGY}"] = {}
+                    _device[CONF_ENTITIES][f"total-{SensorDeviceClass.ENERGY}"] = {}
+                    _device[CONF_ENTITIES][f"hourly-{SensorDeviceClass.ENERGY}"] = {}
+                    _device[CONF_ENTITIES][f"weekly-{SensorDeviceClass.ENERGY}"] = {}
+                    if _device[CONF_DEVICE_CLASS] in [SensorDeviceClass.POWER]:
+                        _device[CONF_ENTITIES][f"{SensorDeviceClass.POWER}"] = {}
+                        _device[CONF_ENTITIES][f"peak-{SensorDeviceClass.POWER}"] = {}
+                        _device[CONF_ENTITIES][f"p95-{SensorDeviceClass.POWER}"] = {}
+                elif _device[CONF_DEVICE_CLASS] in [SensorDeviceClass.TEMPERATURE]:
+                    if CONF_WHO not in _device:
+                        _device[CONF_WHO] = "4"
+                    elif _device[CONF_WHO] != "4":
                         raise Invalid("invalid sensor class for selected who")
-                elif data[device][CONF_DEVICE_CLASS] in [SensorDeviceClass.ILLUMINANCE]:
-                    if CONF_WHO not in data[device]:
-                        data[device][CONF_WHO] = "1"
-                    elif data[device][CONF_WHO] != "1":
+                elif _device[CONF_DEVICE_CLASS] in [SensorDeviceClass.ILLUMINANCE]:
+                    if CONF_WHO not in _device:
+                        _device[CONF_WHO] = "1"
+                    elif _device[CONF_WHO] != "1":
                         raise Invalid("invalid sensor class for selected who")
-            if CONF_WHERE in data[device]:
-                _new_key = (
-                    f"{data[device][CONF_WHO]}-{data[device][CONF_WHERE]}#4#{data[device][CONF_BUS_INTERFACE]}"
-                    if CONF_BUS_INTERFACE in data[device] and data[device][CONF_BUS_INTERFACE] is not None
-                    else f"{data[device][CONF_WHO]}-{data[device][CONF_WHERE]}"
-                )
-                _rekeyed_data[_new_key] = data[device]
-            if CONF_DEVICE_MODEL not in data[device]:
-                data[device][CONF_DEVICE_MODEL] = None
+            if CONF_WHERE in _device:
+                _new_key = MyHOMEAddress.get(_device[CONF_WHO], _device[CONF_WHERE], _device.get(CONF_BUS_INTERFACE)).key
+                _rekeyed_data[_new_key] = _device
+            if CONF_DEVICE_MODEL not in _device:
+                _device[CONF_DEVICE_MODEL] = None
 
         return _rekeyed_data
 
@@ -287,7 +311,7 @@ light_schema = MyHomeDeviceSchema(
         Required(str): {
             Optional(CONF_WHO, default="1"): "1",
             Required(CONF_WHERE): All(
-                Coerce(str), Any(General(), Area(), Group(), PointToPoint(), msg="Invalid <WHERE>, expecting a valid General, Area, Group or Point-to-Point <WHERE>")
+                Coerce(str), LightingWhere(msg="Invalid <WHERE>, expecting a valid General, Area, Group or Point-to-Point <WHERE>")
             ),
             Optional(CONF_BUS_INTERFACE): All(Coerce(str), BusInterface()),
             Required(CONF_NAME): str,
@@ -306,7 +330,7 @@ switch_schema = MyHomeDeviceSchema(
         Required(str): {
             Optional(CONF_WHO, default="1"): "1",
             Required(CONF_WHERE): All(
-                Coerce(str), Any(General(), Area(), Group(), PointToPoint(), msg="Invalid <WHERE>, expecting a valid General, Area, Group or Point-to-Point <WHERE>")
+                Coerce(str), LightingWhere(msg="Invalid <WHERE>, expecting a valid General, Area, Group or Point-to-Point <WHERE>")
             ),
             Optional(CONF_BUS_INTERFACE): All(Coerce(str), BusInterface()),
             Required(CONF_NAME): str,
@@ -330,7 +354,7 @@ cover_schema = MyHomeDeviceSchema(
         Required(str): {
             Optional(CONF_WHO, default="2"): "2",
             Required(CONF_WHERE): All(
-                Coerce(str), Any(General(), Area(), Group(), PointToPoint(), msg="Invalid <WHERE>, expecting a valid General, Area, Group or Point-to-Point <WHERE>")
+                Coerce(str), LightingWhere(msg="Invalid <WHERE>, expecting a valid General, Area, Group or Point-to-Point <WHERE>")
             ),
             Optional(CONF_BUS_INTERFACE): All(Coerce(str), BusInterface()),
             Required(CONF_NAME): str,
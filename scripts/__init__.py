@@ -0,0 +1 @@
+"""Development scripts: gateway simulator, capture replay and benchmarks."""
@@ -0,0 +1,121 @@
+"""Cost of finding the entities of an event: walk of the configuration against the dispatch index.
+
+From the root of the repository:
+
+    python -m scripts.bench_dispatch --devices 10 100 1000 --frames 20000
+
+The walk is the one the listening loop used to run for every lighting or
+automation event: every platform of the configuration is looked up for the
+entity of the message, then every entity of the device is checked not to be
+a lock button. It is timed against the dispatch index of the gateway handler
+on the same synthetic configuration, the entities only counting the events
+they are given.
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict, List
+
+from OWNd.message import OWNMessage
+
+from custom_components.myhome.button import DisableCommandButtonEntity, EnableCommandButtonEntity
+from custom_components.myhome.const import CONF_ENTITIES, CONF_PLATFORMS, CONF_WHERE, CONF_WHO, DOMAIN
+from custom_components.myhome.myhome_device import MyHOMEEntity
+from custom_components.myhome.validate import BUTTON, COVER, LIGHT, SWITCH, config_schema
+
+from scripts.harness import StubHass, build_handler, config_entry, configured_devices, synthetic_config
+
+
+class CountingEntity(MyHOMEEntity):
+    """Only counts the events it is given."""
+
+    def __init__(self):  # pylint: disable=super-init-not-called
+        self.events = 0
+
+    def handle_event(self, message) -> None:
+        self.events += 1
+
+
+def _walk(hass: StubHass, mac: str, message: OWNMessage) -> None:
+    """The dispatch of the listening loop before the index."""
+    for _platform in hass.data[DOMAIN][mac][CONF_PLATFORMS]:
+        if _platform != BUTTON and message.entity in hass.data[DOMAIN][mac][CONF_PLATFORMS][_platform]:
+            for _entity in hass.data[DOMAIN][mac][CONF_PLATFORMS][_platform][message.entity][CONF_ENTITIES]:
+                if (
+                    isinstance(
+                        hass.data[DOMAIN][mac][CONF_PLATFORMS][_platform][message.entity][CONF_ENTITIES][_entity],
+                        MyHOMEEntity,
+                    )
+                    and not isinstance(
+                        hass.data[DOMAIN][mac][CONF_PLATFORMS][_platform][message.entity][CONF_ENTITIES][_entity],
+                        DisableCommandButtonEntity,
+                    )
+                    and not isinstance(
+                        hass.data[DOMAIN][mac][CONF_PLATFORMS][_platform][message.entity][CONF_ENTITIES][_entity],
+                        EnableCommandButtonEntity,
+                    )
+                ):
+                    hass.data[DOMAIN][mac][CONF_PLATFORMS][_platform][message.entity][CONF_ENTITIES][_entity].handle_event(message)
+
+
+def _frames(gateway_config: Dict[str, Any], frames: int, seed: int = 0) -> List[OWNMessage]:
+    """Lighting and automation events of the configured lights, switches and covers."""
+    _random = random.Random(seed)
+    _wheres = [
+        (_device[CONF_WHO], _device[CONF_WHERE])
+        for _platform, _, _device in configured_devices(gateway_config)
+        if _platform in (LIGHT, SWITCH, COVER)
+    ]
+    return [OWNMessage.parse(f"*{_who}*{_random.choice((0, 1))}*{_where}##") for _who, _where in _random.choices(_wheres, k=frames)]
+
+
+def _time(dispatch, messages: List[OWNMessage]) -> float:
+    _start = time.perf_counter()
+    for _message in messages:
+        dispatch(_message)
+    return time.perf_counter() - _start
+
+
+def run(devices: int, frames: int) -> Dict[str, float]:
+    _config = config_schema(synthetic_config(devices))
+    _mac = next(iter(_config))
+    _hass = StubHass(asyncio.new_event_loop())
+    _handler = build_handler(_hass, _config[_mac], config_entry(_mac))
+
+    _entities = []
+    for _platform, _device_id, _device in configured_devices(_config[_mac]):
+        for _key in list(_device[CONF_ENTITIES]) or [_platform]:
+            _entity = CountingEntity()
+            _device[CONF_ENTITIES][_key] = _entity
+            _handler.register_entity(_device_id, _entity)
+            _entities.append(_entity)
+        if _platform in (LIGHT, SWITCH, COVER) and not _device[CONF_WHERE].startswith("#"):
+            # Lock buttons live with the entities of their device, and are skipped by the walk
+            _device[CONF_ENTITIES]["disable"] = DisableCommandButtonEntity.__new__(DisableCommandButtonEntity)
+            _device[CONF_ENTITIES]["enable"] = EnableCommandButtonEntity.__new__(EnableCommandButtonEntity)
+
+    _messages = _frames(_config[_mac], frames)
+    _walked = _time(lambda _message: _walk(_hass, _mac, _message), _messages)
+    _walk_events = sum(_entity.events for _entity in _entities)
+    _indexed = _time(_handler._dispatch, _messages)  # pylint: disable=protected-access
+    _index_events = sum(_entity.events for _entity in _entities) - _walk_events
+    _hass.loop.close()
+    if _walk_events != _index_events:
+        raise RuntimeError(f"The walk delivered {_walk_events} events, the index {_index_events}.")
+    return {"walk": _walked / frames, "index": _indexed / frames}
+
+
+def main() -> None:
+    _parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    _parser.add_argument("--devices", type=int, nargs="+", default=[10, 100, 1000])
+    _parser.add_argument("--frames", type=int, default=20000)
+    _args = _parser.parse_args()
+    print(f"{'devices':>7} {'walk µs':>9} {'index µs':>9} {'speed-up':>9}")
+    for _devices in _args.devices:
+        _result = run(_devices, _args.frames)
+        print(f"{_devices:7} {_result['walk'] * 1e6:9.2f} {_result['index'] * 1e6:9.2f} {_result['walk'] / _result['index']:9.1f}")
+
+
+if __name__ == "__main__":
+    main()
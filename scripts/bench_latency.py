@@ -0,0 +1,174 @@
+"""End-to-end latency of the commands of each platform, against a simulated gateway.
+
+From the root of the repository:
+
+    python -m scripts.bench_latency --workers 1 4 --loads 1 16 --devices 100 1000
+
+For every combination of command pool size, queue load and device count, a
+fake gateway is started with a synthetic configuration and a gateway handler
+connects to it, its entities being created by the platforms themselves. Each
+sample times a command from the entity setter (`async_turn_on`,
+`async_open_cover`, `async_set_temperature`) through the send buffer, the
+sending workers and the gateway, back as an event through the listening loop
+and `handle_event`, until the entity schedules its state write. The queue load
+is the number of commands in flight at any time.
+
+Only the devices of the local bus are commanded: OWNd 0.7.48 leaves the bus
+interface out of the entity of the events, so the devices behind an
+interface never get their feedback.
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import random
+import time
+from typing import Any, Dict, List
+
+from homeassistant.const import CONF_MAC
+
+from custom_components.myhome import climate, cover, light, switch
+from custom_components.myhome.const import CONF_ENTITY, DOMAIN
+from custom_components.myhome.validate import config_schema
+
+from scripts.fake_gateway import FakeGateway, gateway_devices
+from scripts.harness import StubHass, build_handler, config_entry, percentiles, register_entity, synthetic_config
+
+PLATFORMS = {"light": light, "switch": switch, "cover": cover, "climate": climate}
+CLIMATE_ZONES = 10
+COMMAND_TIMEOUT = 5
+
+
+def _command(platform: str, entity):
+    """A setter of the entity, all of which are answered by an event."""
+    if platform == "light":
+        # Also a single frame for the dimmable lights, which are queried after a plain switch on
+        return entity.async_turn_on(brightness_pct=100)
+    if platform == "switch":
+        return entity.async_turn_on()
+    if platform == "cover":
+        return entity.async_open_cover()
+    return entity.async_set_temperature(temperature=random.choice((19, 20, 21)))
+
+
+class _StateWrites:
+    """Resolves the pending command of an entity when it schedules its state write."""
+
+    def __init__(self):
+        self.pending: Dict[Any, asyncio.Future] = {}
+
+    def instrument(self, entity) -> None:
+        _schedule = entity.async_schedule_update_ha_state
+
+        def _async_schedule_update_ha_state(force_refresh: bool = False) -> None:
+            _pending = self.pending.pop(entity, None)
+            if _pending is not None and not _pending.done():
+                _pending.set_result(time.perf_counter())
+            _schedule(force_refresh)
+
+        entity.async_schedule_update_ha_state = _async_schedule_update_ha_state
+
+
+async def _async_entities(hass: StubHass, entry, gateway_config: Dict[str, Any], handler) -> Dict[str, List[Any]]:
+    _entities: Dict[str, List[Any]] = {}
+    for _platform, _module in PLATFORMS.items():
+        _created = []
+        await _module.async_setup_entry(hass, entry, _created.extend)
+        for _entity in _created:
+            register_entity(gateway_config, _platform, _entity._device_id, handler, _entity)
+        _local = [_entity for _entity in _created if _entity._interface is None]
+        if _local:
+            _entities[_platform] = _local
+    return _entities
+
+
+async def _async_client(platform: str, entities: List[Any], writes: _StateWrites, samples: int, latencies: List[float]) -> int:
+    """Send `samples` commands one after the other, returns how many timed out."""
+    _timeouts = 0
+    _entities = itertools.cycle(entities)
+    for _ in range(samples):
+        _entity = next(_entities)
+        _written = asyncio.get_running_loop().create_future()
+        writes.pending[_entity] = _written
+        _start = time.perf_counter()
+        await _command(platform, _entity)
+        try:
+            latencies.append(await asyncio.wait_for(_written, COMMAND_TIMEOUT) - _start)
+        except asyncio.TimeoutError:
+            writes.pending.pop(_entity, None)
+            _timeouts += 1
+    return _timeouts
+
+
+async def async_run(workers: int, load: int, devices: int, samples: int, latency: float, window: int) -> Dict[str, Dict[str, Any]]:
+    """Latency percentiles of each platform for one combination."""
+    _raw = synthetic_config(devices)
+    _gateway = next(iter(_raw))
+    _raw[_gateway]["climate"] = {f"zone_{_zone}": {"zone": str(_zone), "name": f"Zone {_zone}"} for _zone in range(1, CLIMATE_ZONES + 1)}
+    _config = config_schema(_raw)
+    _mac = next(iter(_config))
+
+    _fake = FakeGateway(gateway_devices(_config[_mac]), latency=latency)
+    _port = await _fake.start(port=0)
+    _hass = StubHass(asyncio.get_running_loop())
+    _entry = config_entry(_mac, port=_port)
+    _handler = build_handler(_hass, _config[_mac], _entry)
+    _hass.data[DOMAIN][_entry.data[CONF_MAC]][CONF_ENTITY] = _handler
+    _entities = await _async_entities(_hass, _entry, _config[_mac], _handler)
+    _writes = _StateWrites()
+    for _entity in itertools.chain.from_iterable(_entities.values()):
+        _writes.instrument(_entity)
+
+    _handler.start_listener()
+    _handler.start_command_pool(workers, window)
+    # Let the event session connect before the first command
+    while _fake.sessions["event"] < 1:
+        await asyncio.sleep(0.01)
+
+    _results = {}
+    for _platform, _platform_entities in _entities.items():
+        _latencies: List[float] = []
+        _clients = min(load, len(_platform_entities))
+        _timeouts = await asyncio.gather(
+            *(
+                _async_client(_platform, _platform_entities[_client::_clients], _writes, samples // _clients, _latencies)
+                for _client in range(_clients)
+            )
+        )
+        _results[_platform] = {**percentiles(_latencies), "timeouts": sum(_timeouts)}
+
+    await _handler.close_listener()
+    # The workers only see they are terminated once they wake up
+    _workers = [_handler.listening_worker, *_handler.sending_workers.values()]
+    for _worker in _workers:
+        _worker.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    await _fake.stop()
+    return _results
+
+
+async def async_main(workers: List[int], loads: List[int], devices: List[int], samples: int, latency: float, window: int) -> None:
+    print(f"{'workers':>7} {'load':>5} {'devices':>7} {'platform':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'timeouts':>8}")
+    for _workers, _load, _devices in itertools.product(workers, loads, devices):
+        _results = await async_run(_workers, _load, _devices, samples, latency, window)
+        for _platform, _result in _results.items():
+            _p50, _p95, _p99 = (f"{_result[_key]:8.1f}" if _result[_key] is not None else f"{'-':>8}" for _key in ("p50", "p95", "p99"))
+            print(f"{_workers:7} {_load:5} {_devices:7} {_platform:>8} {_p50} {_p95} {_p99} {_result['timeouts']:8}")
+
+
+def main() -> None:
+    _parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    _parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="command pool sizes")
+    _parser.add_argument("--loads", type=int, nargs="+", default=[1, 8, 32], help="commands in flight")
+    _parser.add_argument("--devices", type=int, nargs="+", default=[100, 1000], help="configured devices (up to 2000)")
+    _parser.add_argument("--samples", type=int, default=100, help="commands per platform")
+    _parser.add_argument("--latency", type=float, default=0.02, help="gateway reply latency (s)")
+    _parser.add_argument("--window", type=int, default=1, help="frames in flight per command session")
+    _args = _parser.parse_args()
+    # The handler logs every command and event at info level
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(async_main(_args.workers, _args.loads, _args.devices, _args.samples, _args.latency, _args.window))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Memory taken by the entities, with the shared device records against the former per-entity layout.
+
+From the root of the repository:
+
+    python -m scripts.bench_memory --devices 100 1000 2000
+
+Every light, switch and cover of a synthetic configuration gets its three
+entities (itself and its two lock buttons), built once as they are now,
+wrapping the record of their device, and once with the attributes every
+entity used to carry: its own device info dict, address attributes sliced
+from its WHERE and its own copies of the WHERE with its interface and of
+the unique ID. The memory allocated while building them is traced with
+`tracemalloc`. The addresses are cached when the configuration is
+validated, so neither layout is charged for them.
+"""
+import argparse
+import asyncio
+import gc
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from homeassistant.const import CONF_NAME
+from homeassistant.helpers.entity import Entity
+
+from custom_components.myhome.const import CONF_BUS_INTERFACE, CONF_DEVICE_MODEL, CONF_MANUFACTURER, CONF_WHERE, CONF_WHO, DOMAIN
+from custom_components.myhome.myhome_device import MyHOMEEntity
+from custom_components.myhome.validate import COVER, LIGHT, SWITCH, config_schema
+
+from scripts.harness import StubHass, build_handler, config_entry, configured_devices, synthetic_config
+
+# A light, switch or cover and its lock buttons
+ENTITIES_PER_DEVICE = 3
+
+
+class RecordEntity(MyHOMEEntity):
+    _address_attributes = True
+
+
+class LegacyEntity(Entity):
+    """The attributes of an entity before the device records."""
+
+    def __init__(self, hass, name, platform, device_id, who, where, manufacturer, model, gateway, interface=None):
+        self._hass = hass
+        self._platform = platform
+        self._who = who
+        self._where = where
+        self._device_id = device_id
+        self._attr_unique_id = f"{gateway.mac}-{self._device_id}"
+        self._manufacturer = manufacturer or "BTicino S.p.A."
+        self._model = model
+        self._gateway_handler = gateway
+        self._attr_has_entity_name = True
+        self._attr_name = None
+        self._attr_entity_registry_enabled_default = True
+        self._attr_should_poll = False
+
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, f"{gateway.mac}-{self._device_id}")},
+            "name": name,
+            "manufacturer": self._manufacturer,
+            "model": self._model,
+            "via_device": (DOMAIN, self._gateway_handler.unique_id),
+        }
+
+        self._interface = interface
+        self._full_where = f"{self._where}#4#{self._interface}" if self._interface is not None else self._where
+        self._attr_extra_state_attributes = {
+            "A": where[: len(where) // 2],
+            "PL": where[len(where) // 2 :],
+        }
+        if self._interface is not None:
+            self._attr_extra_state_attributes["Int"] = self._interface
+
+
+def _traced(build: Callable[[], List[Any]]) -> int:
+    """Bytes still allocated once `build` returned, its result being kept."""
+    gc.collect()
+    tracemalloc.start()
+    _before = tracemalloc.get_traced_memory()[0]
+    _entities = build()
+    gc.collect()
+    _allocated = tracemalloc.get_traced_memory()[0] - _before
+    tracemalloc.stop()
+    del _entities
+    return _allocated
+
+
+def run(devices: int) -> Dict[str, float]:
+    _config = config_schema(synthetic_config(devices))
+    _mac = next(iter(_config))
+    _loop = asyncio.new_event_loop()
+    _hass = StubHass(_loop)
+    _handler = build_handler(_hass, _config[_mac], config_entry(_mac))
+    _devices = [
+        (_platform, _device_id, _device)
+        for _platform, _device_id, _device in configured_devices(_config[_mac])
+        if _platform in (LIGHT, SWITCH, COVER)
+    ]
+
+    def _build(entity_class) -> List[Any]:
+        return [
+            entity_class(
+                hass=_hass,
+                name=_device[CONF_NAME],
+                platform=_platform,
+                device_id=_device_id,
+                who=_device[CONF_WHO],
+                where=_device[CONF_WHERE],
+                manufacturer=_device[CONF_MANUFACTURER],
+                model=_device.get(CONF_DEVICE_MODEL),
+                gateway=_handler,
+                interface=_device.get(CONF_BUS_INTERFACE),
+            )
+            for _platform, _device_id, _device in _devices
+            for _ in range(ENTITIES_PER_DEVICE)
+        ]
+
+    _entities = len(_devices) * ENTITIES_PER_DEVICE
+    _legacy = _traced(lambda: _build(LegacyEntity))
+    _records = _traced(lambda: _build(RecordEntity))
+    _loop.close()
+    return {"entities": _entities, "before": _legacy / _entities, "after": _records / _entities}
+
+
+def main() -> None:
+    _parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    _parser.add_argument("--devices", type=int, nargs="+", default=[100, 1000, 2000], help="configured devices (up to 2000)")
+    _args = _parser.parse_args()
+    print(f"{'devices':>7} {'entities':>8} {'before B':>9} {'after B':>9} {'saved':>6}")
+    for _devices in _args.devices:
+        _result = run(_devices)
+        print(
+            f"{_devices:7} {_result['entities']:8} {_result['before']:9.0f} {_result['after']:9.0f}"
+            f" {1 - _result['after'] / _result['before']:6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Command throughput of the pipelined command session against a slow gateway.
+
+From the root of the repository:
+
+    python -m scripts.bench_pipeline --latency 0.05 --frames 200
+
+A fake gateway answering every frame after `--latency` seconds is started
+locally, then the same frames are sent with OWNd's command session, which
+waits for each reply, and with the pipelined session for several windows.
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+from OWNd.connection import OWNCommandSession, OWNGateway
+from OWNd.message import OWNLightingCommand
+
+from custom_components.myhome.pipeline import MyHOMEPipelinedCommandSession
+
+from scripts.fake_gateway import FakeDevice, FakeGateway
+
+LOGGER = logging.getLogger("bench_pipeline")
+
+
+def _own_gateway(port: int) -> OWNGateway:
+    return OWNGateway(
+        {
+            "address": "127.0.0.1",
+            "port": port,
+            "password": None,
+            "ssdp_location": None,
+            "ssdp_st": None,
+            "deviceType": None,
+            "friendlyName": None,
+            "manufacturer": "BTicino S.p.A.",
+            "manufacturerURL": None,
+            "modelName": "F454",
+            "modelNumber": None,
+            "serialNumber": "00:03:50:00:00:01",
+            "UDN": None,
+        }
+    )
+
+
+async def _async_sequential(gateway: OWNGateway, frames: int) -> float:
+    _session = OWNCommandSession(gateway=gateway, logger=LOGGER)
+    await _session.connect()
+    _start = time.perf_counter()
+    for _index in range(frames):
+        await _session.send(OWNLightingCommand.switch_on(f"{_index % 9 + 1}{_index % 9 + 1}"))
+    _elapsed = time.perf_counter() - _start
+    await _session.close()
+    return _elapsed
+
+
+async def _async_pipelined(gateway: OWNGateway, frames: int, window: int) -> float:
+    _session = MyHOMEPipelinedCommandSession(gateway=gateway, logger=LOGGER, window=window)
+    await _session.connect()
+    _start = time.perf_counter()
+    _acknowledgements = [
+        await _session.submit(OWNLightingCommand.switch_on(f"{_index % 9 + 1}{_index % 9 + 1}")) for _index in range(frames)
+    ]
+    if not all(await asyncio.gather(*_acknowledgements)):
+        LOGGER.error("Some frames were not acknowledged.")
+    _elapsed = time.perf_counter() - _start
+    await _session.close()
+    return _elapsed
+
+
+async def async_main(latency: float, frames: int, windows) -> None:
+    _devices = {("1", _device.where): _device for _device in (FakeDevice("1", f"{_n}{_n}") for _n in range(1, 10))}
+    _fake = FakeGateway(_devices, latency=latency)
+    _gateway = _own_gateway(await _fake.start(port=0))
+
+    _elapsed = await _async_sequential(_gateway, frames)
+    print(f"{'session':>12} {'frames/s':>10} {'speed-up':>9}")
+    print(f"{'sequential':>12} {frames / _elapsed:10.1f} {1:9.1f}")
+    for _window in windows:
+        _pipelined = await _async_pipelined(_gateway, frames, _window)
+        print(f"{f'window {_window}':>12} {frames / _pipelined:10.1f} {_elapsed / _pipelined:9.1f}")
+    await _fake.stop()
+
+
+def main() -> None:
+    _parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    _parser.add_argument("--latency", type=float, default=0.05, help="gateway reply latency (s)")
+    _parser.add_argument("--frames", type=int, default=200)
+    _parser.add_argument("--windows", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    _args = _parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(async_main(_args.latency, _args.frames, _args.windows))
+
+
+if __name__ == "__main__":
+    main()
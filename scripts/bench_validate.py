@@ -0,0 +1,53 @@
+"""Time taken to validate configurations of increasing size.
+
+From the root of the repository:
+
+    python -m scripts.bench_validate --devices 100 1000 10000 --repeat 5
+
+Each synthetic configuration is validated `--repeat` times by the schema
+the integration loads `myhome.yaml` with, and the best times are reported,
+with the time per device. Validation is timed cold, as at startup, and warm,
+as when the configuration is reloaded with its addresses already cached.
+"""
+import argparse
+import time
+from typing import Tuple
+
+from custom_components.myhome.address import MyHOMEAddress
+from custom_components.myhome.validate import config_schema
+
+from scripts.harness import synthetic_config
+
+
+def _validate(devices: int) -> float:
+    # A new configuration every time, as the schema returns validated copies of it
+    _raw = synthetic_config(devices)
+    _start = time.perf_counter()
+    config_schema(_raw)
+    return time.perf_counter() - _start
+
+
+def run(devices: int, repeat: int) -> Tuple[float, float]:
+    """Best cold and warm times (s) to validate a configuration of `devices` devices."""
+    _cold = []
+    _warm = []
+    for _ in range(repeat):
+        MyHOMEAddress._cache.clear()  # pylint: disable=protected-access
+        _cold.append(_validate(devices))
+        _warm.append(_validate(devices))
+    return min(_cold), min(_warm)
+
+
+def main() -> None:
+    _parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    _parser.add_argument("--devices", type=int, nargs="+", default=[100, 1000, 10000])
+    _parser.add_argument("--repeat", type=int, default=5)
+    _args = _parser.parse_args()
+    print(f"{'devices':>7} {'cold ms':>9} {'µs/device':>10} {'warm ms':>9} {'µs/device':>10}")
+    for _devices in _args.devices:
+        _cold, _warm = run(_devices, _args.repeat)
+        print(f"{_devices:7} {_cold * 1000:9.1f} {_cold / _devices * 1e6:10.1f} {_warm * 1000:9.1f} {_warm / _devices * 1e6:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""Local stand-in for an OpenWebNet gateway, to load test the integration without hardware.
+
+The devices are those of a `myhome.yaml`, validated like the integration
+does. From the root of the repository:
+
+    python -m scripts.fake_gateway --config myhome.yaml --port 20000 --rate 100
+
+The gateway accepts event and command sessions, with or without an OPEN
+password, acknowledges commands after `--latency` seconds (in order, so
+that pipelined sessions overlap their round-trips), answers the status
+requests of lights, covers, heating zones and energy meters, and reports
+every change on the event sessions, as a real gateway does. Random light
+and cover changes are injected on the event sessions at `--rate` frames
+per second. It needs the integration's requirements (Home Assistant and
+OWNd) to be installed.
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import yaml
+
+from OWNd.connection import OWNSession
+
+from custom_components.myhome.address import WHERE_AREA, WHERE_GENERAL, WHERE_POINT, MyHOMEAddress
+from custom_components.myhome.const import CONF_BUS_INTERFACE, CONF_PLATFORMS, CONF_WHO, CONF_WHERE, CONF_ZONE
+from custom_components.myhome.validate import BUTTON, config_schema
+
+LOGGER = logging.getLogger("fake_gateway")
+
+ACK = "*#*1##"
+NACK = "*#*0##"
+COMMAND_SESSION = "*99*0##"
+EVENT_SESSION = "*99*1##"
+# Hourly frames sent for each day of a month of daily consumption, plus the day's total
+ENERGY_FRAMES_PER_DAY = 25
+
+
+class FakeDevice:
+    """State of one configured device, as reported in its frames."""
+
+    __slots__ = ("who", "where", "address", "what", "level", "temperature", "set_temperature", "energy")
+
+    def __init__(self, who: str, where: str, interface: Optional[str] = None):
+        self.who = who
+        self.address = MyHOMEAddress.get(who, where, interface)
+        self.where = self.address.full_where
+        self.what = 0
+        # Brightness (%) of lights, position (%) of covers
+        self.level = 0
+        self.temperature = 200
+        self.set_temperature = 210
+        # Totalizer (Wh)
+        self.energy = random.randint(100_000, 10_000_000)
+
+    def status(self) -> List[str]:
+        if self.who == "1":
+            return [f"*1*{self.what}*{self.where}##"]
+        if self.who == "2":
+            return [f"*2*{self.what}*{self.where}##", f"*#2*{self.where}*10*{self.what}*{self.level:03d}*0*0##"]
+        if self.who == "4":
+            return [
+                f"*4*110*{self.where}##",
+                f"*#4*{self.where}*0*{self.temperature:04d}##",
+                f"*#4*{self.where}*14*{self.set_temperature:04d}*3##",
+            ]
+        if self.who == "18":
+            return [f"*#18*{self.where}*51*{self.energy}##"]
+        if self.who == "25":
+            return [f"*25*{31 if self.what else 32}#0*{self.where}##"]
+        return []
+
+
+def load_devices(path: str, mac: str = None) -> Dict[str, FakeDevice]:
+    """Devices of a gateway of a configuration file, by WHO and WHERE (the first gateway by default)."""
+    with open(path, encoding="utf-8") as config_file:
+        _config = config_schema(yaml.safe_load(config_file))
+    if mac is None:
+        mac = next(iter(_config))
+    return gateway_devices(_config[mac])
+
+
+def gateway_devices(gateway_config: Dict[str, Any]) -> Dict[str, FakeDevice]:
+    """Devices of a gateway of a validated configuration, by WHO and WHERE."""
+    _devices = {}
+    for _platform, _platform_devices in gateway_config[CONF_PLATFORMS].items():
+        if _platform == BUTTON:
+            continue
+        for _device in _platform_devices.values():
+            _where = _device.get(CONF_WHERE, _device.get(CONF_ZONE))
+            if _where is None:
+                continue
+            _fake = FakeDevice(_device[CONF_WHO], _where, _device.get(CONF_BUS_INTERFACE))
+            _devices.setdefault((_fake.who, _fake.where), _fake)
+    return _devices
+
+
+class FakeGateway:
+    """asyncio TCP server speaking enough OpenWebNet to stand in for a gateway."""
+
+    def __init__(
+        self,
+        devices: Dict[Tuple[str, str], FakeDevice],
+        password: str = None,
+        latency: float = 0.0,
+        event_rate: float = 0.0,
+    ):
+        self.devices = devices
+        self.password = password
+        self.latency = latency
+        self.event_rate = event_rate
+        self._event_writers: List[asyncio.StreamWriter] = []
+        # Connection handler -> its writer
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self._server: asyncio.AbstractServer = None
+        self._injector: asyncio.Task = None
+        self._streams: Dict[str, asyncio.Task] = {}
+        self.sessions = {"command": 0, "event": 0}
+        self.frames_received = 0
+        self.events_sent = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 20000) -> int:
+        """Listen on `port`, any free one when 0, and return it."""
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        if self.event_rate > 0:
+            self._injector = asyncio.get_running_loop().create_task(self._inject_events())
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        for _task in [self._injector, *self._streams.values()]:
+            if _task is not None:
+                _task.cancel()
+        self._server.close()
+        for _writer in self._connections.values():
+            _writer.close()
+        # The handlers end on their own once their connection is closed
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def broadcast(self, frame: str) -> None:
+        """Report a frame on every event session."""
+        _data = frame.encode()
+        for _writer in list(self._event_writers):
+            if _writer.is_closing():
+                self._event_writers.remove(_writer)
+                continue
+            _writer.write(_data)
+            self.events_sent += 1
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        _handler = asyncio.current_task()
+        self._connections[_handler] = writer
+        try:
+            writer.write(ACK.encode())
+            _session = (await reader.readuntil(OWNSession.SEPARATOR)).decode()
+            if _session not in (COMMAND_SESSION, EVENT_SESSION) or not await self._authenticate(reader, writer):
+                writer.write(NACK.encode())
+                return
+            writer.write(ACK.encode())
+            if _session == EVENT_SESSION:
+                self.sessions["event"] += 1
+                self._event_writers.append(writer)
+                # Nothing is expected from an event session but its end
+                while await reader.read(1024):
+                    pass
+            else:
+                self.sessions["command"] += 1
+                await self._serve_commands(reader, writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            del self._connections[_handler]
+            if writer in self._event_writers:
+                self._event_writers.remove(writer)
+            writer.close()
+
+    async def _authenticate(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        if self.password is None:
+            return True
+        _nonce = "".join(random.choices("0123456789", k=9))
+        writer.write(f"*#{_nonce}##".encode())
+        _answer = (await reader.readuntil(OWNSession.SEPARATOR)).decode()
+        # The client's side of the OPEN password algorithm is OWNd's, which does not use its session
+        return _answer == f"*#{OWNSession._get_own_password(None, self.password, _nonce)}##"  # pylint: disable=protected-access
+
+    async def _serve_commands(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Answer every frame `latency` seconds after it came in, in order."""
+        _queue: asyncio.Queue = asyncio.Queue()
+
+        async def _answer():
+            while True:
+                _due, _frame = await _queue.get()
+                _delay = _due - time.monotonic()
+                if _delay > 0:
+                    await asyncio.sleep(_delay)
+                for _reply in self._handle_frame(_frame):
+                    writer.write(_reply.encode())
+                await writer.drain()
+
+        _answerer = asyncio.get_running_loop().create_task(_answer())
+        try:
+            while True:
+                _frame = (await reader.readuntil(OWNSession.SEPARATOR)).decode()
+                self.frames_received += 1
+                _queue.put_nowait((time.monotonic() + self.latency, _frame))
+        finally:
+            _answerer.cancel()
+
+    def _targets(self, who: str, where: str) -> List[FakeDevice]:
+        if who == "18":
+            # Meters 7x are addressed as 7x#0
+            where = where.split("#")[0]
+        _device = self.devices.get((who, where))
+        if _device is None and who == "4" and where.startswith("#"):
+            # Zones are addressed as #zone when their setting is written
+            _device = self.devices.get((who, where[1:]))
+        if _device is not None:
+            return [_device]
+        _address = MyHOMEAddress.get(who, where.split("#4#")[0])
+        if _address.kind == WHERE_GENERAL:
+            return [_device for _device in self.devices.values() if _device.who == who]
+        if _address.kind == WHERE_AREA:
+            return [
+                _device
+                for _device in self.devices.values()
+                if _device.who == who and _device.address.kind == WHERE_POINT and _device.address.area == _address.where
+            ]
+        return []
+
+    def _handle_frame(self, frame: str) -> List[str]:
+        """Replies on the command session, the changes being reported on the event sessions."""
+        _fields = frame[1:-2].split("*")
+        if len(_fields) < 2:
+            return [NACK]
+        if _fields[0].startswith("#"):
+            _who, _where = _fields[0][1:], _fields[1]
+            if len(_fields) == 2:
+                return self._status([_reply for _device in self._targets(_who, _where) for _reply in _device.status()])
+            return self._handle_dimension(_who, _where, _fields[2:])
+        if len(_fields) != 3:
+            return [NACK]
+        _who, _what, _where = _fields
+        if _who == "18":
+            return self._send_daily_consumption(_what, _where)
+        _targets = self._targets(_who, _where)
+        for _device in _targets:
+            _device.what = int(_what.split("#")[0])
+            if _who == "2":
+                _device.level = 100 if _device.what == 1 else 0 if _device.what == 2 else _device.level
+        self.broadcast(frame)
+        return [ACK]
+
+    def _status(self, frames: List[str]) -> List[str]:
+        """Status frames are sent on the command session and reported on the event sessions too."""
+        for _frame in frames:
+            self.broadcast(_frame)
+        return frames + [ACK]
+
+    def _handle_dimension(self, who: str, where: str, fields: List[str]) -> List[str]:
+        _dimension = fields[0]
+        _targets = self._targets(who, where)
+        if not _dimension.startswith("#"):
+            if who == "1" and _dimension == "1":
+                return self._status([f"*#1*{_device.where}*1*{100 + _device.level}*0##" for _device in _targets])
+            if who == "18" and _dimension.startswith("#1200"):
+                for _device in _targets:
+                    self._start_power_stream(_device, int(fields[1]) if len(fields) > 1 else 65)
+                return [ACK]
+            if who == "18" and _dimension in ("53", "54"):
+                return self._status([f"*#18*{_device.where}*{_dimension}*{_device.energy // 100}##" for _device in _targets])
+            return self._status([_reply for _device in _targets for _reply in _device.status()])
+
+        # Written dimensions: brightness, cover position and set temperature
+        for _device in _targets:
+            if who == "1" and _dimension == "#1":
+                _device.level = int(fields[1]) - 100
+                _device.what = 1 if _device.level > 0 else 0
+                self.broadcast(f"*#1*{_device.where}*1*{fields[1]}*0##")
+            elif who == "2" and _dimension == "#11#001":
+                _device.level = int(fields[1])
+                self.broadcast(f"*#2*{_device.where}*10*10*{_device.level:03d}*0*0##")
+            elif who == "4" and _dimension == "#14":
+                _device.set_temperature = int(fields[1])
+                self.broadcast(f"*#4*{_device.where}*14*{_device.set_temperature:04d}*3##")
+        return [ACK]
+
+    def _send_daily_consumption(self, what: str, where: str) -> List[str]:
+        """Report the hourly and daily consumption of a month, as meters do for `*18*59#month*where##`."""
+        _dimension, _, _month = what.partition("#")
+        if _dimension not in ("59", "510") or not where or where[0] not in "57":
+            return [NACK]
+        _month = int(_month)
+        _today = time.localtime()
+        _year = _today.tm_year if _dimension == "59" and _month <= _today.tm_mon else _today.tm_year - 1
+        _days = 31 if _month in (1, 3, 5, 7, 8, 10, 12) else 30 if _month != 2 else 29 if _year % 4 == 0 else 28
+        if (_year, _month) == (_today.tm_year, _today.tm_mon):
+            _days = _today.tm_mday - 1
+        for _day in range(1, _days + 1):
+            _total = 0
+            for _hour in range(1, ENERGY_FRAMES_PER_DAY):
+                _value = random.randint(50, 2000)
+                _total += _value
+                self.broadcast(f"*#18*{where}*511#{_month}#{_day}*{_hour}*{_value}##")
+            self.broadcast(f"*#18*{where}*511#{_month}#{_day}*25*{_total}##")
+        return [ACK]
+
+    def _start_power_stream(self, device: FakeDevice, minutes: int) -> None:
+        _stream = self._streams.pop(device.where, None)
+        if _stream is not None:
+            _stream.cancel()
+
+        async def _stream_power():
+            _end = time.monotonic() + minutes * 60
+            while time.monotonic() < _end:
+                _power = random.randint(0, 3000)
+                device.energy += round(_power / 3600)
+                self.broadcast(f"*#18*{device.where}*113*{_power}##")
+                await asyncio.sleep(1)
+
+        self._streams[device.where] = asyncio.get_running_loop().create_task(_stream_power())
+
+    async def _inject_events(self) -> None:
+        """Report random changes of the lights and covers, `event_rate` frames per second on average."""
+        _devices = [_device for _device in self.devices.values() if _device.who in ("1", "2")]
+        if not _devices:
+            return
+        _next = time.monotonic()
+        while True:
+            _device = random.choice(_devices)
+            if _device.who == "1":
+                _device.what = 0 if _device.what else 1
+            else:
+                _device.what = random.choice((0, 1, 2))
+            self.broadcast(f"*{_device.who}*{_device.what}*{_device.where}##")
+            _next += random.expovariate(self.event_rate)
+            await asyncio.sleep(max(0, _next - time.monotonic()))
+
+
+async def _async_main(args) -> None:
+    _gateway = FakeGateway(
+        load_devices(args.config, args.mac),
+        password=args.password,
+        latency=args.latency,
+        event_rate=args.rate,
+    )
+    _port = await _gateway.start(args.host, args.port)
+    LOGGER.info("Fake gateway with %s devices listening on %s:%s.", len(_gateway.devices), args.host, _port)
+    try:
+        while True:
+            await asyncio.sleep(10)
+            LOGGER.info(
+                "Sessions: %s, frames received: %s, events sent: %s.",
+                _gateway.sessions,
+                _gateway.frames_received,
+                _gateway.events_sent,
+            )
+    finally:
+        await _gateway.stop()
+
+
+def main() -> None:
+    _parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    _parser.add_argument("--config", required=True, help="myhome.yaml to take the devices from")
+    _parser.add_argument("--mac", help="gateway of the configuration to simulate, the first one by default")
+    _parser.add_argument("--host", default="127.0.0.1")
+    _parser.add_argument("--port", type=int, default=20000)
+    _parser.add_argument("--password", help="OPEN password (digits), none by default")
+    _parser.add_argument("--latency", type=float, default=0.0, help="delay before a command is answered (s)")
+    _parser.add_argument("--rate", type=float, default=0.0, help="random events per second")
+    _args = _parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    try:
+        asyncio.run(_async_main(_args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
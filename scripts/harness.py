@@ -0,0 +1,159 @@
+"""Gateway handler running outside Home Assistant, for the replay and benchmark scripts.
+
+The handler is given a stub of the few parts of Home Assistant it uses: the
+event loop, `hass.data` and an event bus that only counts what is fired.
+"""
+import asyncio
+import math
+import random
+import statistics
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import yaml
+
+from homeassistant.const import (
+    CONF_FRIENDLY_NAME,
+    CONF_HOST,
+    CONF_MAC,
+    CONF_NAME,
+    CONF_PASSWORD,
+    CONF_PORT,
+)
+
+from custom_components.myhome.const import (
+    CONF_DEVICE_TYPE,
+    CONF_ENTITIES,
+    CONF_FIRMWARE,
+    CONF_MANUFACTURER,
+    CONF_MANUFACTURER_URL,
+    CONF_PLATFORMS,
+    CONF_SSDP_LOCATION,
+    CONF_SSDP_ST,
+    CONF_UDN,
+    DOMAIN,
+)
+from custom_components.myhome.gateway import MyHOMEGatewayHandler
+from custom_components.myhome.validate import BUTTON, config_schema
+
+# Devices per gateway of the synthetic configurations, which fits the addresses of a bus
+GATEWAY_DEVICES = 2000
+
+
+class StubBus:
+    """Counts the events fired instead of delivering them."""
+
+    def __init__(self):
+        self.fired: Counter = Counter()
+
+    def async_fire(self, event_type: str, event_data: dict = None) -> None:
+        self.fired[event_type] += 1
+
+
+class StubHass:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.data: Dict[str, Any] = {DOMAIN: {}}
+        self.bus = StubBus()
+        # No recorder, so that the energy backfill never starts
+        self.config = SimpleNamespace(components=set(), path=lambda *parts: "/".join(parts))
+
+    def async_create_task(self, target) -> asyncio.Task:
+        return self.loop.create_task(target)
+
+
+def config_entry(mac: str, host: str = "127.0.0.1", port: int = 20000, password: str = None) -> SimpleNamespace:
+    return SimpleNamespace(
+        entry_id="harness",
+        options={},
+        data={
+            CONF_HOST: host,
+            CONF_PORT: port,
+            CONF_PASSWORD: password,
+            CONF_SSDP_LOCATION: None,
+            CONF_SSDP_ST: None,
+            CONF_DEVICE_TYPE: None,
+            CONF_FRIENDLY_NAME: "Harness",
+            CONF_MANUFACTURER: "BTicino S.p.A.",
+            CONF_MANUFACTURER_URL: None,
+            CONF_NAME: "F454",
+            CONF_FIRMWARE: None,
+            CONF_MAC: mac,
+            CONF_UDN: None,
+        },
+    )
+
+
+def load_config(path: str) -> Dict[str, Any]:
+    """Validated configuration file, keyed by gateway MAC address."""
+    with open(path, encoding="utf-8") as config_file:
+        return config_schema(yaml.safe_load(config_file))
+
+
+def synthetic_config(devices: int, seed: int = 0) -> Dict[str, Any]:
+    """Raw configuration with `devices` lights, switches, covers and sensors.
+
+    Points are spread over the 16 bus interfaces, and gateways are added
+    every GATEWAY_DEVICES devices so that every address stays unique.
+    """
+    _random = random.Random(seed)
+    _config = {}
+    for _gateway in range(math.ceil(devices / GATEWAY_DEVICES)):
+        _platforms = {"light": {}, "switch": {}, "cover": {}, "binary_sensor": {}, "sensor": {}}
+        # Lights and switches share the lighting WHOs, covers have their own
+        _points = {
+            _who: iter(
+                [(f"{_a:02d}{_pl:02d}", f"{_interface:02d}" if _interface else None) for _interface in range(16) for _a in range(1, 11) for _pl in range(1, 16)]
+            )
+            for _who in ("1", "2")
+        }
+        for _index in range(min(GATEWAY_DEVICES, devices - _gateway * GATEWAY_DEVICES)):
+            _platform = _random.choices(list(_platforms), weights=(50, 20, 15, 10, 5))[0]
+            if _platform == "sensor":
+                _device = {"where": f"5{_index + 1}", "class": "power"}
+            elif _platform == "binary_sensor":
+                _device = {"where": str(_index + 1)}
+            else:
+                _where, _interface = next(_points["2" if _platform == "cover" else "1"])
+                _device = {"where": _where}
+                if _interface is not None:
+                    _device["interface"] = _interface
+                if _platform == "light":
+                    _device["dimmable"] = _random.random() < 0.3
+            _device["name"] = f"Device {_gateway}-{_index}"
+            _platforms[_platform][f"device_{_index}"] = _device
+        _config[f"gateway_{_gateway}"] = {
+            "mac": f"00:03:50:00:{_gateway // 256:02x}:{_gateway % 256:02x}",
+            **{_platform: _devices for _platform, _devices in _platforms.items() if _devices},
+        }
+    return _config
+
+
+def build_handler(hass: StubHass, gateway_config: Dict[str, Any], entry: SimpleNamespace, **kwargs) -> MyHOMEGatewayHandler:
+    """A gateway handler for one gateway of a validated configuration, not started."""
+    hass.data[DOMAIN][entry.data[CONF_MAC]] = gateway_config
+    return MyHOMEGatewayHandler(hass=hass, config_entry=entry, **kwargs)
+
+
+def configured_devices(gateway_config: Dict[str, Any]):
+    """(platform, device ID, device) of every configured device, the buttons aside."""
+    for _platform, _devices in gateway_config[CONF_PLATFORMS].items():
+        if _platform == BUTTON:
+            continue
+        for _device_id, _device in _devices.items():
+            yield _platform, _device_id, _device
+
+
+def register_entity(gateway_config: Dict[str, Any], platform: str, device_id: str, handler: MyHOMEGatewayHandler, entity) -> None:
+    """Make an entity known like `MyHOMEEntity.async_added_to_hass` does."""
+    gateway_config[CONF_PLATFORMS][platform][device_id][CONF_ENTITIES][platform] = entity
+    handler.register_entity(device_id, entity)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    """p50/p95/p99 of latencies (s), in milliseconds."""
+    if len(samples) < 2:
+        return {"p50": samples[0] * 1000 if samples else None, "p95": None, "p99": None}
+    _quantiles = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": _quantiles[49] * 1000, "p95": _quantiles[94] * 1000, "p99": _quantiles[98] * 1000}
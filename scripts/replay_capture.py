@@ -0,0 +1,106 @@
+"""Replay a frame capture through the dispatch path of an isolated gateway handler.
+
+Captures are recorded with the `myhome.start_capture` service. From the root
+of the repository, with the `myhome.yaml` of the captured installation:
+
+    python -m scripts.replay_capture --config myhome.yaml --capture myhome_capture_000350000001.log
+
+A new handler is built for the replay, so its metrics only cover the
+replayed frames. It runs on a stub of Home Assistant: every configured
+device is represented by an entity recording when its frames reach it,
+nothing is sent to a gateway (the status requests the handler would send
+are only counted) and the events it fires are counted instead of being
+delivered. Frames are replayed as fast as possible, or at their original
+pace with `--realtime`.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List
+
+from OWNd.message import OWNMessage
+
+from custom_components.myhome.capture import async_read_capture
+from custom_components.myhome.const import DEFAULT_REFRESH_WINDOW
+
+from scripts.harness import StubHass, build_handler, config_entry, configured_devices, load_config, percentiles, register_entity
+
+
+class ReplayEntity:
+    """Stands for the entities of a device, recording how long its frames took to reach it."""
+
+    should_poll = False
+
+    def __init__(self, device_id: str, latencies: List[float], clock: Dict[str, float]):
+        self.entity_id = device_id
+        self._latencies = latencies
+        self._clock = clock
+
+    def handle_event(self, message) -> None:
+        self._latencies.append(time.perf_counter() - self._clock["frame"])
+
+    async def async_update(self) -> None:
+        """Nothing is queried during a replay."""
+
+
+async def async_replay(config_path: str, capture_path: str, mac: str = None, realtime: bool = False) -> Dict[str, Any]:
+    _config = load_config(config_path)
+    mac = mac or next(iter(_config))
+    _hass = StubHass(asyncio.get_running_loop())
+    _handler = build_handler(_hass, _config[mac], config_entry(mac))
+    # Without sending workers, the status requests stay in the send buffer
+    _handler.max_workers = 0
+
+    _latencies: List[float] = []
+    _clock = {"frame": 0.0}
+    for _platform, _device_id, _ in configured_devices(_config[mac]):
+        register_entity(_config[mac], _platform, _device_id, _handler, ReplayEntity(_device_id, _latencies, _clock))
+
+    _frames = await async_read_capture(capture_path)
+    _start = time.perf_counter()
+    for _offset, _frame in _frames:
+        if realtime:
+            _delay = _start + _offset - time.perf_counter()
+            if _delay > 0:
+                await asyncio.sleep(_delay)
+        _message = OWNMessage.parse(_frame)
+        _clock["frame"] = time.perf_counter()
+        try:
+            await _handler.handle_received(_message if _message else _frame)
+        except Exception:  # pylint: disable=broad-except
+            # Counted like the listener does, the replay goes on
+            _handler.metrics.handler_errors += 1
+    _elapsed = time.perf_counter() - _start
+    # Let the refreshes still pending queue their status requests
+    await asyncio.sleep(DEFAULT_REFRESH_WINDOW)
+    _requests = _handler.send_buffer.qsize()
+    await _handler.close_listener()
+
+    return {
+        "frames": len(_frames),
+        "elapsed": _elapsed,
+        "frames_per_second": len(_frames) / _elapsed if _elapsed > 0 else 0,
+        "handler_errors": _handler.metrics.handler_errors,
+        "frame_to_entity_ms": percentiles(_latencies),
+        "dispatch_latency": _handler.metrics.dispatch_latency.as_dict(),
+        "events_fired": dict(_hass.bus.fired),
+        "status_requests_not_sent": _requests,
+    }
+
+
+def main() -> None:
+    _parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    _parser.add_argument("--config", required=True, help="myhome.yaml of the captured installation")
+    _parser.add_argument("--capture", required=True, help="capture log to replay")
+    _parser.add_argument("--mac", help="gateway of the configuration the capture is from, the first one by default")
+    _parser.add_argument("--realtime", action="store_true", help="replay at the original pace")
+    _args = _parser.parse_args()
+    # The handler logs every frame it does not support
+    logging.basicConfig(level=logging.ERROR)
+    print(json.dumps(asyncio.run(async_replay(_args.config, _args.capture, _args.mac, _args.realtime)), indent=2))
+
+
+if __name__ == "__main__":
+    main()